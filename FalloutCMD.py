@@ -1,13 +1,31 @@
 import os
 import sys
+import argparse
+import asyncio
+import codecs
+import concurrent.futures
+import contextvars
+import hashlib
+import io
+import json
+import marshal
+import mmap
 import random
+import re
+import shutil
+import signal
+import struct
+import threading
+import time
+import zipfile
+import zlib
 
 """
 Autor: Dylan Palumbo
 Text Based Fallout Inspired Game
 Written for Intro to Scripting Class
 Requires: 
-    - Intact 'art' and 'text' directories in same directory as script for proper function.
+    - Intact 'art' and 'text' directories, or 'FalloutCMD.zip', in same directory as script for proper function.
     - Windows, Mac OS, or Linx
     - Python 3
 """
@@ -18,22 +36,33 @@ Requires:
 class TextColor:
     """
     A class used to format strings with different color codes.
+    Text is encoded as color spans: one color code at the start of each run of same-colored text on a line,
+    and one reset code at the end of the run, rather than a code for every character.
+    Text can switch color part way through with the tags {GREEN}, {YELLOW} and {RED}, and '{/}' switches back
+    to the current color, so a single asset can hold several colors.
 
     Attributes
     ----------
     GREEN = Color code for green
     YELLOW = Color code for yellow
     RED = Color code for red
+    RESET = Code to reset text back to the terminal's default color
     current = Current text color
 
     Methods
     ----------
+    spans(in_str)
+        Returns list of (text, color code) spans for a string.
+    encode(spans)
+        Returns string of spans encoded with color codes.
     format_str(in_str)
         Returns string formatted as current color.
     """
     GREEN = '\033[92m'
     YELLOW = '\033[93m'
     RED = '\033[91m'
+    RESET = '\033[0m'
+    _TAG = re.compile('{(GREEN|YELLOW|RED|/)}')  # color tags that can be placed inside text
 
     def __init__(self, color=GREEN):
         """
@@ -44,358 +73,3839 @@ class TextColor:
         """
         self.current = color  # set current color to passed color code
 
+    def spans(self, in_str):
+        """
+        Splits a string into color spans using its color tags. Text outside any tag is the current color.
+        :param in_str: String to be split, may contain color tags
+        :type in_str: str
+        :return: List of (text, color code) tuples
+        """
+        if '{' not in in_str:  # no tags, the whole string is one span
+            return [(in_str, self.current)]
+
+        span_list = []
+        color = self.current  # text starts out as the current color
+        start = 0  # index where the text of the next span starts
+        for tag in self._TAG.finditer(in_str):  # loop through each color tag
+            span_list.append((in_str[start:tag.start()], color))
+            color = self.current if tag.group(1) == '/' else getattr(TextColor, tag.group(1))
+            start = tag.end()
+        span_list.append((in_str[start:], color))
+        return span_list
+
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def encode(self, span_list):
+        """
+        Encodes color spans into a single string. Each line is encoded on its own, a color code starts each run of
+        same-colored text and the line ends with a reset, so every line can be drawn without the lines before it.
+        A blank color code ('') leaves text in the terminal's default color.
+        :param span_list: List of (text, color code) tuples
+        :type span_list: list
+        :return: Encoded string
+        """
+        out = []
+        active = ''  # color code in effect on the current line
+        for text, color in span_list:  # loop through each span
+            lines = text.split('\n')
+            for i in range(len(lines)):  # loop through the lines of the span, using 'i' as index
+                if i > 0:  # a new line was started
+                    if active:  # close the run on the line that ended
+                        out.append(self.RESET)
+                        active = ''
+                    out.append('\n')
+                if lines[i] == '':  # nothing to color
+                    continue
+                if color != active:  # start a new run
+                    out.append(color if color else self.RESET)
+                    active = color
+                out.append(lines[i])
+        if active:  # close the final run
+            out.append(self.RESET)
+        return ''.join(out)
+
     def format_str(self, in_str):
         """
-        Formats and returns a string with current color code.
-        :param in_str: String to be formatted
-        :type in_str: str
-        :return: Passed 'in_str' formatted with current color
+        Formats and returns a string with current color code.
+        :param in_str: String to be formatted, may contain color tags
+        :type in_str: str
+        :return: Passed 'in_str' formatted with current color
+        """
+        return self.encode(self.spans(in_str))  # return 'in_str' encoded as color spans
+
+
+class BoxLayout:
+    """
+    Lays out display boxes to fit the width of the screen: the rules above and below the text are cut to the width,
+    and lines of text too long for it are word wrapped, continuing at the same indent. Color tags take up no
+    columns, and are kept in the text until the box is colored, so a color can carry on over a wrapped line.
+    Each finished box is kept, keyed by its text, color and width, so a box drawn again at the same width is
+    a single lookup (the screen's width is only measured again when the terminal is resized, see 'ScreenRenderer').
+
+    Attributes
+    ----------
+    WIDTH = Width of a box on a wide enough screen
+    MIN_WIDTH = Narrowest box, text is not wrapped any narrower
+    MAX_LAYOUTS = Most boxes kept, all are dropped when there are more
+
+    Methods
+    ----------
+    wrap(text, width)
+        Returns the lines of text wrapped to a width.
+    box(txt, color_code, width)
+        Returns the colored lines of a display box.
+    """
+    WIDTH = 96
+    MIN_WIDTH = 20
+    MAX_LAYOUTS = 4096
+    _GAPS = re.compile('( +)')  # runs of blank space between words
+
+    def __init__(self):
+        """
+        Constructs a layout engine with no boxes laid out yet.
+        """
+        self._layouts = {}  # (text, color code, width) -> colored lines of the box
+
+    @staticmethod
+    def _visible(text):
+        """
+        Measures the columns text takes up on screen, color tags take up none.
+        :param text: Text to be measured, may contain color tags
+        :type text: str
+        :return: Number of columns
+        """
+        return len(TextColor._TAG.sub('', text)) if '{' in text else len(text)
+
+    def wrap(self, text, width):
+        """
+        Word wraps text to a width. Lines that fit are kept exactly as they are, lines that don't are broken at
+        the blank space before the first word that doesn't fit, and continue at the same indent. A word wider than
+        the width is left whole.
+        :param text: Text to be wrapped, may contain multiple lines and color tags
+        :type text: str
+        :param width: Most columns in a line
+        :type width: int
+        :return: List of lines
+        """
+        lines = []
+        for line in text.split('\n'):
+            if self._visible(line) <= width:  # fits, as most lines do
+                lines.append(line)
+                continue
+
+            line = line.rstrip(' ')
+            words = line.lstrip(' ')
+            indent = line[:len(line) - len(words)]
+            if len(indent) > width // 2:  # too deep to continue at, wrapped lines start at the edge instead
+                indent = ''
+            parts = self._GAPS.split(words)  # words, with the blank space between them
+            current = line[:len(line) - len(words)] + parts[0]
+            length = self._visible(current)
+            for i in range(1, len(parts), 2):  # loop through each gap and the word after it, using 'i' as index
+                size = self._visible(parts[i + 1])
+                if length + len(parts[i]) + size <= width:  # the word fits on this line
+                    current += parts[i] + parts[i + 1]
+                    length += len(parts[i]) + size
+                else:  # start a new line with the word
+                    lines.append(current)
+                    current = indent + parts[i + 1]
+                    length = len(indent) + size
+            lines.append(current)
+        return lines
+
+    def box(self, txt, color_code, width):
+        """
+        Lays out a display box, or finds it if it has been laid out at this width before.
+        :param txt: Text to be displayed
+        :type txt: str
+        :param color_code: Color of display to be applied
+        :type color_code: str
+        :param width: Width of the box
+        :type width: int
+        :return: List of colored lines, shared by every caller, so it must not be changed
+        """
+        key = (txt, color_code, width)
+        lines = self._layouts.get(key)
+        if lines is None:  # not laid out at this width yet
+            if len(self._layouts) >= self.MAX_LAYOUTS:  # e.g. many widths from many players, start again
+                self._layouts.clear()
+            rule = '-' * width
+            text = '\n'.join(self.wrap(txt, width))
+            lines = TextColor(color_code).format_str(rule + '\n' + text + '\n' + rule).split('\n')
+            self._layouts[key] = lines
+        return lines
+
+
+class AssetArchive:
+    """
+    Serves assets straight out of 'FalloutCMD.zip' without unpacking it.
+    The zip's central directory is read once to build an index of asset name -> data offset,
+    after which members are read through a read-only memory-mapped view of the archive.
+
+    Attributes
+    ----------
+    path = Path to the archive file
+
+    Methods
+    ----------
+    find()
+        Returns an archive for the first 'FalloutCMD.zip' found, or None.
+    has(path)
+        Check if the archive holds a given asset path.
+    read(path)
+        Returns an asset from the archive as a string.
+    close()
+        Releases the memory-mapped view and archive file.
+    """
+    NAME = 'FalloutCMD.zip'
+
+    def __init__(self, path):
+        """
+        Opens and indexes the archive at 'path'.
+        Raises OSError if the file cannot be opened, or zipfile.BadZipFile if it is not a valid zip.
+        :param path: Path to zip archive
+        :type path: str
+        """
+        self.path = path
+        self._index = {}  # asset name (e.g. 'art/armory.txt') -> (data offset, compressed size, compress type)
+
+        self._file = open(path, 'rb')
+        try:
+            self._view = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            with zipfile.ZipFile(self._file) as archive:  # only used to walk the central directory
+                members = [info for info in archive.infolist() if not info.is_dir()]
+        except (ValueError, OSError, zipfile.BadZipFile):  # empty, unmappable or corrupt archive
+            self._file.close()
+            raise zipfile.BadZipFile("'" + path + "' is not a usable asset archive")
+
+        for info in members:
+            if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):  # not readable from the view
+                continue
+            # the local file header is 30 bytes, followed by the file name and extra field of variable length
+            name_len, extra_len = struct.unpack_from('<HH', self._view, info.header_offset + 26)
+            member = (info.header_offset + 30 + name_len + extra_len, info.compress_size, info.compress_type)
+
+            # the distributed zip holds the assets as they are laid out next to the script ('art/armory.txt'),
+            # members of a zip that wraps everything in a top folder are also indexed without it
+            # ('FalloutCMD/art/armory.txt' is found as 'art/armory.txt')
+            self._index[info.filename] = member
+            if '/' in info.filename:
+                self._index.setdefault(info.filename.split('/', 1)[1], member)
+
+    @classmethod
+    def find(cls):
+        """
+        Looks for the asset archive next to the script, then in the current directory.
+        The 'FALLOUTCMD_ARCHIVE' environment variable can point to an archive anywhere else.
+        :return: AssetArchive object, or None if no usable archive was found
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        candidates = [os.environ.get('FALLOUTCMD_ARCHIVE', ''),
+                      os.path.join(script_dir, cls.NAME),
+                      cls.NAME]
+
+        for candidate in candidates:
+            if candidate and os.path.isfile(candidate):
+                try:
+                    return cls(candidate)
+                except (OSError, zipfile.BadZipFile):  # try the next candidate
+                    continue
+        return None
+
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def _name(self, path):
+        """
+        Converts a file system path into the archive's asset name.
+        :param path: Path to asset, e.g. os.path.join('art', 'armory.txt')
+        :type path: str
+        :return: Asset name using '/' separators
+        """
+        return os.path.normpath(path).replace(os.sep, '/')
+
+    def has(self, path):
+        """
+        Checks if the archive holds an asset.
+        :param path: Path to asset
+        :type path: str
+        :return: Boolean if the asset is in the archive
+        """
+        return self._name(path) in self._index
+
+    def read(self, path):
+        """
+        Reads an asset out of the memory-mapped archive and decodes it as UTF-8.
+        Raises KeyError if the asset is not in the archive.
+        :param path: Path to asset
+        :type path: str
+        :return: Asset contents as string, with newlines normalized like a file opened in text mode
+        """
+        offset, size, compress_type = self._index[self._name(path)]
+        raw = self._view[offset:offset + size]  # slice the member's bytes straight out of the mapped archive
+        if compress_type == zipfile.ZIP_DEFLATED:
+            raw = zlib.decompress(raw, -15)  # raw deflate stream, no zlib header
+
+        return raw.decode('UTF-8').replace('\r\n', '\n').replace('\r', '\n')
+
+    def close(self):
+        """
+        Releases the memory-mapped view and closes the archive file.
+        """
+        self._view.close()
+        self._file.close()
+
+
+class AssetCache:
+    """
+    A process-wide cache of art and text assets, shared by every File object.
+    Each asset is read once and kept in memory keyed by its path. An asset is only re-read
+    when the file's modification time or size changes on disk, and the disk is checked at most once a turn
+    (see 'tick()'), so an asset used many times in a turn costs a single 'os.stat' call.
+    Assets missing from disk are served from the attached 'archive', if there is one.
+    Loose files always take priority, so an unpacked asset can override the archived copy.
+
+    Attributes
+    ----------
+    archive = Optional AssetArchive to fall back on
+    verified = Paths already checked against the asset manifest, served without checking the disk
+    hits = Number of reads served from memory
+    misses = Number of reads that had to load the file from disk or archive
+    turn = Number of the turn, assets checked in this turn are not checked again until the next
+
+    Methods
+    ----------
+    is_readable(path)
+        Checks if the asset can be served, from memory, disk or archive.
+    read(path)
+        Returns the asset contents as a string.
+    lines(path)
+        Returns the asset contents as a tuple of lines with trailing blank space stripped.
+    colored(path, color_code)
+        Returns the asset's lines colored, as drawn on screen.
+    version(path)
+        Returns a number that changes every time the asset is loaded again.
+    tick()
+        Starts a new turn, so assets are checked for changes again.
+    clear()
+        Drops every cached asset and resets the hit / miss counts.
+    stats()
+        Returns the cache counters as a dictionary.
+    """
+    def __init__(self, archive=None):
+        """
+        Constructs an empty asset cache.
+        :param archive: Optional AssetArchive to fall back on for assets missing from disk
+        :type archive: AssetArchive
+        """
+        self.archive = archive
+        self.verified = set()
+        # path -> [mtime, size, contents, lines, colored lines by color code, version, turn last checked],
+        # mtime is None for archived assets
+        self._entries = {}
+        self._lock = threading.Lock()  # the manifest is checked by several threads at once, counts are kept under it
+        self.hits = 0
+        self.misses = 0
+        self._loads = 0  # version given to the next asset loaded, never reset so a version is never reused
+        self.turn = 0
+
+    def _entry(self, path):
+        """
+        Finds the cache entry for a path, loading or reloading the file if needed.
+        A single 'os.stat' call both validates the path and detects changes to the file, and is only made once a turn.
+        :param path: Path to asset file
+        :type path: str
+        :return: Cache entry as list of [mtime, size, contents, lines, colored lines by color code, version,
+                 turn last checked]
+        """
+        entry = self._entries.get(path)
+        # archived assets never change, and an asset already checked this turn is not checked again
+        if entry is not None and (entry[0] is None or entry[6] == self.turn):
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        try:
+            stat = os.stat(path)
+        except OSError:  # the file is gone or unreadable
+            if entry is not None:  # keep serving the copy already in memory
+                entry[6] = self.turn
+                with self._lock:
+                    self.hits += 1
+                return entry
+            if self.archive is None or not self.archive.has(path):  # nothing to fall back on
+                raise
+            with self._lock:
+                self.misses += 1
+                self._loads += 1
+                version = self._loads
+            contents = self.archive.read(path)
+            entry = [None, len(contents), contents, None, {}, version, self.turn]
+            self._entries[path] = entry
+            return entry
+
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:  # file is unchanged
+            entry[6] = self.turn
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        with self._lock:
+            self.misses += 1
+            self._loads += 1
+            version = self._loads
+        with open(path, 'r', encoding='UTF-8') as file:  # with the file open as 'read' with UTF-8 encoding
+            contents = file.read()
+        # lines are split when they are first needed
+        entry = [stat.st_mtime_ns, stat.st_size, contents, None, {}, version, self.turn]
+        self._entries[path] = entry
+        return entry
+
+    def is_readable(self, path):
+        """
+        Checks if an asset can be served. Assets already held in memory, or checked against the manifest
+        at startup, skip the 'os.access' check.
+        :param path: Path to asset file
+        :type path: str
+        :return: Boolean if asset is readable
+        """
+        if path in self.verified or path in self._entries:  # asset was checked at startup or already loaded once
+            return True
+        if os.path.isfile(path) and os.access(path, os.R_OK):  # file and path exists and is readable
+            return True
+        return self.archive is not None and self.archive.has(path)  # asset is packed in the archive
+
+    def read(self, path):
+        """
+        Returns an asset as a string.
+        :param path: Path to asset file
+        :type path: str
+        :return: Asset contents as string
+        """
+        return self._entry(path)[2]
+
+    def lines(self, path):
+        """
+        Returns an asset as a tuple of lines, each with trailing blank space stripped.
+        :param path: Path to asset file
+        :type path: str
+        :return: Asset lines as tuple
+        """
+        return self._lines(self._entry(path))
+
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def _lines(self, entry):
+        """
+        Splits a cache entry's contents into lines, the first time they are needed.
+        :param entry: Cache entry
+        :type entry: list
+        :return: Asset lines as tuple
+        """
+        if entry[3] is None:  # lines have not been split for this version of the file yet
+            lines = entry[2].split('\n')
+            if lines[-1] == '':  # file ends with a newline, there is no final line to keep
+                lines.pop()
+            entry[3] = tuple(line.rstrip() for line in lines)
+        return entry[3]
+
+    def colored(self, path, color_code):
+        """
+        Returns an asset colored and split into screen lines, the way 'File.print_utf8()' draws it. The colored
+        lines are kept with the asset for each color, so an asset drawn every frame (the HUD, room art) is only
+        colored once, until the file changes.
+        :param path: Path to asset file
+        :type path: str
+        :param color_code: Color of the asset
+        :type color_code: str
+        :return: Colored lines as tuple, empty for an empty asset
+        """
+        entry = self._entry(path)
+        colored = entry[4].get(color_code)
+        if colored is None:  # not drawn in this color yet
+            lines = self._lines(entry)
+            # the file is encoded as a whole so a color tag can carry on over multiple lines
+            colored = tuple(TextColor(color_code).format_str('\n'.join(lines)).split('\n')) if lines else ()
+            entry[4][color_code] = colored
+        return colored
+
+    def version(self, path):
+        """
+        Finds the version of an asset, a number that changes every time the asset is loaded again because the file
+        changed. Anything built from an asset and kept outside the cache (room drawings, the Pip-Boy border, the
+        fight) keeps the versions it was built from, and is built again when they change. Like every use of an
+        asset, this only checks the disk the first time in a turn.
+        :param path: Path to asset file
+        :type path: str
+        :return: Version of the asset as int
+        """
+        return self._entry(path)[5]
+
+    def tick(self):
+        """
+        Starts a new turn, each asset is checked for changes on disk again the next time it is used.
+        Called each time the player's input is read (see 'ask_command()').
+        """
+        self.turn += 1
+
+    def clear(self):
+        """
+        Drops every cached asset and resets the hit / miss counts.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns the cache counters.
+        :return: Dictionary of 'hits', 'misses' and number of cached 'assets'
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'assets': len(self._entries)}
+
+
+class AssetManifest:
+    """
+    The list of every art and text asset the game needs, with the size and SHA-256 hash of each, kept in
+    'manifest.json' (next to the script, or in the archive). The whole install is checked against it once at
+    startup, so a missing or damaged asset is found before the game starts rather than when a player first reaches
+    it, and every problem is reported at once.
+    Sizes and hashes are of the asset's text with newlines normalized, as the game reads it, so the same manifest
+    checks both loose files and the archive.
+
+    Attributes
+    ----------
+    NAME = Name of the manifest file
+    DIRECTORIES = Directories holding the assets
+    FILES = Assets outside those directories
+    assets = Dictionary of asset name (e.g. 'art/armory.txt') -> (size in bytes, SHA-256 hex digest)
+
+    Methods
+    ----------
+    load(cache)
+        Returns the manifest read through the asset cache, or None if there is none.
+    build(cache)
+        Returns a manifest of the assets currently in the asset directories.
+    write(path)
+        Writes the manifest as JSON.
+    verify(cache, workers)
+        Checks every asset in parallel, and returns the problems found.
+    """
+    NAME = 'manifest.json'
+    DIRECTORIES = ('art', 'text')
+    FILES = ('world.json',)
+
+    def __init__(self, assets):
+        """
+        Constructs a manifest.
+        :param assets: Dictionary of asset name -> (size, SHA-256 hex digest)
+        :type assets: dict
+        """
+        self.assets = assets
+
+    @classmethod
+    def load(cls, cache):
+        """
+        Reads the manifest through the asset cache, so it is found on disk or in the archive like any asset.
+        Raises ValueError if the manifest is not valid.
+        :param cache: Asset cache to read the manifest through
+        :type cache: AssetCache
+        :return: AssetManifest object, or None if there is no manifest
+        """
+        if not cache.is_readable(cls.NAME):  # install from before the manifest, assets are checked when used
+            return None
+        try:
+            assets = json.loads(cache.read(cls.NAME))['assets']
+            return cls({name: (int(size), str(digest)) for name, (size, digest) in assets.items()})
+        except (ValueError, KeyError, TypeError, AttributeError):  # not JSON, or not shaped like a manifest
+            raise ValueError("'" + cls.NAME + "' is damaged")
+
+    @classmethod
+    def build(cls, cache):
+        """
+        Builds a manifest of every asset in the asset directories on disk.
+        :param cache: Asset cache to read the assets through
+        :type cache: AssetCache
+        :return: AssetManifest object
+        """
+        names = [directory + '/' + name for directory in cls.DIRECTORIES
+                 for name in sorted(os.listdir(directory)) if name.endswith('.txt')] + list(cls.FILES)
+        return cls({name: cls._measure(cache, name) for name in names})
+
+    @classmethod
+    def path(cls, name):
+        """
+        Converts an asset name into the path the game opens it by.
+        :param name: Asset name using '/' separators
+        :type name: str
+        :return: Path to asset, e.g. os.path.join('art', 'armory.txt')
+        """
+        return os.path.join(*name.split('/'))
+
+    @classmethod
+    def _measure(cls, cache, name):
+        """
+        Reads an asset and measures it.
+        :param cache: Asset cache to read the asset through
+        :type cache: AssetCache
+        :param name: Asset name
+        :type name: str
+        :return: Tuple of (size in bytes, SHA-256 hex digest)
+        """
+        data = cache.read(cls.path(name)).encode('UTF-8')
+        return len(data), hashlib.sha256(data).hexdigest()
+
+    def write(self, path):
+        """
+        Writes the manifest as JSON, one asset per line so changes to it are easy to review.
+        :param path: Path to write the manifest to
+        :type path: str
+        """
+        lines = ['    ' + json.dumps(name) + ': [' + str(size) + ', "' + digest + '"]'
+                 for name, (size, digest) in sorted(self.assets.items())]
+        with open(path, 'w', encoding='UTF-8', newline='\n') as file:
+            file.write('{\n  "assets": {\n' + ',\n'.join(lines) + '\n  }\n}\n')
+
+    def verify(self, cache, workers=8):
+        """
+        Reads and hashes every asset through the asset cache, several at a time, and marks the assets that match
+        as verified. The assets are left loaded in the cache for the game to use.
+        :param cache: Asset cache to read the assets through
+        :type cache: AssetCache
+        :param workers: Number of assets read at once
+        :type workers: int
+        :return: List of problems found, one line for each asset that is missing or does not match
+        """
+        def check(name):
+            try:
+                size, digest = self._measure(cache, name)
+            except UnicodeDecodeError:  # the asset is there, but damaged
+                return name + " is not UTF-8 text"
+            except (OSError, KeyError):  # not on disk or in the archive
+                return name + " is missing"
+            expected_size, expected_digest = self.assets[name]
+            if size != expected_size:
+                return name + " is " + str(size) + " bytes, expected " + str(expected_size)
+            if digest != expected_digest:
+                return name + " does not match the manifest"
+            return None
+
+        names = sorted(self.assets)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(check, names))  # file reads release the interpreter lock, so they overlap
+
+        problems = []
+        for name, problem in zip(names, results):
+            if problem is None:
+                cache.verified.add(self.path(name))
+            else:
+                problems.append(problem)
+        return problems
+
+
+class File:
+    """
+    Class handles all file operations as a File object.
+
+    Attributes
+    ----------
+    path = Path to create file object.
+
+    Methods
+    ----------
+    print_utf8(color_code)
+        Prints entire file with UTF-8 encoding.
+    to_str()
+        Returns file as a string.
+    to_list()
+        Returns list of file lines.
+    """
+    def __init__(self, path):
+        """
+        Validates and constructs necessary 'path' for File object
+        :param path: Path to file
+        :type path: str
+        """
+        if asset_cache.is_readable(path):  # asset is cached, or file and path exists and is readable
+            self.path = path  # give object its path
+        else:  # the file or path could not be found
+            clear_display()  # clear the display
+            err_str = "The dependency \'" + path + "\' could not be found.\n"  # build error message string
+            err_str += "Please ensure that this script is in the proper \'FalloutCMD\' directory.\n"
+            err_str += "For proper operation keep \'FalloutCMD.zip\' next to this script, or unpack it and run script "
+            err_str += "from its root directory."
+            display_box(err_str, TextColor.RED)  # display error message and instructions
+            player_input.pause()  # wait for player to press 'enter'
+            player_input.finish('error')  # exit the script
+
+    def print_utf8(self, color_code):
+        """
+        Prints a file line by line using the 'color_code' passed.
+        File is read with UTF-8 encoding to read and print the special characters,
+        such as in a line art file, properly.
+        :param color_code: Color for printed file to be displayed
+        :type color_code: str
+        """
+        screen.print_lines(asset_cache.colored(self.path, color_code))  # the file's cached lines, colored once
+
+    def to_str(self):
+        """
+        Reads a file with UTF-8 encoding and returns it contents as a string.
+        :return: File contents as string
+        """
+
+        return asset_cache.read(self.path)  # return file contents from the asset cache
+
+    def to_list(self):
+        """
+        Reads the lines of a file into a list using UTF-8 encoding.
+        Trailing blank space is stripped from each line.
+        :return: List of file lines
+        """
+
+        return list(asset_cache.lines(self.path))  # return a new list, callers are free to change it
+
+
+class ScreenRenderer:
+    """
+    Draws the game to the terminal one frame at a time using ANSI escape sequences, without starting
+    a 'cls' / 'clear' process. Everything drawn for a frame (art, display boxes, HUD and the input prompt)
+    is collected into a buffer first and sent to the terminal with a single write when the frame is presented.
+    The lines of the frame on screen are remembered, so when the next frame is drawn over it only the lines
+    that changed are rewritten and unchanged lines are stepped over with the cursor.
+    A full clear (one home + erase sequence) is only used for the first frame, after the terminal is resized,
+    or when the last frame scrolled or wrapped and the rows on screen no longer line up with the frame.
+    A new frame can also keep the top lines of the frame on screen, so only the lines added after them are
+    compared and written (see 'FightTable').
+    The size of the terminal running the game is asked for once, and after that only when the terminal reports
+    it was resized (SIGWINCH, see 'watch_resize()'), instead of on every frame.
+    Every line drawn is encoded to UTF-8 once and kept with its width on screen, shared by every renderer, so art
+    and boxes drawn every frame are written to 'sys.stdout.buffer' as stored bytes, without encoding them again.
+
+    Attributes
+    ----------
+    stream = Output stream to draw to (defaults to 'sys.stdout' at the time of drawing)
+    MAX_ENCODED = Most lines kept encoded, all are dropped when there are more
+    prompt_color = Color code for input prompts and the player's typing
+    enabled = Draws nothing at all when False (used when playing headless)
+    terminal_size = Size of the terminal drawn to, or None to ask the terminal running the game (see 'Connection')
+
+    Methods
+    ----------
+    clear(keep)
+        Starts a new frame, optionally keeping the top lines of the last one.
+    print(text)
+        Adds one or more lines of text to the current frame.
+    print_lines(lines)
+        Adds lines that are already split to the current frame.
+    present(prompt)
+        Writes the frame to the terminal in a single write.
+    present_prompt(prompt, typed)
+        Presents the frame with an input prompt, leaving a row for the player's typing.
+    input(prompt)
+        Presents the frame and reads a line of player input.
+    invalidate()
+        Forces the next frame to fully clear the screen.
+    box_width()
+        Returns the width display boxes are laid out to.
+    watch_resize()
+        Only asks for the terminal's size again after it is resized.
+    """
+    HOME = '\033[H'  # move cursor to top left corner
+    ERASE_SCREEN = '\033[2J'  # erase the whole screen
+    ERASE_LINE = '\033[K'  # erase from cursor to end of line
+    ERASE_BELOW = '\033[J'  # erase from cursor to end of screen
+    _ANSI = re.compile('\033\\[[0-9;]*[A-Za-z]')  # matches escape sequences, which take up no columns on screen
+    MAX_ENCODED = 8192
+    _encoded = {}  # line -> (UTF-8 bytes, columns on screen), shared by every renderer
+    _local_size = None  # size of the terminal running the game, when it was last asked
+    _resized = True  # the terminal running the game may have been resized since it was last asked
+    _watching = False  # the terminal reports when it is resized
+
+    def __init__(self, stream=None):
+        """
+        Constructs a renderer with nothing on screen yet.
+        :param stream: Optional output stream, 'sys.stdout' is used if none is passed
+        """
+        self.stream = stream
+        self.prompt_color = TextColor.GREEN
+        self.enabled = True
+        self.terminal_size = None
+        self._screen = []  # lines on the terminal right now, None where the content is unknown (player input)
+        self._current = []  # lines of the frame being built
+        self._presented = 0  # number of lines of the frame already written to the terminal
+        self._new_frame = True  # the cursor has to go home before the frame is written
+        self._full_clear = True  # the next frame has to clear the whole screen
+        self._size = None  # terminal size when the last frame was started
+        self._binary = (None, None)  # the last stream drawn to, and the byte stream under it that can be written to
+
+    def _out(self):
+        """
+        Returns the stream to draw to.
+        :return: Output stream
+        """
+        return self.stream if self.stream is not None else sys.stdout
+
+    def _buffer(self, stream):
+        """
+        Finds the byte stream under a text stream, so stored bytes can be written to it directly. Only used where
+        the text stream would write the very same bytes: a UTF-8 stream without newline translation (not Windows).
+        :param stream: Output stream
+        :return: Byte stream, or None if the frame has to be written as text
+        """
+        if stream is not self._binary[0]:  # a different stream than last time, e.g. stdout was replaced
+            buffer = getattr(stream, 'buffer', None)
+            encoding = getattr(stream, 'encoding', None)
+            if os.name == 'nt' or not encoding or codecs.lookup(encoding).name != 'utf-8':
+                buffer = None
+            self._binary = (stream, buffer)
+        return self._binary[1]
+
+    @classmethod
+    def _encode(cls, line):
+        """
+        Encodes a line to UTF-8 and measures the columns it takes up on screen, and keeps both for the next time
+        the line is drawn.
+        :param line: Line of a frame
+        :type line: str
+        :return: Tuple of (UTF-8 bytes, columns on screen)
+        """
+        if len(cls._encoded) >= cls.MAX_ENCODED:  # e.g. many different messages about players' typing, start again
+            cls._encoded.clear()
+        encoded = (line.encode('UTF-8'), len(cls._ANSI.sub('', line)))
+        cls._encoded[line] = encoded
+        return encoded
+
+    @staticmethod
+    def _piece(text, binary):
+        """
+        Prepares a piece of a frame that is not a line (cursor movement, or the prompt) to be joined with the rest.
+        :param text: Piece of the frame
+        :type text: str
+        :param binary: If the frame is written as bytes
+        :type binary: bool
+        :return: Piece as bytes or text
+        """
+        return text.encode('UTF-8') if binary else text
+
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def _step_over(self, rows):
+        """
+        Builds the shortest way to move the cursor down past unchanged lines.
+        :param rows: Number of lines to step over
+        :type rows: int
+        :return: Cursor movement string
+        """
+        if rows > 3:  # jump with one cursor sequence
+            return '\033[' + str(rows) + 'E'
+        return '\n' * rows  # a few newlines are shorter than the sequence
+
+    def _terminal_size(self):
+        """
+        Finds the size of the terminal drawn to. The terminal running the game is only asked again after it
+        reports a resize, or on every frame where it can't report one (Windows has no SIGWINCH).
+        :return: os.terminal_size, (0, 0) if unknown
+        """
+        if self.terminal_size is not None:  # size given, e.g. by a telnet client
+            return self.terminal_size
+        if ScreenRenderer._resized or not ScreenRenderer._watching:
+            ScreenRenderer._resized = False
+            ScreenRenderer._local_size = shutil.get_terminal_size((0, 0))
+        return ScreenRenderer._local_size
+
+    def box_width(self):
+        """
+        Finds the width display boxes are laid out to: the full box width, or the width of the terminal if it is
+        narrower.
+        :return: Width in columns
+        """
+        if self._size is None:  # no frame started yet
+            self._size = self._terminal_size()
+        size = self._size
+        if not size.columns:  # unknown, e.g. output is not a terminal
+            return BoxLayout.WIDTH
+        return max(BoxLayout.MIN_WIDTH, min(BoxLayout.WIDTH, size.columns))
+
+    @staticmethod
+    def watch_resize():
+        """
+        Has the terminal running the game report when it is resized, so its size is only asked for again then.
+        Does nothing where terminals can't report it (Windows).
+        """
+        if not hasattr(signal, 'SIGWINCH'):
+            return
+        signal.signal(signal.SIGWINCH, ScreenRenderer._on_resize)
+        ScreenRenderer._watching = True
+        ScreenRenderer._resized = True
+
+    # vvv  Negates 'Parameter not used' warning **Signal handlers are passed both**
+    # noinspection PyUnusedLocal
+    @staticmethod
+    def _on_resize(signum, frame):
+        """
+        Signal handler for SIGWINCH, marks the terminal's size to be asked for again on the next frame.
+        :param signum: Signal number
+        :param frame: Stack frame the signal interrupted
+        """
+        ScreenRenderer._resized = True
+
+    def invalidate(self):
+        """
+        Forces the next frame to fully clear the screen. Used when something other than this renderer has written
+        to the terminal.
+        """
+        self._full_clear = True
+
+    def clear(self, keep=0):
+        """
+        Starts a new frame. A frame that was never presented is dropped, the terminal still shows the frame before it.
+        :param keep: Optional: Number of lines at the top of the last frame, already presented, that the new frame
+                     starts with. They are stepped over instead of being compared again (unless the screen has to be
+                     fully cleared, then they are drawn again)
+        :type keep: int
+        """
+        if not self.enabled:
+            return
+
+        size = self._terminal_size()
+        if size != self._size or (size.lines and len(self._screen) >= size.lines):  # resized, or last frame scrolled
+            self._full_clear = True
+        self._size = size
+
+        keep = min(keep, self._presented)
+        if keep:
+            del self._current[keep:]
+        else:
+            self._current = []
+        self._presented = keep
+        self._new_frame = True
+
+    def print(self, text=''):
+        """
+        Adds text to the current frame, like the built-in 'print'. Nothing is written until the frame is presented.
+        :param text: Text to be drawn, may contain multiple lines
+        :type text: str
+        """
+        if self.enabled:
+            self._current.extend(text.split('\n'))
+
+    def print_lines(self, lines):
+        """
+        Adds lines that are already split to the current frame, e.g. a drawing kept between frames.
+        :param lines: Lines to be drawn
+        :type lines: list
+        """
+        if self.enabled:
+            self._current.extend(lines)
+
+    def present(self, prompt=''):
+        """
+        Writes everything added to the frame since it was last presented, followed by the prompt, in a single write.
+        Each line is compared with the line at the same row on screen, and is only written if it changed.
+        The frame is joined from the stored bytes of its pieces where the stream allows (see '_buffer()').
+        :param prompt: Optional prompt, including any color codes, to be written after the frame
+        :type prompt: str
+        """
+        if not self.enabled:
+            return
+        if not self._new_frame and self._presented == len(self._current) and not prompt:  # nothing to write
+            return
+
+        stream = self._out()
+        buffer = self._buffer(stream)
+        binary = buffer is not None  # written as bytes, every piece of the frame is encoded
+        erase_line, newline = (self.ERASE_LINE.encode('UTF-8'), b'\n') if binary else (self.ERASE_LINE, '\n')
+        encoded = self._encoded
+
+        out = []  # pieces of the frame, joined for the single write
+        skipped = 0  # unchanged lines the cursor still has to step over
+        if self._new_frame:
+            if self._full_clear:
+                out.append(self._piece(self.HOME + self.ERASE_SCREEN, binary))
+                self._screen = []  # nothing on screen to compare against
+                self._presented = 0  # lines kept from the last frame are drawn again
+                self._full_clear = False
+            else:
+                out.append(self._piece(self.HOME, binary))
+                skipped = self._presented  # lines kept from the last frame are already on screen
+            self._new_frame = False
+
+        columns = self._size.columns if self._size else 0
+        for row in range(self._presented, len(self._current)):  # loop through lines not yet presented
+            line = self._current[row]
+            if row < len(self._screen) and self._screen[row] == line:  # same as what is already on screen
+                skipped += 1
+                continue
+
+            if skipped:
+                out.append(self._piece(self._step_over(skipped), binary))
+                skipped = 0
+            data, width = encoded.get(line) or self._encode(line)
+            out.append(erase_line)  # erase the old line first, tabs in the new one skip over text
+            out.append(data if binary else line)
+            out.append(newline)
+
+            if columns and width > columns:  # line wrapped, rows no longer line up
+                self._full_clear = True
+
+        if skipped:
+            out.append(self._piece(self._step_over(skipped), binary))
+        out.append(self._piece(self.ERASE_BELOW + prompt, binary))  # erase anything left over from a longer frame
+
+        if binary:
+            stream.flush()  # anything written to the text stream goes first
+            buffer.write(b''.join(out))
+            buffer.flush()
+        else:
+            stream.write(''.join(out))
+            stream.flush()
+
+        self._screen = list(self._current)  # everything below the frame was erased
+        self._presented = len(self._current)
+
+    def input(self, prompt='', typed=None):
+        """
+        Presents the frame and reads a line of player input, like the built-in 'input'.
+        :param prompt: Prompt shown before the player's input
+        :type prompt: str
+        :param typed: Optional input to show as if the player typed it, instead of reading from the keyboard
+        :type typed: str
+        :return: Line entered by the player
+        """
+        self.present_prompt(prompt, typed)
+        return input() if typed is None else typed
+
+    def present_prompt(self, prompt='', typed=None):
+        """
+        Presents the frame followed by an input prompt. The row of the prompt is left to the player's typing,
+        which the terminal echoes, so it is never compared with the next frame.
+        :param prompt: Prompt shown before the player's input
+        :type prompt: str
+        :param typed: Optional input to show as if the player typed it
+        :type typed: str
+        """
+        if not self.enabled:
+            return
+
+        # the prompt and player's typing are drawn in the prompt color
+        self.present(self.prompt_color + prompt + ('' if typed is None else typed + '\n'))
+        self._current.append(None)  # the prompt and the player's typing fill this row, its content is unknown
+        self._screen.append(None)
+        self._presented += 1
+
+    @staticmethod
+    def buffered_stdout(buffer_size=65536):
+        """
+        Replaces 'sys.stdout' with a fully buffered stream, so output only reaches the terminal when it is flushed.
+        The renderer flushes once per frame. The Windows console is left alone, as it has to be written through
+        its own console stream to show special characters properly.
+        :param buffer_size: Size of the output buffer in bytes
+        :type buffer_size: int
+        """
+        if os.name == 'nt' and sys.stdout.isatty():  # windows console stream is kept
+            return
+        try:
+            fd = sys.stdout.fileno()
+        except (AttributeError, ValueError, io.UnsupportedOperation):  # stdout is not backed by a file
+            return
+
+        sys.stdout.flush()
+        raw = open(fd, 'wb', buffering=buffer_size, closefd=False)
+        sys.stdout = io.TextIOWrapper(raw, encoding=sys.stdout.encoding, errors=sys.stdout.errors,
+                                      line_buffering=False, write_through=False)
+
+
+class PlayerInput:
+    """
+    Reads the player's commands from the keyboard. All game input goes through a PlayerInput object,
+    so the game can also be driven by a script (see ScriptedInput).
+
+    Attributes
+    ----------
+    scripted = If commands come from a script instead of a player
+
+    Methods
+    ----------
+    command(prompt)
+        Returns the next command entered.
+    pause(prompt)
+        Waits for the player to press 'enter'.
+    record(event, details)
+        Records a game event (only kept when scripted).
+    finish(result)
+        Ends the program once the game is over.
+    """
+    scripted = False
+
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def command(self, prompt):
+        """
+        Reads the next command from the player.
+        :param prompt: Prompt shown before the player's input
+        :type prompt: str
+        :return: Command entered
+        """
+        return screen.input(prompt)
+
+    # noinspection PyMethodMayBeStatic
+    def pause(self, prompt="Press Enter to continue..."):
+        """
+        Waits for the player to press 'enter'.
+        :param prompt: Prompt shown while waiting
+        :type prompt: str
+        """
+        screen.input(prompt)
+
+    def record(self, event, **details):
+        """
+        Records a game event. Key presses are not recorded, so this does nothing for a player at the keyboard.
+        :param event: Name of event, e.g. 'pickup'
+        :type event: str
+        :param details: Event details
+        """
+
+    # noinspection PyMethodMayBeStatic
+    def finish(self, result):
+        """
+        Ends the program once the game is over.
+        :param result: How the game ended, one of 'win', 'loss', 'quit' or 'error'
+        :type result: str
+        """
+        sys.exit(0)  # exit the script
+
+
+class ScriptedInput(PlayerInput):
+    """
+    Plays the game headless from a script of commands, one per line, read from a file or a pipe.
+    'Press Enter' pauses are skipped, blank lines and lines starting with '#' in the script are ignored.
+    Every command and game event can be written to a transcript as JSON lines, and the program exits with
+    a status that reflects how the game ended.
+
+    Attributes
+    ----------
+    EXIT_CODES = Exit status for each game result
+    turns = Number of commands played
+
+    Methods
+    ----------
+    command(prompt)
+        Returns the next command from the script.
+    pause(prompt)
+        Returns right away, without waiting.
+    record(event, details)
+        Writes a game event to the transcript.
+    finish(result)
+        Writes the result to the transcript and exits with its status.
+    """
+    scripted = True
+    # win = 0, lost the boss fight = 1, quit or ran out of commands before the game ended = 2, missing files = 3
+    EXIT_CODES = {'win': 0, 'loss': 1, 'quit': 2, 'unfinished': 2, 'error': 3}
+
+    def __init__(self, script, transcript=None):
+        """
+        Constructs a scripted input.
+        :param script: Open file (or pipe) of commands
+        :param transcript: Optional open file that JSON lines of events are written to
+        """
+        self._script = script
+        self._transcript = transcript
+        self._start = time.perf_counter()
+        self.turns = 0
+
+    def command(self, prompt):
+        """
+        Reads the next command from the script. Ends the game as 'unfinished' when the script runs out.
+        :param prompt: Prompt the player would have seen
+        :type prompt: str
+        :return: Command from the script
+        """
+        for line in self._script:  # loop through the script until a command is found
+            cmd = line.strip()
+            if cmd and not cmd.startswith('#'):  # skip blank lines and comments
+                self.turns += 1
+                self.record('command', prompt=prompt.strip(), command=cmd)
+                return screen.input(prompt, typed=cmd)  # show the command when the game is being drawn
+        self.finish('unfinished')
+
+    def pause(self, prompt="Press Enter to continue..."):
+        """
+        Skips a 'Press Enter' pause.
+        :param prompt: Prompt the player would have seen
+        :type prompt: str
+        """
+        screen.present()  # show what was drawn before the pause when the game is being drawn
+
+    def record(self, event, **details):
+        """
+        Writes a game event to the transcript as one line of JSON.
+        :param event: Name of event, e.g. 'pickup'
+        :type event: str
+        :param details: Event details
+        """
+        if self._transcript is not None:
+            entry = {'event': event, 'turn': self.turns, 'time': round(time.perf_counter() - self._start, 6)}
+            entry.update(details)
+            self._transcript.write(json.dumps(entry) + '\n')
+
+    def finish(self, result):
+        """
+        Writes the result and turn rate to the transcript, then exits with the result's status.
+        :param result: How the game ended, one of 'win', 'loss', 'quit', 'unfinished' or 'error'
+        :type result: str
+        """
+        seconds = time.perf_counter() - self._start
+        self.record('end', result=result, turns=self.turns, seconds=round(seconds, 6),
+                    turns_per_second=round(self.turns / seconds, 1) if seconds > 0 else None)
+        if self._transcript is not None:
+            self._transcript.flush()
+        sys.exit(self.EXIT_CODES[result])
+
+
+class RecordingInput(PlayerInput):
+    """
+    Records a session as it is played, so it can be replayed exactly (see 'ReplayInput').
+    Wraps the input the game is really played with (the keyboard or a script) and writes every input to a
+    replay log, with the time since the input before it. The log starts with the seed the recorder gave the
+    'random' module (the quotes are picked with it), and ends with the state the game ended in.
+    A replay log is JSON lines: a header object, then [milliseconds, command] for each command and
+    [milliseconds] for each 'Press Enter', then an object of the final state.
+
+    Attributes
+    ----------
+    VERSION = Version of the replay log format
+    player_input = Input the game is played with
+    scripted = If commands come from a script instead of a player, as for the input recorded
+    inputs = Number of inputs recorded
+
+    Methods
+    ----------
+    command(prompt)
+        Returns the next command entered, and records it.
+    pause(prompt)
+        Waits for the player to press 'enter', and records it.
+    record(event, details)
+        Passes a game event on, keeping the final state of the game.
+    finish(result)
+        Writes the final state of the game to the log, then ends the program.
+    final_state(result)
+        Returns the state a replay is checked against.
+    """
+    VERSION = 1
+
+    def __init__(self, player_input, log, seed=None, restart_on_loss=None):
+        """
+        Constructs a recorder, seeding the 'random' module and writing the log's header.
+        :param player_input: Input the game is played with
+        :type player_input: PlayerInput
+        :param log: Open file the replay log is written to
+        :param seed: Optional: Seed for the 'random' module, picked at random unless given
+        :type seed: int
+        :param restart_on_loss: Optional: If the session recorded goes back to the main menu after a loss, as
+                                'main()' plays it (only a player's game does) unless given
+        :type restart_on_loss: bool
+        """
+        self.player_input = player_input
+        self.scripted = player_input.scripted
+        self.inputs = 0
+        self._log = log
+        self._state = {}  # room and items when the game ended, see 'play()'
+        if seed is None:
+            seed = int.from_bytes(os.urandom(4), 'big')
+        random.seed(seed)  # every random pick from here on follows from the seed
+
+        if restart_on_loss is None:
+            restart_on_loss = not self.scripted
+        self._write({'replay': self.VERSION, 'seed': seed, 'restart_on_loss': restart_on_loss,
+                     'world': world_key(), 'started': round(time.time(), 3)})
+        self._last = time.perf_counter()
+
+    def _write(self, entry):
+        """
+        Writes a line to the log, straight away so the log is complete up to the last input if the game crashes.
+        :param entry: Line of the log
+        """
+        self._log.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        self._log.flush()
+
+    def _input(self, entry):
+        """
+        Writes an input to the log, after the milliseconds since the input before it.
+        :param entry: Input, [] for a 'Press Enter' or [command]
+        :type entry: list
+        """
+        now = time.perf_counter()
+        self.inputs += 1
+        self._write([round((now - self._last) * 1000)] + entry)
+        self._last = now
+
+    def command(self, prompt):
+        """
+        Reads the next command, and records it.
+        :param prompt: Prompt shown before the player's input
+        :type prompt: str
+        :return: Command entered
+        """
+        cmd = self.player_input.command(prompt)
+        self._input([cmd])
+        return cmd
+
+    def pause(self, prompt="Press Enter to continue..."):
+        """
+        Waits for the player to press 'enter', and records it.
+        :param prompt: Prompt shown while waiting
+        :type prompt: str
+        """
+        self.player_input.pause(prompt)
+        self._input([])
+
+    def record(self, event, **details):
+        """
+        Passes a game event on to the input recorded, keeping the room and items the game ended with.
+        :param event: Name of event, e.g. 'pickup'
+        :type event: str
+        :param details: Event details
+        """
+        if event == 'over':
+            self._state = details
+        self.player_input.record(event, **details)
+
+    def final_state(self, result):
+        """
+        Builds the state a replay of the game must end in.
+        :param result: How the game ended
+        :type result: str
+        :return: Dictionary of the result, final room and items, number of inputs, and a checksum of the
+                 random number generator's state (the same quotes were picked if it matches)
+        """
+        return {'end': result, 'room': self._state.get('room'), 'items': self._state.get('items'),
+                'inputs': self.inputs, 'random': zlib.crc32(repr(random.getstate()).encode('UTF-8'))}
+
+    def finish(self, result):
+        """
+        Writes the final state of the game to the log, then ends the program like the input recorded.
+        :param result: How the game ended, one of 'win', 'loss', 'quit', 'unfinished' or 'error'
+        :type result: str
+        """
+        self._write(self.final_state(result))
+        self.player_input.finish(result)
+
+
+class ReplayInput(RecordingInput):
+    """
+    Replays a replay log (see 'RecordingInput') at full speed: the 'random' module is seeded as it was when the log
+    was recorded, the inputs are answered straight from the log, and the final state of the game is checked against
+    the one recorded. Used to reproduce a player's game exactly, and to time the game on real play.
+
+    Attributes
+    ----------
+    scripted = If the recorded session ended at the first loss
+    inputs = Number of inputs replayed
+
+    Methods
+    ----------
+    command(prompt)
+        Returns the next command in the log.
+    pause(prompt)
+        Skips a 'Press Enter' from the log.
+    finish(result)
+        Reports if the replay ended as recorded, and exits with status 0 if it did, 1 if not.
+    """
+    def __init__(self, log):
+        """
+        Reads a replay log and seeds the 'random' module as it was recorded.
+        Raises ValueError if the log is not a replay log of this version, its header is missing a field, a line of
+        it is cut off or damaged, or it was recorded in another vault than the one played.
+        A log without a final state is still replayed, the recorded game was interrupted (e.g. it crashed).
+        :param log: Open replay log
+        """
+        lines = []
+        for number, line in enumerate(log, 1):
+            if not line.strip():
+                continue
+            try:
+                lines.append(json.loads(line))
+            except ValueError:
+                if not lines:  # not JSON lines at all
+                    raise ValueError("not a replay log of version " + str(self.VERSION))
+                raise ValueError("the log is cut off or damaged at line " + str(number))
+        header = lines[0] if lines else None
+        if not isinstance(header, dict) or header.get('replay') != self.VERSION:  # no header of this version
+            raise ValueError("not a replay log of version " + str(self.VERSION))
+        if not (isinstance(header.get('seed'), int) and isinstance(header.get('restart_on_loss'), bool) and
+                isinstance(header.get('world'), str)):  # a header of this version, without the fields it must have
+            raise ValueError("not a FalloutCMD replay log")
+        for number, entry in enumerate(lines[1:], 2):  # [milliseconds] or [milliseconds, command], a final state
+            if not (isinstance(entry, list) and len(entry) in (1, 2) and isinstance(entry[0], int) and
+                    (len(entry) == 1 or isinstance(entry[1], str)) or
+                    isinstance(entry, dict) and number == len(lines)):
+                raise ValueError("the log is cut off or damaged at line " + str(number))
+        if header['world'] != world_key():
+            raise ValueError("it was recorded in another vault, replay it with the '--world' it was recorded in")
+
+        self.scripted = not header['restart_on_loss']  # a session plays on after a loss as the recorded one did
+        self.inputs = 0
+        self._state = {}
+        self._entries = lines[1:-1] if isinstance(lines[-1], dict) and len(lines) > 1 else lines[1:]
+        self._recorded = lines[-1] if len(lines) > 1 and isinstance(lines[-1], dict) else None
+        random.seed(header['seed'])
+        self._start = time.perf_counter()
+
+    def _next(self, kind, prompt):
+        """
+        Takes the next input from the log, checking the game asked for the same kind of input as when recorded.
+        :param kind: Kind of input the game asks for, COMMAND or PAUSE
+        :type kind: str
+        :param prompt: Prompt of the request, to report where a replay went different
+        :type prompt: str
+        :return: Input from the log
+        """
+        if self.inputs == len(self._entries):  # the recording ends here
+            self.finish('unfinished')
+        entry = self._entries[self.inputs]
+        self.inputs += 1
+        if (len(entry) == 2) != (kind == COMMAND):  # the game has gone a different way than recorded
+            print("Replay went different at input " + str(self.inputs) + ": the game asked for a " + kind +
+                  " (" + prompt.strip() + ") but the log has " + ("a command" if len(entry) == 2 else "a pause"),
+                  file=sys.stderr)
+            sys.exit(1)
+        return entry[1] if kind == COMMAND else ''
+
+    def command(self, prompt):
+        """
+        Returns the next command in the log.
+        :param prompt: Prompt the player saw
+        :type prompt: str
+        :return: Command recorded
+        """
+        return screen.input(prompt, typed=self._next(COMMAND, prompt))  # shown when the game is being drawn
+
+    def pause(self, prompt="Press Enter to continue..."):
+        """
+        Skips the next 'Press Enter' in the log.
+        :param prompt: Prompt the player saw
+        :type prompt: str
+        """
+        self._next(PAUSE, prompt)
+        screen.present()  # show what was drawn before the pause when the game is being drawn
+
+    def record(self, event, **details):
+        """
+        Keeps the room and items the game ended with.
+        :param event: Name of event, e.g. 'pickup'
+        :type event: str
+        :param details: Event details
+        """
+        if event == 'over':
+            self._state = details
+
+    def finish(self, result):
+        """
+        Compares the final state of the replay with the one recorded and reports the result and speed.
+        :param result: How the replayed game ended
+        :type result: str
+        """
+        seconds = time.perf_counter() - self._start
+        state = self.final_state(result)
+        rate = str(round(self.inputs / seconds)) if seconds > 0 else "-"
+        print("Replayed " + str(self.inputs) + " inputs in " + str(round(seconds * 1000, 3)) + " ms (" + rate +
+              " inputs/s), the game ended: " + result)
+        if self._recorded is None:  # the recorded game was interrupted before it ended
+            print("The recording has no final state to check (the recorded game did not end)")
+            sys.exit(0 if self.inputs == len(self._entries) else 1)
+        different = [key for key in state if state[key] != self._recorded.get(key)]
+        if different:
+            for key in different:
+                print("Different " + key + ": recorded " + str(self._recorded.get(key)) + ", replayed " +
+                      str(state[key]))
+            sys.exit(1)
+        print("The replay ended exactly as recorded")
+        sys.exit(0)
+
+
+class Connection(PlayerInput):
+    """
+    A player connected to the game server (see 'serve()'). Each connection plays its own Session with its own
+    rooms, inventory and objectives, drawn by its own ScreenRenderer. The compiled rooms, art, text and quotes
+    are loaded once and shared read-only by every connection. Saved games are turned off, as every player
+    would share the one saves folder and a save's write would hold up every other player's game.
+    The session is the same generator played at the keyboard, but instead of blocking on 'input()' the connection
+    awaits the player's next line and sends it in. Each connection plays in its own asyncio task, and sets the
+    module's 'screen' and 'player_input' (see 'ContextProxy') to its own in the task's context, so every other
+    connection still draws to and reads from its own player.
+    Connections speak enough telnet to read lines and the window size (NAWS), a plain TCP client works too.
+
+    Attributes
+    ----------
+    IAC, SE, IP, SB, WILL, WONT, DO, DONT, NAWS = Telnet codes
+    MAX_LINE = Longest line read from the player, the rest of a longer line is dropped
+    IDLE_TIMEOUT = Seconds a player can take to type a line before being disconnected
+    reader = Stream the player's input is read from
+    writer = Stream the player's screen is written to
+    screen = Renderer drawing the player's frames, written to this connection
+    session = Player's game
+
+    Methods
+    ----------
+    write(text)
+        Adds drawn text to be sent, the renderer's output stream.
+    flush()
+        Does nothing, text is sent once per step of the session.
+    pause(prompt)
+        Shows a message before the session ends with an error.
+    play()
+        Plays the session until the game is over or the player disconnects.
+    """
+    IAC, SE, IP, SB, WILL, WONT, DO, DONT = 255, 240, 244, 250, 251, 252, 253, 254
+    NAWS = 31
+    MAX_LINE = 256
+    IDLE_TIMEOUT = 30 * 60
+
+    def __init__(self, reader, writer):
+        """
+        Constructs a connection with a new session at the main menu.
+        :param reader: Stream the player's input is read from
+        :type reader: asyncio.StreamReader
+        :param writer: Stream the player's screen is written to
+        :type writer: asyncio.StreamWriter
+        """
+        self.reader = reader
+        self.writer = writer
+        self.screen = ScreenRenderer(self)  # frames are written to this connection
+        self.screen.terminal_size = os.terminal_size((0, 0))  # unknown, unless the client sends its window size
+        # every connection would share the one saves folder, so players can't save or load
+        self.session = Session(restart_on_loss=True, saves=False)
+        self._out = []  # text drawn since it was last sent
+        self._incoming = bytearray()  # bytes received but not read yet
+        self._line = bytearray()  # line being read
+        self._after_cr = False  # the last byte read ended a line with a carriage return
+
+    def write(self, text):
+        """
+        Adds drawn text to be sent to the player.
+        :param text: Text to be sent
+        :type text: str
+        """
+        self._out.append(text)
+
+    def flush(self):
+        """
+        Does nothing, drawn text is sent after each step of the session.
+        """
+
+    def pause(self, prompt="Press Enter to continue..."):
+        """
+        Shows a message with a prompt. Only used before an asset error ends the session, so it does not wait.
+        :param prompt: Prompt shown with the message
+        :type prompt: str
+        """
+        screen.present(screen.prompt_color + prompt + '\n')
+
+    async def _send(self):
+        """
+        Sends everything drawn since the last send. Telnet lines end with a carriage return and a newline.
+        """
+        if self._out:
+            self.writer.write(''.join(self._out).replace('\n', '\r\n').encode('UTF-8'))
+            self._out = []
+        await self.writer.drain()
+
+    def _subnegotiation(self, data):
+        """
+        Handles a telnet subnegotiation, only the client's window size is used.
+        :param data: Subnegotiation, after the 'IAC SB' and before the 'IAC SE'
+        :type data: bytes
+        """
+        data = data.replace(b'\xff\xff', b'\xff')  # a 255 in the data is doubled
+        if len(data) == 5 and data[0] == self.NAWS:  # window size: width and height as 16 bit numbers
+            width, height = struct.unpack('>HH', data[1:])
+            self.screen.terminal_size = os.terminal_size((width, height))
+
+    async def _read_line(self):
+        """
+        Reads a line from the player, handling telnet commands found on the way.
+        :return: Line read, or None if the player disconnected or interrupted
+        """
+        while True:
+            buffer = self._incoming
+            i = 0
+            while i < len(buffer):  # loop through the bytes received
+                byte = buffer[i]
+                if self._after_cr:  # a line ended with a carriage return, skip the newline or null after it
+                    self._after_cr = False
+                    if byte in (0, 10):
+                        i += 1
+                        continue
+
+                if byte == self.IAC:  # telnet command
+                    if i + 1 >= len(buffer):  # rest of the command has not arrived yet
+                        break
+                    command = buffer[i + 1]
+                    if command == self.IAC:  # an escaped 255 byte
+                        self._line.append(self.IAC)
+                        i += 2
+                    elif command in (self.WILL, self.WONT, self.DO, self.DONT):  # option negotiation, not used
+                        if i + 2 >= len(buffer):
+                            break
+                        i += 3
+                    elif command == self.SB:  # subnegotiation, up to 'IAC SE'
+                        end = buffer.find(bytes((self.IAC, self.SE)), i + 2)
+                        if end == -1:
+                            break
+                        self._subnegotiation(bytes(buffer[i + 2:end]))
+                        i = end + 2
+                    elif command == self.IP:  # the player pressed ctrl-c
+                        return None
+                    else:  # any other command is ignored
+                        i += 2
+                elif byte in (10, 13):  # end of the line
+                    self._after_cr = byte == 13
+                    del buffer[:i + 1]
+                    line = self._line.decode('UTF-8', 'replace')
+                    self._line = bytearray()
+                    return line
+                elif byte in (8, 127):  # backspace, when the client sends every key
+                    del self._line[-1:]
+                    i += 1
+                else:
+                    if len(self._line) < self.MAX_LINE:
+                        self._line.append(byte)
+                    i += 1
+            del buffer[:i]
+
+            data = await asyncio.wait_for(self.reader.read(4096), self.IDLE_TIMEOUT)
+            if not data:  # the player disconnected
+                return None
+            buffer.extend(data)
+
+    async def play(self):
+        """
+        Plays the session until the game is over or the player disconnects, then closes the connection.
+        """
+        # the connection runs in its own asyncio task, so setting its screen and input only changes this task's context
+        screen.use(self.screen)
+        player_input.use(self)
+        self.writer.write(bytes((self.IAC, self.DO, self.NAWS)))  # ask a telnet client for its window size
+        game = self.session.run()  # start the session's state machine
+        reply = None
+        try:
+            while True:  # answer each request until the session ends
+                kind, prompt = game.send(reply)  # run the session until it next asks for input
+                self.screen.present_prompt(prompt)
+                await self._send()
+                line = await self._read_line()
+                if line is None:  # player left
+                    break
+                reply = '' if kind == PAUSE else line
+        except StopIteration:  # the game is over, show the last frame
+            self.screen.present()
+            await self._send()
+        except SystemExit:  # an asset error ended the session, the message was drawn by 'pause()'
+            await self._send()
+        except (ConnectionError, asyncio.TimeoutError):  # the connection was lost, or the player was idle
+            pass
+        finally:
+            game.close()
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+class PhaseProfiler:
+    """
+    Times where each turn goes, by phase: asset I/O, rendering, screen clears, writing frames to the terminal,
+    command dispatch, and game logic. A turn is everything between two reads of the player's input, and the time
+    spent waiting for the player is left out. At exit it prints a histogram of each phase's time per turn,
+    and can write a cProfile stats file of the same run (also without the waiting).
+    Nothing is timed unless the profiler is enabled ('--profile' or the 'FALLOUTCMD_PROFILE' environment
+    variable), then 'instrument()' wraps the functions of each phase, so a normal game pays nothing for it.
+    Time is charged to the innermost phase running, so a phase's time never includes the phases it calls,
+    and anything outside every phase (the game flow itself) is charged to 'other'.
+
+    Attributes
+    ----------
+    PHASES = Phases reported, in order
+    INPUT = Phase of waiting for the player, left out of every turn
+    turns = Number of turns timed
+    samples = Time of each phase in each turn, in nanoseconds, by phase ('turn' for the whole turn)
+    stats_path = Optional: Path the cProfile stats are written to
+
+    Methods
+    ----------
+    instrument()
+        Wraps the functions of each phase to time them.
+    report(stream)
+        Prints the histogram of each phase, and writes the cProfile stats.
+    """
+    PHASES = ('asset_io', 'render', 'clear', 'present', 'dispatch', 'logic', 'other')
+    INPUT = 'input'
+
+    def __init__(self, stats_path=None):
+        """
+        Constructs a profiler, starting the first turn.
+        :param stats_path: Optional: Path to write cProfile stats to at exit
+        :type stats_path: str
+        """
+        self.turns = 0
+        self.samples = {phase: [] for phase in self.PHASES + ('turn',)}
+        self.stats_path = stats_path
+        self._turn = dict.fromkeys(self.PHASES + (self.INPUT,), 0)  # time of each phase in the current turn
+        self._stack = ['other']  # phases running, innermost last
+        self._mark = time.perf_counter_ns()  # when the innermost phase was last charged
+        self._thread = threading.get_ident()  # only the game's own thread is timed
+        self._cprofile = None
+        if stats_path:
+            import cProfile  # only needed for stats files
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def _phases(self):
+        """
+        Lists the functions timed for each phase.
+        :return: List of (class or None for a module function, function name, phase)
+        """
+        return [(AssetCache, 'read', 'asset_io'), (AssetCache, 'lines', 'asset_io'),
+                (AssetCache, 'is_readable', 'asset_io'), (None, 'verify_assets', 'asset_io'),
+                (AssetCache, 'colored', 'render'),
+                (Snapshot, 'save', 'asset_io'), (Snapshot, 'load', 'asset_io'), (World, 'load', 'asset_io'),
+                (File, 'print_utf8', 'render'), (TextColor, 'format_str', 'render'), (None, 'format_box', 'render'),
+                (None, 'display_box', 'render'), (PipBoy, '_build_display', 'render'), (PipBoy, '_frame', 'render'),
+                (Room, '_view', 'render'), (ScreenRenderer, 'print', 'render'),
+                (ScreenRenderer, 'print_lines', 'render'),
+                (ScreenRenderer, 'clear', 'clear'),
+                (ScreenRenderer, 'present', 'present'),
+                (CommandSet, 'parse', 'dispatch'),
+                (Objectives, 'lines', 'logic'), (Objectives, 'completed', 'logic'), (Inventory, 'add', 'logic'),
+                (Room, 'exit', 'logic'), (Room, 'has_item', 'logic'), (QuoteBank, 'pick', 'logic'),
+                (Session, 'restore', 'logic'), (FightTable, 'outcome', 'logic'),
+                (PlayerInput, 'command', self.INPUT), (PlayerInput, 'pause', self.INPUT),
+                (ScriptedInput, 'command', self.INPUT), (ScriptedInput, 'pause', self.INPUT),
+                (ReplayInput, 'command', self.INPUT), (ReplayInput, 'pause', self.INPUT)]
+
+    def instrument(self):
+        """
+        Wraps the functions of each phase, so every call is timed.
+        """
+        for owner, name, phase in self._phases():
+            if owner is None:  # module function, replaced in the module so every caller finds the wrapper
+                globals()[name] = self._wrap(globals()[name], phase)
+            else:
+                function = owner.__dict__[name]
+                if isinstance(function, (classmethod, staticmethod)):  # wrap the function, keep the binding
+                    setattr(owner, name, type(function)(self._wrap(function.__func__, phase)))
+                else:
+                    setattr(owner, name, self._wrap(function, phase))
+
+    def _wrap(self, function, phase):
+        """
+        Wraps a function so its calls are charged to a phase.
+        :param function: Function to be timed
+        :param phase: Phase the function's time is charged to
+        :type phase: str
+        :return: Wrapped function
+        """
+        profiler = self
+
+        def timed(*args, **kwargs):
+            if threading.get_ident() != profiler._thread:  # e.g. the manifest check's worker threads
+                return function(*args, **kwargs)
+            profiler._enter(phase)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                profiler._exit()
+
+        timed.__name__ = function.__name__
+        timed.__doc__ = function.__doc__
+        timed.__wrapped__ = function
+        return timed
+
+    def _enter(self, phase):
+        """
+        Starts a phase, charging the time since the last mark to the phase that was running.
+        :param phase: Phase started
+        :type phase: str
+        """
+        now = time.perf_counter_ns()
+        self._turn[self._stack[-1]] += now - self._mark
+        self._stack.append(phase)
+        self._mark = now
+        if phase == self.INPUT and self._cprofile is not None:  # waiting for the player is not profiled
+            self._cprofile.disable()
+
+    def _exit(self):
+        """
+        Ends the innermost phase, charging its time. The turn ends when the player's input has been read.
+        """
+        now = time.perf_counter_ns()
+        phase = self._stack.pop()
+        self._turn[phase] += now - self._mark
+        self._mark = now
+        if phase == self.INPUT and self.INPUT not in self._stack:  # the player's input has been read
+            self._end_turn()
+            if self._cprofile is not None:
+                self._cprofile.enable()
+
+    def _end_turn(self):
+        """
+        Keeps the time of each phase in the turn that ended, and starts the next turn.
+        """
+        total = 0
+        for phase in self.PHASES:
+            self.samples[phase].append(self._turn[phase])
+            total += self._turn[phase]
+            self._turn[phase] = 0
+        self._turn[self.INPUT] = 0  # time waiting for the player is dropped
+        self.samples['turn'].append(total)
+        self.turns += 1
+
+    def report(self, stream):
+        """
+        Prints the time of each phase per turn, with a histogram of the turns, and writes the cProfile stats.
+        :param stream: Stream to print to
+        """
+        if self._stack == ['other'] and any(self._turn[phase] for phase in self.PHASES):
+            self._end_turn()  # the last turn ended without reading input (the game is over)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.stats_path)
+
+        lines = ["", "FalloutCMD phase profile: " + str(self.turns) + " turns, time waiting for input left out", "",
+                 "{:<10}{:>12}{:>8}{:>12}{:>12}{:>12}".format("phase", "total ms", "share", "mean us", "p50 us",
+                                                             "p99 us")]
+        turn_total = sum(self.samples['turn']) or 1
+        for phase in self.PHASES + ('turn',):
+            samples = sorted(self.samples[phase])
+            if not samples:
+                continue
+            total = sum(samples)
+            lines.append("{:<10}{:>12.3f}{:>7.1f}%{:>12.1f}{:>12.1f}{:>12.1f}".format(
+                phase, total / 1e6, total * 100 / turn_total, total / len(samples) / 1e3,
+                samples[len(samples) // 2] / 1e3, samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1e3))
+
+        for phase in self.PHASES + ('turn',):  # histogram of each phase's time per turn, in powers of two
+            buckets = {}
+            for sample in self.samples[phase]:
+                if sample:
+                    bucket = max(0, (sample // 1000).bit_length())  # 0 is under 1 us, n is 2^(n-1) to 2^n us
+                    buckets[bucket] = buckets.get(bucket, 0) + 1
+            if not buckets:
+                continue
+            lines.append("")
+            lines.append(phase + " (time per turn)")
+            widest = max(buckets.values())
+            for bucket in range(min(buckets), max(buckets) + 1):
+                label = "< 1 us" if bucket == 0 else "{}-{} us".format(1 << (bucket - 1), 1 << bucket)
+                count = buckets.get(bucket, 0)
+                lines.append("  {:>16} | {:<40} {}".format(label, "#" * (count * 40 // widest), count))
+
+        cache = asset_cache.stats()
+        lines.append("")
+        lines.append("asset cache: {} hits, {} misses, {} assets held".format(cache['hits'], cache['misses'],
+                                                                          cache['assets']))
+        if self.stats_path:
+            lines.append("")
+            lines.append("cProfile stats written to '" + self.stats_path + "'")
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+
+class PipBoy:
+    """
+    A class for Pip-Boy object. Contains all methods and attributes required to display and control the users Pip-Boy.
+    The Pip-Boy's border art is composed once into a template for the whole program (again only if the art files
+    change), and each finished screen is kept until the inventory changes (or for the hint screen, the player's
+    room), so switching screens or reopening the Pip-Boy reuses the last frame.
+
+    Attributes
+    ----------
+    DISPLAY_H = Height of the display, in lines
+    INSERT_POINT = Position of the text in each display line, after the left side art
+    TEXT_W = Width of the text region of each display line
+    CHROME_ART = Paths of the border art: top, bottom, left side and right side
+    inventory = Players passed inventory of items
+    objectives = Player's objectives to complete.
+    routes = Optional: Route planner of the vault, for the hint screen
+    room_id = Room ID the player is in, set when the Pip-Boy is shown
+    _chrome = Border template shared by every Pip-Boy, with the versions of the border art it was built from and
+              the turn they were last checked: [versions, (top art, start of each display line, end of each line,
+              bottom art), turn], built by '_load_chrome()'
+    _frames = Finished frame of each screen, with the inventory version (and room) and border art versions it was
+              built for
+
+    Methods
+    ----------
+    _load_chrome()
+        Composes the border art into the template.
+    _pip_boy_screen(list_to_display, screen_header)
+        Returns a formatted list of display lines.
+    _build_display(text_list, chrome)
+        Builds and returns Pip-Boy center display as string.
+    _hint_lines()
+        Returns the lines of the hint screen, the next step and the best plan to win.
+    _frame(screen_name)
+        Returns the finished frame of a screen, building it only if the inventory has changed.
+    show(room_id)
+        Displays and enters Pip-Boy full menu.
+    """
+    DISPLAY_H = 16
+    INSERT_POINT = 7
+    TEXT_W = 60
+    CHROME_ART = tuple(os.path.join("art", "pip_boy_" + part + ".txt") for part in ('top', 'bottom', 'left', 'right'))
+    _chrome = None
+
+    def __init__(self, inventory, objectives, routes=None):
+        """
+        Constructs a Pip-Boy for a player.
+        :param inventory: Player's inventory
+        :type inventory: Inventory
+        :param objectives: Player's objectives
+        :type objectives: Objectives
+        :param routes: Optional: Route planner of the vault, for the hint screen
+        :type routes: RoutePlanner
+        """
+        self.inventory = inventory
+        self.objectives = objectives
+        self.routes = routes
+        self.room_id = None
+        self._frames = {}
+
+    @classmethod
+    def _load_chrome(cls):
+        """
+        Composes the pip-boy border art into a template: the top and bottom art, and for each display line
+        the left side art padded up to the text region, and the right side art with the line's newline.
+        The template is composed again if any of the art files has changed since, which is checked once a turn.
+        :return: Border template
+        """
+        if cls._chrome is not None and cls._chrome[2] != asset_cache.turn:  # not checked yet this turn
+            if cls._chrome[0] == tuple(asset_cache.version(path) for path in cls.CHROME_ART):
+                cls._chrome[2] = asset_cache.turn
+            else:  # the art has changed
+                cls._chrome = None
+        if cls._chrome is None:  # compose the template the first time a pip-boy is shown, or the art has changed
+            top_path, bottom_path, left_path, right_path = cls.CHROME_ART
+            # raw pip-boy top file needs newline char appended for proper display
+            pb_top = File(top_path).to_str() + "\n"
+            pb_bottom = File(bottom_path).to_str()
+            pb_left_lines = File(left_path).to_list()
+            pb_right_lines = File(right_path).to_list()
+
+            line_starts = tuple(left + " " * cls.INSERT_POINT for left in pb_left_lines[:cls.DISPLAY_H])
+            line_ends = tuple(right + "\n" for right in pb_right_lines[:cls.DISPLAY_H])
+            versions = tuple(asset_cache.version(path) for path in cls.CHROME_ART)
+            cls._chrome = [versions, (pb_top, line_starts, line_ends, pb_bottom), asset_cache.turn]
+        return cls._chrome[1]
+
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def _pip_boy_screen(self, list_to_display, screen_header):
+        """
+        Creates a formatted template for the pip-boy screen as list,
+        ensures list has enough elements to display properly.
+        :param list_to_display:Content to be displayed, line by line
+        :type list_to_display: list
+        :param screen_header: Header/title of screen
+        :type screen_header: str
+        :return: Formatted display lines, as list
+        """
+
+        # the list 'display_screen' starts with the header portion
+        display_screen = [" ",  # pad top with blank line
+                          "                   ==( " + screen_header + " )==",  # append header string to header line
+                          " "]  # pad bottom with blank line
+        # create a list with 15 blank string elements to pad the bottom of the pip-boy screen
+        # provides enough padding to display properly no matter the size of 'list_to_display'
+        filler = ["", "", "", "", "", "", "", "", "", "", "", "", "", "", ""]
+        display_screen.extend(list_to_display)  # adds list_to_display onto display_screen with extend
+        display_screen.extend(filler)  # adds the padding filler onto the bottom display_screen with extend
+
+        return display_screen  # return formatted display_screen list
+
+    def _build_display(self, text_list, chrome=None):
+        """
+        Builds the center of pip-boy display, fills the text region of the border template with given text_list.
+        :param text_list: Text to by displayed line by line
+        :type  text_list: list
+        :param chrome: Optional: Border template already loaded by the caller
+        :type chrome: tuple
+        :return: Formatted center 'block' of pip-boy display as single string
+        """
+        pb_top, line_starts, line_ends, pb_bottom = self._load_chrome() if chrome is None else chrome
+
+        # each display line is the left side art and padding, the line of text padded to the width of the
+        # text region, then the right side art (a line longer than the text region pushes the right side out)
+        return "".join([line_starts[i] + text_list[i].ljust(self.TEXT_W) + line_ends[i]
+                        for i in range(self.DISPLAY_H)])
+
+    def _hint_lines(self):
+        """
+        Builds the hint screen: the next item to get (or the fight, once every item needed is collected) with the
+        route there, then the best plan to win from where the player is, each cut to fit the display.
+        :return: List of hint lines
+        """
+        if self.routes is None:  # not planned for this Pip-Boy
+            return ["No hints are available."]
+        moves, bit = self.routes.best(self.room_id, self.inventory.mask)
+        if moves == RoutePlanner.UNREACHABLE:
+            return ["There is no way left to win from here."]
+
+        lines = []
+        for number, (room_id, bit) in enumerate(self.routes.plan(self.room_id, self.inventory.mask), 1):
+            place = self.routes.rooms[room_id].name
+            if number == 1:  # the next step, with its route
+                route = self.routes.route(self.room_id, room_id)
+                lines.append(("Next: get " + Inventory.ITEMS[bit.bit_length() - 1] + " in " if bit else
+                              "Next: the fight in ") + place)
+                lines.append("Route: " + (", ".join(route) if route else "you are here"))
+                lines.append("")
+                lines.append("Best plan to win, " + str(moves) + " moves and pickups:")
+            lines.append("  " + str(number) + ". " + (Inventory.ITEMS[bit.bit_length() - 1] if bit else "The fight") +
+                         ", in " + place)
+        return [line if len(line) <= self.TEXT_W else line[:self.TEXT_W - 3] + "..." for line in lines]
+
+    def _frame(self, screen_name):
+        """
+        Finds the finished frame of a pip-boy screen, rebuilding it only if the inventory has changed since it
+        was built (the objectives are worked out from the inventory, so they change with it), or for the hint
+        screen, if the player has moved, or if the border art has changed.
+        :param screen_name: 'quest', 'items' or 'hint'
+        :type screen_name: str
+        :return: Pip-Boy frame, colored green
+        """
+        chrome = self._load_chrome()  # border template, composed again if the art has changed
+        key = (self.inventory.version, self.room_id if screen_name == 'hint' else None, PipBoy._chrome[0])
+        built_for, frame = self._frames.get(screen_name, (None, None))
+        if built_for != key:  # screen not built yet, or the inventory (or room, or border art) has changed
+            if screen_name == 'quest':  # set the pip-boy screen to 'objectives' / 'quest' screen
+                display_text = self._pip_boy_screen(self.objectives.lines(), "Quest")
+            elif screen_name == 'hint':  # set the pip-boy screen to 'hint' screen
+                display_text = self._pip_boy_screen(self._hint_lines(), "Hint")
+            else:  # set the pip-boy screen to 'item' screen
+                display_text = self._pip_boy_screen(self.inventory.items, "Items")
+            pb_top, line_starts, line_ends, pb_bottom = chrome
+            frame = TextColor(TextColor.GREEN).format_str(pb_top + self._build_display(display_text, chrome) +
+                                                          pb_bottom)
+            self._frames[screen_name] = (key, frame)
+        return frame
+
+    def show(self, room_id=None):
+        """
+        Enters the pip-boy menu, displays current inventory and objectives, uses separate commands from main game.
+        Generator, yields requests for input (see 'ask_command()').
+        :param room_id: Optional: Room ID the player is in, for the hint screen
+        :type room_id: int
+        """
+        self.room_id = room_id
+        frame = self._frame('quest')  # set the pip-boy screen to 'objectives' / 'quest' screen
+
+        clear_display()  # clear the display
+        display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
+        screen.print(frame)  # print the pip-boy
+
+        while True:  # loop constantly until broken
+            # receives and parses the player's pip-boy command
+            command = pip_commands.parse((yield from ask_command("\n---------------------------------------:>")))
+
+            if command.name == "close":  # player closes the pip-boy
+                clear_display()  # clear the display
+                break  # break the loop
+            elif command.name in ('quest', 'items', 'hint'):  # player selected the 'quest', 'item' or 'hint' screen
+                frame = self._frame(command.name)  # reuse the screen's frame, unless the inventory has changed
+                clear_display()  # clear the display
+                display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
+                screen.print(frame)  # print the pip-boy
+            else:
+                screen.print("Pip-Boy Command \'" + command.text + "\' was not recognized.\n"
+                             "Use \'i\' for Items, \'q\' for Quest, \'h\' for Hint, or \'c\' to Close Pip-Boy.")
+                yield from wait_for_enter()  # wait for player to press 'enter'
+                clear_display()  # clear the display
+                display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
+                screen.print(frame)  # print the pip-boy
+
+
+class QuoteBank:
+    """
+    The Fallout quotes shown above the Pip-Boy. The quotes file is read and checked once, when the bank is loaded,
+    so picking a quote is just an index into the list. Quotes are wrapped to fit the screen with the box they are
+    shown in (see 'BoxLayout').
+    Each line of the quotes file is a quote followed by ' -' and its author, e.g. '"War never changes." -Ron'.
+
+    Attributes
+    ----------
+    quotes = (quote, author) for each quote
+    rng = Random number generator picking the quotes, the 'random' module unless a seed is given
+    no_repeat = If every quote is shown once before any is repeated
+
+    Methods
+    ----------
+    parse(line)
+        Splits a line of the quotes file into its quote and author.
+    pick()
+        Returns a quote formatted for display.
+    """
+    def __init__(self, path, seed=None, no_repeat=False):
+        """
+        Loads the quotes file. Malformed lines are reported and end the program before the game starts.
+        :param path: Path to the quotes file
+        :type path: str
+        :param seed: Optional: Seed for a random number generator of the bank's own
+        :type seed: int
+        :param no_repeat: Optional: Show every quote once, in a random order, before repeating any
+        :type no_repeat: bool
+        """
+        self.rng = random if seed is None else random.Random(seed)
+        self.no_repeat = no_repeat
+        self.quotes = []
+        self._banners = []  # each quote formatted for display
+        self._deck = []  # quotes left to show, when not repeating
+
+        malformed = []
+        for number, line in enumerate(File(path).to_list(), 1):
+            if not line:  # blank lines are skipped
+                continue
+            quote = self.parse(line)
+            if quote is None:
+                malformed.append(str(number))
+                continue
+            self.quotes.append(quote)
+            self._banners.append(quote[0] + '\n    -' + quote[1])  # the quote, a newline, then the author
+
+        if malformed or not self.quotes:  # report every bad line at once
+            clear_display()  # clear the display
+            err_str = "The quotes file \'" + path + "\' could not be read.\n"  # build error message string
+            if malformed:
+                err_str += "Line(s) " + ", ".join(malformed) + " are not formatted as: \"Quote\" -Author"
+            else:
+                err_str += "The file has no quotes."
+            display_box(err_str, TextColor.RED)  # display error message
+            player_input.pause()  # wait for player to press 'enter'
+            player_input.finish('error')  # exit the script
+
+    @classmethod
+    def parse(cls, line):
+        """
+        Splits a line of the quotes file into its quote and author.
+        :param line: Line of the quotes file
+        :type line: str
+        :return: (quote, author), or None if the line is malformed
+        """
+        parts = line.split(' -')  # separate the quote and author
+        if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():  # one quote and one author
+            return None
+        return parts[0], parts[1]
+
+    def pick(self):
+        """
+        Picks a random quote.
+        :return: Quote formatted for display, with its author on its own line
+        """
+        if not self.no_repeat:
+            return self._banners[self.rng.randrange(0, len(self._banners))]
+
+        if not self._deck:  # every quote has been shown, shuffle them all again
+            self._deck = list(range(len(self._banners)))
+            self.rng.shuffle(self._deck)
+        return self._banners[self._deck.pop()]
+
+
+class Room:
+    """
+    A room of the vault. Rooms are compiled once from the world definition (see 'World'),
+    each with an integer ID and an exit per direction holding the ID of the room that way, so moving and
+    picking up are direct lookups instead of searching the room's keys.
+
+    Attributes
+    ----------
+    DIRECTIONS = Directions the player can move, in order of the exits
+    DIRECTION_INDEX = Index of each direction in the exits
+    NO_EXIT = Exit value for a direction with no room
+    id = Room ID, its index in the compiled rooms
+    name = Name of the room
+    art = Path to the room's line art
+    description = Path to the room's description
+    exits = Room ID of the exit for each direction, or NO_EXIT
+    item = Item in the room, or None
+    views = Drawing of the room for each item it can hold (None for no item) and box width, with the asset versions
+            it was drawn from and the turn they were last checked, shared by every copy
+
+    Methods
+    ----------
+    copy()
+        Returns a copy of the room, for a new game to pick its items up from.
+    exit(direction)
+        Returns the room ID of the exit in a direction.
+    has_item(item)
+        Check if the room has any item, or specific passed item.
+    can_move(direction)
+        Check if the player can move in a given direction from the room.
+    _view()
+        Returns the drawing of the room for the item in it.
+    print_description()
+        Prints the rooms description.
+    """
+    __slots__ = ('id', 'name', 'art', 'description', 'exits', 'item', 'views')
+    DIRECTIONS = ('North', 'East', 'South', 'West')
+    DIRECTION_INDEX = {direction: i for i, direction in enumerate(DIRECTIONS)}
+    NO_EXIT = -1
+
+    def __init__(self, room_id, name, art, description, exits, item=None, views=None):
+        """
+        Constructs a room.
+        :param room_id: Room ID
+        :type room_id: int
+        :param name: Name of the room
+        :type name: str
+        :param art: Path to the room's line art
+        :type art: str
+        :param description: Path to the room's description
+        :type description: str
+        :param exits: Room ID of the exit for each of DIRECTIONS, or NO_EXIT
+        :type exits: tuple
+        :param item: Optional: Item in the room
+        :type item: str
+        :param views: Optional: Drawings of the room to share, by item and width
+        :type views: dict
+        """
+        self.id = room_id
+        self.name = name
+        self.art = art
+        self.description = description
+        self.exits = exits
+        self.item = item
+        self.views = {} if views is None else views
+
+    def copy(self):
+        """
+        Copies the room, the exits and drawings are shared as they never change.
+        :return: Copy of the room
+        """
+        return Room(self.id, self.name, self.art, self.description, self.exits, self.item, self.views)
+
+    def exit(self, direction):
+        """
+        Finds the room in a direction.
+        :param direction: Cardinal direction pointer
+        :type direction: str
+        :return: Room ID of the exit, or NO_EXIT if the player can't move that way
+        """
+        index = self.DIRECTION_INDEX.get(direction)
+        return self.NO_EXIT if index is None else self.exits[index]
+
+    def has_item(self, item=''):
+        """
+        Checks if the room has ANY item, optionally can check for a specific item (if item is passed).
+        :param item: Optional: Item string to be found
+        :return: Boolean if item was found
+        """
+        if item != '':  # if an item was passed to method
+            return self.item == item
+        return self.item is not None  # no item was passed, check for any item
+
+    def can_move(self, direction):
+        """
+        Checks if the player can move in a specified direction in the room.
+        :param direction: Cardinal direction pointer
+        :type direction: str
+        :return: Boolean if player can move
+        """
+        return self.exit(direction) != self.NO_EXIT
+
+    def _view(self):
+        """
+        Finds the room's drawing (line art and description box) for the item now in the room. Each variant is
+        built, colored, and split into screen lines the first time it is needed at the screen's box width, then
+        kept for every later turn, until the art or description file changes (checked once a turn).
+        The item in the room selects the variant: with an item the whole description file is shown, with no item
+        the last three lines of the file (the item's description) are left out.
+        :return: List of colored screen lines
+        """
+        width = screen.box_width()
+        variant = self.views.get((self.item, width))  # [asset versions, lines, turn the versions were last checked]
+        if variant is not None and variant[2] != asset_cache.turn:  # the files are checked once a turn
+            if variant[0] == (asset_cache.version(self.art), asset_cache.version(self.description)):
+                variant[2] = asset_cache.turn
+            else:  # the art or description has changed since the variant was drawn
+                variant = None
+        if variant is None:  # this variant has not been drawn yet, or not at this width
+            view = list(asset_cache.colored(File(self.art).path, TextColor.YELLOW))  # line art for this room
+
+            description = File(self.description).to_str()
+            if self.item is None:  # no item in the room, remove the item description element of the file
+                description_lines = description.split('\n')
+                description = '\n'.join(description_lines[:-3]) + '\n'  # always the last three lines of the file
+            view.extend(format_box(description, TextColor.GREEN, width))
+
+            versions = (asset_cache.version(self.art), asset_cache.version(self.description))
+            variant = self.views[(self.item, width)] = [versions, view, asset_cache.turn]
+        return variant[1]
+
+    def print_description(self):
+        """
+        Prints the line art and description for the room,
+        adjusts the description depending on the room state.
+        """
+        screen.print_lines(self._view())  # draw the room's variant for the item in it
+
+
+class Inventory:
+    """
+    Player's items. Kept both as a list in the order they were picked up (for the Pip-Boy 'Items' screen)
+    and as an integer bitmask with one bit per item, so checking for any set of items is a single mask test.
+
+    Attributes
+    ----------
+    ITEMS = Every item in the vault, an item's position is its bit in the mask (set by 'World.apply()')
+    BITS = Bit of each item, by name
+    ALL = Mask of every item
+    items = Items picked up, in order
+    mask = Bitmask of items picked up
+    version = Number of changes to the inventory, for caches of anything built from it
+
+    Methods
+    ----------
+    mask_of(*items)
+        Returns the bitmask of the given items.
+    add(item)
+        Adds an item to the inventory.
+    has(*items)
+        Checks if the inventory has all the given items.
+    """
+    ITEMS = ()
+    BITS = {}
+    ALL = 0
+
+    def __init__(self, items=()):
+        """
+        Constructs an inventory, empty unless items are passed.
+        :param items: Optional: Items to start with
+        :type items: iterable
+        """
+        self.items = []
+        self.mask = 0
+        self.version = 0
+        for item in items:
+            self.add(item)
+
+    @classmethod
+    def mask_of(cls, *items):
+        """
+        Builds the bitmask of the given items.
+        :param items: Item names
+        :type items: str
+        :return: Bitmask of the items
+        """
+        mask = 0
+        for item in items:
+            mask |= cls.BITS[item]
+        return mask
+
+    def add(self, item):
+        """
+        Adds an item to the inventory.
+        :param item: Item name
+        :type item: str
+        """
+        self.items.append(item)
+        self.mask |= self.BITS[item]
+        self.version += 1
+
+    def has(self, *items):
+        """
+        Checks if the inventory has all the given items.
+        :param items: Item names
+        :type items: str
+        :return: Boolean if every item is in the inventory
+        """
+        needed = self.mask_of(*items)
+        return self.mask & needed == needed
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+
+class Objectives:
+    """
+    Player's objectives / quest, worked out from the inventory's bitmask. Which objective lines are complete for
+    every possible inventory is precomputed once as a table, so checking the objectives is a single lookup,
+    and the objective text is only built when the Pip-Boy shows it.
+
+    Attributes
+    ----------
+    LINES = Objective lines in display order, as (line, bitmask of items needed, kind) (set by 'World.apply()')
+            a CHECK line is checked off '(*)' once the player has its items, a FOUND line is blanked instead
+            a line needing no items is never completed ('Kill Cook Cook' is completed by winning, which ends the game)
+    TABLE = Bitmask of completed lines for each inventory bitmask, built by 'build_table()'
+    inventory = Inventory the objectives are checked against
+
+    Methods
+    ----------
+    build_table()
+        Builds the table of completed lines for every inventory.
+    completed()
+        Returns the bitmask of completed objective lines.
+    lines()
+        Returns the objective lines for display.
+    """
+    CHECK = 'check'
+    FOUND = 'found'
+    LINES = ()
+    TABLE = None
+
+    def __init__(self, inventory):
+        """
+        Constructs the objectives for an inventory.
+        :param inventory: Player's inventory
+        :type inventory: Inventory
+        """
+        self.inventory = inventory
+        if Objectives.TABLE is None:  # build the shared table the first time objectives are created
+            Objectives.TABLE = self.build_table()
+
+    @classmethod
+    def build_table(cls):
+        """
+        Builds the table of completed objective lines for every possible inventory.
+        :return: Tuple of completed line bitmasks, indexed by inventory bitmask
+        """
+        table = []
+        for mask in range(Inventory.ALL + 1):  # every combination of items
+            completed = 0
+            for i, (line, needed, kind) in enumerate(cls.LINES):
+                if needed and mask & needed == needed:  # the player has every item this line needs
+                    completed |= 1 << i
+            table.append(completed)
+        return tuple(table)
+
+    def completed(self):
+        """
+        Looks up which objective lines are complete for the current inventory.
+        :return: Bitmask of completed lines, bit i is line i of LINES
+        """
+        return self.TABLE[self.inventory.mask]
+
+    def lines(self):
+        """
+        Builds the objective lines for display, checking off or blanking the completed ones.
+        :return: List of objective lines
+        """
+        completed = self.completed()
+        lines = []
+        for i, (line, needed, kind) in enumerate(self.LINES):
+            if not completed >> i & 1:  # line not complete, displayed as is
+                lines.append(line)
+            elif kind == self.CHECK:  # check off the objective's box
+                lines.append(line.replace('()', '(*)'))
+            else:  # a found item line is blanked
+                lines.append('')
+        return lines
+
+
+class Snapshot:
+    """
+    A saved game, packed into a few bytes: the room the player is in and the bitmask of their items,
+    with a format version and a checksum. Everything else about a game follows from those two numbers,
+    every item not in the inventory is still in its room, and the objectives come from the inventory.
+    Snapshots are saved to 'saves/<name>.sav' (or the folder in the 'FALLOUTCMD_SAVES' environment variable),
+    written to a temporary file first and then moved over the old save, so a save is never left half written.
+
+    Attributes
+    ----------
+    MAGIC = Bytes every snapshot starts with
+    VERSION = Version of the snapshot format
+    FORMAT = struct format of a snapshot: magic, version, room ID, item bitmask, then a CRC-32 of all before it
+    SIZE = Size of a snapshot in bytes
+    NAME = Save names allowed
+    room_id = Room the player is in
+    item_mask = Bitmask of the player's items (see 'Inventory')
+
+    Methods
+    ----------
+    pack()
+        Returns the snapshot as bytes.
+    unpack(data)
+        Returns a snapshot read from bytes, or None if they are not a valid snapshot.
+    path(name)
+        Returns the path of a save.
+    save(name)
+        Writes the snapshot to a save.
+    load(name)
+        Returns the snapshot in a save.
+    """
+    MAGIC = b'FC'
+    VERSION = 1
+    FORMAT = '>2sBBBI'
+    SIZE = struct.calcsize(FORMAT)
+    NAME = re.compile('[a-z0-9_-]{1,32}')
+
+    def __init__(self, room_id, item_mask):
+        """
+        Constructs a snapshot.
+        :param room_id: Room the player is in
+        :type room_id: int
+        :param item_mask: Bitmask of the player's items
+        :type item_mask: int
+        """
+        self.room_id = room_id
+        self.item_mask = item_mask
+
+    def pack(self):
+        """
+        Packs the snapshot into bytes.
+        :return: Packed snapshot
+        """
+        head = struct.pack(self.FORMAT[:-1], self.MAGIC, self.VERSION, self.room_id, self.item_mask)
+        return head + struct.pack('>I', zlib.crc32(head))
+
+    @classmethod
+    def unpack(cls, data):
+        """
+        Unpacks a snapshot, checking its size, version, and checksum.
+        :param data: Packed snapshot
+        :type data: bytes
+        :return: Snapshot, or None if the data is not a valid snapshot of this version
+        """
+        if len(data) != cls.SIZE:
+            return None
+        magic, version, room_id, item_mask, checksum = struct.unpack(cls.FORMAT, data)
+        if magic != cls.MAGIC or version != cls.VERSION or checksum != zlib.crc32(data[:-4]):
+            return None
+        return cls(room_id, item_mask)
+
+    @classmethod
+    def path(cls, name):
+        """
+        Finds the path of a save.
+        :param name: Save name, letters, numbers, '-' and '_'
+        :type name: str
+        :return: Path of the save file
+        """
+        return os.path.join(os.environ.get('FALLOUTCMD_SAVES', 'saves'), name + '.sav')
+
+    def save(self, name):
+        """
+        Writes the snapshot to a save, replacing any save of the same name in a single step.
+        :param name: Save name
+        :type name: str
+        """
+        path = self.path(name)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(self.pack())
+            file.flush()
+            os.fsync(file.fileno())  # make sure the new save is on disk before it replaces the old one
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, name):
+        """
+        Reads the snapshot in a save.
+        :param name: Save name
+        :type name: str
+        :return: Snapshot, or None if the save is damaged
+        """
+        with open(cls.path(name), 'rb') as file:
+            return cls.unpack(file.read(cls.SIZE + 1))  # read one byte more, so a longer file is caught
+
+
+class World:
+    """
+    The vault: its items, rooms, objectives, and the rules of the fight with Cook-Cook, loaded from a JSON
+    definition ('world.json', or a custom vault). A definition is checked and compiled once into room IDs and
+    item bitmasks, and the compiled form is cached with 'marshal' in '__pycache__' next to the definition,
+    keyed by a hash of its source. Later starts load the cache without parsing or checking the definition again,
+    until the definition changes.
+
+    Attributes
+    ----------
+    NAME = Name of the stock vault's definition
+    FORMAT = Version of the compiled form, a cache of another version is compiled again
+    MAX_ROOMS = Most rooms a vault can have (saves hold the room ID in one byte)
+    MAX_ITEMS = Most items a vault can have (saves hold the item bitmask in one byte)
+    items = Every item in the vault, an item's position is its bit in the inventory's mask
+    rooms = Rooms indexed by room ID
+    room_ids = Room IDs by room name
+    start = Room ID the player starts in
+    objectives = Objective lines, as (line, bitmask of items needed, kind) (see 'Objectives')
+    fight = Rules and text of the fight, with the fight's room as a room ID and item lists as bitmasks
+
+    Methods
+    ----------
+    routes()
+        Returns the vault's route planner.
+    fight_table(width)
+        Returns the outcome table of the vault's fight.
+    load(path)
+        Returns the vault from a definition, compiling it unless its cache is up to date.
+    compile(source)
+        Checks a definition and compiles it.
+    cache_path(path)
+        Returns the path of a definition's compiled cache.
+    apply()
+        Makes the vault's items and objectives the ones every game uses.
+    """
+    NAME = 'world.json'
+    FORMAT = 2  # 2: vaults are also checked they can be won
+    MAX_ROOMS = 256
+    MAX_ITEMS = 8
+
+    def __init__(self, items, rooms, start, objectives, fight):
+        """
+        Constructs a vault from its compiled form (see 'compile()').
+        :param items: Item names, in bit order
+        :type items: tuple
+        :param rooms: (name, art, description, exits, item) of each room, indexed by room ID
+        :type rooms: tuple
+        :param start: Room ID the player starts in
+        :type start: int
+        :param objectives: Objective lines, as (line, bitmask of items needed, kind)
+        :type objectives: tuple
+        :param fight: Rules and text of the fight
+        :type fight: dict
+        """
+        self.items = items
+        self.rooms = tuple(Room(room_id, *room) for room_id, room in enumerate(rooms))
+        self.room_ids = {room.name: room.id for room in self.rooms}
+        self.start = start
+        self.objectives = objectives
+        self.fight = fight
+        self._routes = None
+        self._fight_tables = {}  # outcome table of the fight for each box width
+
+    def routes(self):
+        """
+        Finds the vault's route planner, planning the routes the first time.
+        :return: RoutePlanner object
+        """
+        if self._routes is None:
+            self._routes = RoutePlanner(self)
+        return self._routes
+
+    def fight_table(self, width=BoxLayout.WIDTH):
+        """
+        Finds the outcome table of the vault's fight, drawing every outcome the first time it is needed at a width,
+        and again if the fight's art or text files have changed.
+        :param width: Optional: Width of the fight's display boxes
+        :type width: int
+        :return: FightTable object
+        """
+        table = self._fight_tables.get(width)
+        if table is None or not table.is_current():
+            table = self._fight_tables[width] = FightTable(self.fight, len(self.items), width)
+        return table
+
+    @classmethod
+    def cache_path(cls, path):
+        """
+        Finds where a definition's compiled cache is kept.
+        :param path: Path to the definition
+        :type path: str
+        :return: Path of the cache file
+        """
+        return os.path.join(os.path.dirname(path), '__pycache__', os.path.basename(path) + '.marshal')
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads a vault. The definition is read through the asset cache (so it can also come from the archive)
+        and hashed, and its compiled cache is used if it was compiled from the same source, otherwise the
+        definition is compiled and the cache written for the next start.
+        Raises OSError if the definition cannot be read, or ValueError if it has mistakes in it.
+        :param path: Path to the definition
+        :type path: str
+        :return: World object
+        """
+        source = asset_cache.read(path)
+        key = hashlib.sha256(source.encode('UTF-8')).hexdigest()
+        cache_path = cls.cache_path(path)
+
+        try:
+            with open(cache_path, 'rb') as file:
+                # read in one go, 'marshal.load()' on a file makes a small read for every object
+                version, cached_key, compiled = marshal.loads(file.read())
+            if version == cls.FORMAT and cached_key == key:  # compiled from this very source
+                return cls(*compiled)
+        except (OSError, EOFError, ValueError, TypeError):  # no cache yet, or one that is damaged
+            pass
+
+        compiled = cls.compile(source)
+        try:  # the cache is only a shortcut, a vault that cannot be cached still loads
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = cache_path + '.' + str(os.getpid()) + '.tmp'  # several games may start at once
+            with open(temp_path, 'wb') as file:
+                file.write(marshal.dumps((cls.FORMAT, key, compiled)))
+            os.replace(temp_path, cache_path)
+        except OSError:
+            pass
+        return cls(*compiled)
+
+    @classmethod
+    def compile(cls, source):
+        """
+        Checks a definition and compiles it into plain tuples, dictionaries, strings and integers that 'marshal'
+        can store: room names become room IDs, item lists become bitmasks, and asset names become paths.
+        Every mistake is collected, so they can all be fixed at once: unknown fields, exits in unknown directions
+        or to rooms that do not exist, items that are not in the item list or not in exactly one room, and rooms
+        that cannot be reached from the start. A vault without mistakes is then checked it can be won
+        (see 'RoutePlanner.problems()').
+        Raises ValueError listing every mistake, one per line.
+        :param source: Definition as JSON text
+        :type source: str
+        :return: Arguments of a World object, see '__init__()'
+        """
+        try:
+            definition = json.loads(source)
+        except ValueError as error:
+            raise ValueError("It is not valid JSON: " + str(error))
+        if not isinstance(definition, dict):
+            raise ValueError("It is not a JSON object.")
+        problems = []
+
+        def fields(section, where, required, optional=()):  # section as a dictionary, checking its field names
+            if not isinstance(section, dict):
+                problems.append(where + " must be an object")
+                return {}
+            for name in required:
+                if name not in section:
+                    problems.append(where + " is missing '" + name + "'")
+            for name in section:
+                if name not in required and name not in optional:
+                    problems.append(where + " has an unknown field '" + name + "'")
+            return section
+
+        def text(section, name, where, default=None):  # a text field
+            value = section.get(name, default)
+            if not isinstance(value, str):
+                if name in section:
+                    problems.append(where + " '" + name + "' must be text")
+                return ''
+            return value
+
+        def asset(section, name, where):  # an asset name, as the path it is opened by
+            value = text(section, name, where)
+            return AssetManifest.path(value) if value else ''
+
+        def mask(section, name, where):  # an item list, as its bitmask
+            value = section.get(name, [])
+            if not isinstance(value, list):
+                problems.append(where + " '" + name + "' must be a list of items")
+                return 0
+            needed = 0
+            for item in value:
+                if not isinstance(item, str) or item not in bits:  # a list or object can't be looked up
+                    problems.append(where + " needs '" + str(item) + "', which is not in 'items'")
+                else:
+                    needed |= bits[item]
+            return needed
+
+        fields(definition, "The vault", ('items', 'start', 'rooms', 'objectives', 'fight'))
+
+        items = definition.get('items', [])
+        if not isinstance(items, list) or not all(isinstance(item, str) and item for item in items):
+            problems.append("'items' must be a list of item names")
+            items = []
+        bits = {}
+        for item in items:
+            if item in bits:
+                problems.append("'" + item + "' is listed twice in 'items'")
+            bits[item] = 1 << len(bits)
+        if len(items) > cls.MAX_ITEMS:
+            problems.append("A vault can have at most " + str(cls.MAX_ITEMS) + " items")
+
+        room_list = definition.get('rooms', [])
+        if not isinstance(room_list, list) or not room_list:
+            problems.append("'rooms' must be a list of rooms")
+            room_list = []
+        if len(room_list) > cls.MAX_ROOMS:
+            problems.append("A vault can have at most " + str(cls.MAX_ROOMS) + " rooms")
+        room_list = [fields(room, "Room " + str(number), ('name', 'art', 'description'), ('exits', 'item'))
+                     for number, room in enumerate(room_list, 1)]
+        room_ids = {}
+        for room_id, room in enumerate(room_list):  # number the rooms in order, before any exit points to one
+            name = text(room, 'name', "Room " + str(room_id + 1))
+            if name in room_ids:
+                problems.append("There are two rooms named '" + name + "'")
+            room_ids.setdefault(name, room_id)
+
+        rooms = []
+        placed = {}  # room each item is in
+        for room in room_list:
+            name = text(room, 'name', "Room")
+            where = "Room '" + name + "'"
+            exits = [Room.NO_EXIT] * len(Room.DIRECTIONS)
+            room_exits = room.get('exits', {})
+            if not isinstance(room_exits, dict):
+                problems.append(where + " 'exits' must be an object of direction: room")
+                room_exits = {}
+            for direction, target in room_exits.items():
+                if direction not in Room.DIRECTION_INDEX:
+                    problems.append(where + " has an exit '" + direction + "', directions are " +
+                                    ", ".join(Room.DIRECTIONS))
+                elif not isinstance(target, str) or target not in room_ids:
+                    problems.append(where + " has an exit " + direction + " to '" + str(target) +
+                                    "', which is not a room")
+                else:
+                    exits[Room.DIRECTION_INDEX[direction]] = room_ids[target]
+            item = room.get('item')
+            if item is not None:
+                if not isinstance(item, str) or item not in bits:
+                    problems.append(where + " holds '" + str(item) + "', which is not in 'items'")
+                elif item in placed:
+                    problems.append("'" + item + "' is in both '" + placed[item] + "' and '" + name + "'")
+                else:
+                    placed[item] = name
+            rooms.append((name, asset(room, 'art', where), asset(room, 'description', where), tuple(exits), item))
+        for item in items:
+            if item not in placed:  # the vault could never be won
+                problems.append("'" + item + "' is not in any room")
+
+        start = definition.get('start')
+        start = room_ids.get(start) if isinstance(start, str) else None
+        if start is None:
+            problems.append("'start' must be the name of a room")
+        else:  # every room must be reachable from the start, or an exit is missing or points the wrong way
+            reached = {start}
+            waiting = [start]
+            while waiting:
+                for room_id in rooms[waiting.pop()][3]:
+                    if room_id != Room.NO_EXIT and room_id not in reached:
+                        reached.add(room_id)
+                        waiting.append(room_id)
+            for room_id, room in enumerate(rooms):
+                if room_id not in reached:
+                    problems.append("Room '" + room[0] + "' cannot be reached from '" + rooms[start][0] + "'")
+
+        objectives = []
+        objective_list = definition.get('objectives', [])
+        if not isinstance(objective_list, list):
+            problems.append("'objectives' must be a list of objective lines")
+            objective_list = []
+        for number, line in enumerate(objective_list, 1):
+            if line == '':  # a blank line between objectives
+                objectives.append(('', 0, None))
+                continue
+            where = "Objective " + str(number)
+            line = fields(line, where, ('text',), ('kind', 'items'))
+            kind = line.get('kind', Objectives.CHECK)
+            if kind not in (Objectives.CHECK, Objectives.FOUND):
+                problems.append(where + " 'kind' must be '" + Objectives.CHECK + "' or '" + Objectives.FOUND + "'")
+            objectives.append((text(line, 'text', where), mask(line, 'items', where), kind))
+
+        fight = fields(definition.get('fight'), "The fight", ('room', 'art', 'approach', 'win', 'lose'))
+        fight_room = fight.get('room')
+        fight_room = room_ids.get(fight_room) if isinstance(fight_room, str) else None
+        if fight_room is None and 'room' in fight:
+            problems.append("The fight 'room' must be the name of a room")
+        where = "The fight's 'win'"
+        win = fields(fight.get('win', {}), where, ('items', 'taunt', 'prompt', 'text', 'art', 'message'))
+        win = {'items': mask(win, 'items', where), 'taunt': text(win, 'taunt', where),
+               'prompt': text(win, 'prompt', where), 'text': asset(win, 'text', where), 'art': asset(win, 'art', where),
+               'message': text(win, 'message', where)}
+        where = "The fight's 'lose'"
+        lose = fields(fight.get('lose', {}), where, ('taunt', 'prompt', 'art', 'steps'))
+        steps = []
+        step_list = lose.get('steps', [])
+        if not isinstance(step_list, list) or not step_list:
+            problems.append(where + " 'steps' must be a list of at least one step")
+            step_list = []
+        for number, step in enumerate(step_list, 1):
+            step_where = "Fight step " + str(number)
+            step = fields(step, step_where, ('has', 'missing'), ('text', 'items'))
+            steps.append((text(step, 'text', step_where, ''), mask(step, 'items', step_where),
+                          text(step, 'has', step_where), text(step, 'missing', step_where)))
+        lose = {'taunt': text(lose, 'taunt', where), 'prompt': text(lose, 'prompt', where),
+                'art': asset(lose, 'art', where), 'steps': tuple(steps)}
+        fight = {'room': fight_room, 'art': asset(fight, 'art', "The fight"),
+                 'approach': text(fight, 'approach', "The fight"), 'win': win, 'lose': lose}
+
+        if problems:
+            raise ValueError("\n".join(problems))
+
+        compiled = (tuple(items), tuple(rooms), start, tuple(objectives), fight)
+        problems = cls(*compiled).routes().problems()
+        if problems:
+            raise ValueError("\n".join(problems))
+        return compiled
+
+    def apply(self):
+        """
+        Makes the vault's items and objectives the ones every game uses: the inventory's item bits, the objective
+        lines (whose table of completed lines is rebuilt for them), and the items and rooms the 'get' and 'travel'
+        commands match.
+        """
+        Inventory.ITEMS = self.items
+        Inventory.BITS = {item: 1 << bit for bit, item in enumerate(self.items)}
+        Inventory.ALL = (1 << len(self.items)) - 1
+        Objectives.LINES = self.objectives
+        Objectives.TABLE = None
+        game_commands.add('get', (), self.items)
+        game_commands.add('travel', ('t',), tuple(room.name for room in self.rooms))
+
+
+class RoutePlanner:
+    """
+    Plans routes through a vault, for the Pip-Boy's hints and the 'travel' command, and checks a vault can be won.
+    A game's progress is a state of (room, bitmask of items collected). Routes between rooms do not depend on the
+    items carried, so the state space is never searched state by state: the shortest route from every room to every
+    other is found once, by a breadth first search back from each room, and the best order to collect the items
+    still needed is worked out from a state by dynamic programming over item bitmasks, keeping every state's result
+    so later hints are lookups. Entering the fight's room starts the fight, so no route passes through it.
+
+    Attributes
+    ----------
+    UNREACHABLE = Distance to a room that cannot be reached
+    rooms = Rooms of the vault, indexed by room ID
+    start = Room ID the player starts in
+    fight_room = Room ID of the fight's room
+    needed = Items needed to win, as (bit, room ID the item is in)
+
+    Methods
+    ----------
+    distance(source, target)
+        Returns the number of moves from one room to another.
+    route(source, target)
+        Returns the directions from one room to another.
+    best(room, mask)
+        Returns the number of moves and pickups to win from a state, and the item to get next.
+    plan(room, mask)
+        Returns the best order to get the items still needed from a state.
+    problems()
+        Returns the reasons the vault cannot be won.
+    """
+    UNREACHABLE = -1
+
+    def __init__(self, world):
+        """
+        Plans the routes between every pair of rooms in a vault.
+        :param world: Vault to plan routes through
+        :type world: World
+        """
+        self.rooms = world.rooms
+        self.start = world.start
+        self.fight_room = world.fight['room']
+        needed_mask = world.fight['win']['items']
+        self.needed = tuple((1 << bit, room.id) for room in world.rooms if room.item is not None
+                            for bit, item in enumerate(world.items) if item == room.item and needed_mask >> bit & 1)
+        self._needed_mask = needed_mask
+        self._best = {}  # (room ID, bitmask of needed items collected) -> (moves and pickups to win, next bit)
+
+        entrances = [[] for room in self.rooms]  # (room ID, direction) of every exit leading into each room
+        for room in self.rooms:
+            for direction, target in enumerate(room.exits):
+                if target != Room.NO_EXIT:
+                    entrances[target].append((room.id, direction))
+        # for each target room: the distance from every room to it, and the direction to take first
+        self._toward = [self._search(entrances, target) for target in range(len(self.rooms))]
+
+    def _search(self, entrances, target):
+        """
+        Finds the shortest route from every room to a target room, searching back from the target.
+        :param entrances: (room ID, direction) of the exits into each room
+        :type entrances: list
+        :param target: Room ID of the target room
+        :type target: int
+        :return: Tuple of lists, the distance from each room and the direction to take first (-1 if unreachable)
+        """
+        distances = [self.UNREACHABLE] * len(entrances)
+        directions = [-1] * len(entrances)
+        distances[target] = 0
+        frontier = [target]
+        while frontier:  # one move further from the target each time round
+            further = []
+            for room_id in frontier:
+                if room_id == self.fight_room and room_id != target:  # the fight starts here, no route goes on
+                    continue
+                distance = distances[room_id] + 1
+                for source, direction in entrances[room_id]:
+                    if distances[source] == self.UNREACHABLE:
+                        distances[source] = distance
+                        directions[source] = direction
+                        further.append(source)
+            frontier = further
+        return distances, directions
+
+    def distance(self, source, target):
+        """
+        Finds the number of moves from one room to another.
+        :param source: Room ID to start from
+        :type source: int
+        :param target: Room ID to get to
+        :type target: int
+        :return: Number of moves, or UNREACHABLE
+        """
+        return self._toward[target][0][source]
+
+    def route(self, source, target):
+        """
+        Finds the shortest route from one room to another.
+        :param source: Room ID to start from
+        :type source: int
+        :param target: Room ID to get to
+        :type target: int
+        :return: List of directions to move in, or None if the target cannot be reached
+        """
+        distances, directions = self._toward[target]
+        if distances[source] == self.UNREACHABLE:
+            return None
+        route = []
+        room_id = source
+        while room_id != target:  # each room's first direction leads one move closer
+            direction = directions[room_id]
+            route.append(Room.DIRECTIONS[direction])
+            room_id = self.rooms[room_id].exits[direction]
+        return route
+
+    def best(self, room_id, mask):
+        """
+        Works out the fewest moves and pickups to win from a state: get each item still needed, in the best order,
+        then go to the fight. Each state's result is kept, so a state is only ever worked out once.
+        :param room_id: Room ID the player is in
+        :type room_id: int
+        :param mask: Bitmask of the items collected
+        :type mask: int
+        :return: Tuple of (moves and pickups, or UNREACHABLE if the game cannot be won, bit of the item to get next,
+                 or 0 to go to the fight)
+        """
+        mask &= self._needed_mask  # items that are not needed to win make no difference
+        key = (room_id, mask)
+        best = self._best.get(key)
+        if best is None:
+            if mask == self._needed_mask:  # every item needed, on to the fight
+                best = (self.distance(room_id, self.fight_room), 0)
+            else:
+                best = (self.UNREACHABLE, 0)
+                for bit, item_room in self.needed:
+                    if mask & bit:  # already collected
+                        continue
+                    moves = self.distance(room_id, item_room)
+                    if moves == self.UNREACHABLE:
+                        continue
+                    rest = self.best(item_room, mask | bit)[0]
+                    if rest != self.UNREACHABLE and (best[0] == self.UNREACHABLE or moves + 1 + rest < best[0]):
+                        best = (moves + 1 + rest, bit)  # the move there, the pickup, and the rest of the way
+            self._best[key] = best
+        return best
+
+    def plan(self, room_id, mask):
+        """
+        Lists the best order to get the items still needed from a state, ending with the fight.
+        :param room_id: Room ID the player is in
+        :type room_id: int
+        :param mask: Bitmask of the items collected
+        :type mask: int
+        :return: List of (room ID, item bit) to go to in order, the last is (fight room, 0), empty if there is none
+        """
+        plan = []
+        while True:
+            moves, bit = self.best(room_id, mask)
+            if moves == self.UNREACHABLE:
+                return []
+            if not bit:
+                plan.append((self.fight_room, 0))
+                return plan
+            room_id = next(item_room for item_bit, item_room in self.needed if item_bit == bit)
+            mask |= bit
+            plan.append((room_id, bit))
+
+    def problems(self):
         """
-        return self.current.join(in_str)  # return color code concatenated with 'in_str'
+        Checks the vault can be won: every item can be reached from the start without going through the fight's
+        room, the fight's room can be reached, and there is an order to get the items needed that ends at the fight.
+        :return: List of problems found
+        """
+        problems = []
+        fight_name = self.rooms[self.fight_room].name
+        if self.rooms[self.fight_room].item is not None:
+            problems.append("'" + self.rooms[self.fight_room].item + "' is in '" + fight_name +
+                            "', where the fight starts before it can be picked up")
+        for room in self.rooms:
+            if room.item is not None and room.id != self.fight_room and \
+                    self.distance(self.start, room.id) == self.UNREACHABLE:
+                problems.append("'" + room.item + "' in '" + room.name + "' can only be reached through '" +
+                                fight_name + "'")
+        if self.distance(self.start, self.fight_room) == self.UNREACHABLE:
+            problems.append("'" + fight_name + "' cannot be reached from the start")
+        if not problems and self.best(self.start, 0)[0] == self.UNREACHABLE:  # e.g. one way exits that trap
+            problems.append("There is no order to get the items needed to win that ends at '" + fight_name + "'")
+        return problems
+
+
+class FightTable:
+    """
+    The fight with Cook-Cook, compiled into an outcome table. How the fight plays out only depends on whether the
+    player has the items to win, and if not, which of the fight's item checks they pass, so every outcome is drawn
+    once with the full fight log of each step, and the table maps each item bitmask to its outcome.
+    A table is drawn for one box width, the vault keeps a table for each width played at until the fight's art or
+    text files change.
+    Each screen of an outcome is kept as the lines it adds to the screen before it: the art at the top of the fight
+    is drawn once, and each step of the fight only adds its new lines of the fight log.
 
+    Attributes
+    ----------
+    approach = Prompt shown as the player walks into the fight
+    assets = Paths of the art and text files the fight is drawn from
+    versions = Versions of the assets the table was drawn from
+    outcomes = Outcome for each item bitmask, as (won, screens), outcomes with the same result are shared.
+               Each screen is (lines at the top of the screen before it to keep, or None to draw under it,
+               lines to add, prompt)
 
-class File:
+    Methods
+    ----------
+    outcome(mask)
+        Returns the outcome of the fight for a bitmask of items.
+    is_current()
+        Checks if the fight's files are unchanged since the table was drawn.
+    _lines(path, color_code)
+        Returns the colored lines of an art or text file.
+    _screens(frames)
+        Returns the screens of an outcome from its frames.
     """
-    Class handles all file operations as a File object.
+    def __init__(self, fight, item_count, width=BoxLayout.WIDTH):
+        """
+        Draws every outcome of a fight.
+        :param fight: Rules and text of the fight (see 'World')
+        :type fight: dict
+        :param item_count: Number of items in the vault
+        :type item_count: int
+        :param width: Optional: Width of the fight's display boxes
+        :type width: int
+        """
+        self.approach = fight['approach']
+        win = fight['win']
+        lose = fight['lose']
+        self.assets = (fight['art'], win['text'], win['art'], lose['art'])
+        art = self._lines(fight['art'], TextColor.YELLOW)
+
+        shared = {}  # outcome for each result of the item checks
+        self.outcomes = []
+        for mask in range(1 << item_count):
+            if mask & win['items'] == win['items']:  # the player has all the items needed to win
+                result = True
+            else:  # which of the fight's steps the player has the items for
+                result = tuple(mask & needed == needed for text, needed, has, missing in lose['steps'])
+            if result not in shared:
+                if result is True:
+                    frames = [(True, art + format_box(win['taunt'], TextColor.GREEN, width), win['prompt']),
+                              (False, self._lines(win['text'], TextColor.GREEN), "Press Enter to continue..."),
+                              (True, self._lines(win['art'], TextColor.GREEN) +
+                               format_box(win['message'], TextColor.GREEN, width), "Press Enter to continue...")]
+                else:
+                    frames = [(True, art + format_box(lose['taunt'], TextColor.GREEN, width), lose['prompt'])]
+                    fight_log = []  # text of the 'fight' so far
+                    for number, (text, needed, has, missing) in enumerate(lose['steps']):
+                        fight_log.append(text)
+                        fight_log.append(has if result[number] else missing)  # depending on the player's items
+                        # the last step is drawn over the game over art
+                        step_art = art if number < len(lose['steps']) - 1 else self._lines(lose['art'],
+                                                                                          TextColor.GREEN)
+                        frames.append((True, step_art + format_box(''.join(fight_log), TextColor.GREEN, width),
+                                       "Press Enter to continue..."))
+                shared[result] = (result is True, self._screens(frames))
+            self.outcomes.append(shared[result])
+        self.versions = tuple(asset_cache.version(path) for path in self.assets)
+
+    def outcome(self, mask):
+        """
+        Finds the outcome of the fight for the player's items.
+        :param mask: Bitmask of the player's items
+        :type mask: int
+        :return: Tuple of (if the player wins, screens of the fight)
+        """
+        return self.outcomes[mask]
+
+    def is_current(self):
+        """
+        Checks if the art and text files of the fight are unchanged since the table was drawn.
+        :return: Boolean if the table is up to date
+        """
+        return self.versions == tuple(asset_cache.version(path) for path in self.assets)
+
+    @staticmethod
+    def _lines(path, color_code):
+        """
+        Colors an art or text file the way 'File.print_utf8()' draws it, split into screen lines.
+        :param path: Path to the file
+        :type path: str
+        :param color_code: Color of the file
+        :type color_code: str
+        :return: List of colored lines
+        """
+        return list(asset_cache.colored(File(path).path, color_code))
+
+    @staticmethod
+    def _screens(frames):
+        """
+        Turns the frames of an outcome into screens. A screen that starts a new frame keeps the lines at the top it
+        shares with the screen before it, the rest are the lines it adds.
+        :param frames: List of (if the frame starts a new frame, or is drawn under the one before, lines, prompt)
+        :type frames: list
+        :return: Tuple of screens, as (lines to keep or None, lines to add, prompt)
+        """
+        screens = []
+        before = []  # lines on screen after the last screen, None for its prompt's row
+        for new_frame, lines, prompt in frames:
+            if new_frame:
+                keep = 0
+                while keep < min(len(before), len(lines)) and before[keep] == lines[keep]:
+                    keep += 1
+                screens.append((keep, tuple(lines[keep:]), prompt))
+                before = lines + [None]
+            else:  # drawn under the screen before, below its prompt
+                screens.append((None, tuple(lines), prompt))
+                before = before + lines + [None]
+        return tuple(screens)
+
+
+class PrefixTrie:
+    """
+    Maps words to values, and finds a value by any unambiguous prefix of its words. Looking up a prefix walks
+    one trie node per character, so the cost depends on the length of the prefix and not on the number of words.
 
     Attributes
     ----------
-    path = Path to create file object.
+    _words = Value of each whole word, for exact matches
+    _root = Root node of the trie, each node is [child nodes by character, values of the words below the node]
 
     Methods
     ----------
-    print_utf8(color_code)
-        Prints entire file with UTF-8 encoding.
-    to_str()
-        Returns file as a string.
-    to_list()
-        Returns list of file lines.
+    add(word, value)
+        Adds a word for a value.
+    find(prefix)
+        Finds the value of a word, or of the only value with words starting with the prefix.
     """
-    def __init__(self, path):
+    def __init__(self, words=None):
         """
-        Validates and constructs necessary 'path' for File object
-        :param path: Path to file
-        :type path: str
+        Constructs a trie, optionally with words.
+        :param words: Optional: Dictionary of values by word
+        :type words: dict
         """
-        if os.path.isfile(path) and os.access(path, os.R_OK):  # file and path exists and is readable
-            self.path = path  # give object its path
-        else:  # the file or path could not be found
-            clear_display()  # clear the display
-            err_str = "The dependency \'" + path + "\' could not be found.\n"  # build error message string
-            err_str += "Please ensure that this script is in the proper \'FalloutCMD\' directory.\n"
-            err_str += "For proper operation unpack \'FalloutCMD.zip\' and run script from its root directory."
-            display_box(err_str, TextColor.RED)  # display error message and instructions
-            input("Press Enter to continue...")  # wait for player to press 'enter'
-            sys.exit(0)  # exit the script
+        self._words = {}
+        self._root = [{}, set()]
+        for word, value in (words or {}).items():
+            self.add(word, value)
 
-    def print_utf8(self, color_code):
+    def add(self, word, value):
         """
-        Prints a file line by line using the 'color_code' passed.
-        File is read with UTF-8 encoding to read and print the special characters,
-        such as in a line art file, properly.
-        :param color_code: Color for printed file to be displayed
-        :type color_code: str
+        Adds a word for a value, several words (e.g. a name and its aliases) can have the same value.
+        :param word: Word to be matched, in lowercase
+        :type word: str
+        :param value: Value found for the word
         """
-        color = TextColor(color_code)
+        self._words[word] = value
+        node = self._root
+        for char in word:  # walk down the trie, adding nodes for the word where needed
+            node = node[0].setdefault(char, [{}, set()])
+            node[1].add(value)  # the value can be found from this node
 
-        with open(self.path, 'r', encoding='UTF-8') as file:  # with the file open as 'read' with UTF-8 encoding
-            while line := file.readline():  # while the file line is being read, store in 'line'
-                if color_code != "":  # if color code is not blank
-                    print(color.format_str(line.rstrip()))  # print the current line as passed color
-                else:  # no valid color code
-                    print(line.rstrip())  # print line without formatting
+    def find(self, prefix):
+        """
+        Finds the value of a whole word, or else the value that all words starting with the prefix belong to.
+        :param prefix: Word or prefix, in lowercase
+        :type prefix: str
+        :return: Value found, or None if no word matches or the prefix matches words of more than one value
+        """
+        value = self._words.get(prefix)
+        if value is not None:  # a whole word always wins, even if it is also a prefix of other words
+            return value
 
-    def to_str(self):
+        node = self._root
+        for char in prefix:
+            node = node[0].get(char)
+            if node is None:  # no word starts with the prefix
+                return None
+        if len(node[1]) == 1:  # every word starting with the prefix has the same value
+            return next(iter(node[1]))
+        return None  # prefix is empty or ambiguous
+
+
+class Command:
+    """
+    A parsed command, see 'CommandSet.parse()'.
+
+    Attributes
+    ----------
+    name = Name of the command matched, or None if the command was not recognized
+    argument = Argument matched (e.g. 'North' for 'move n'), the argument text if it did not match, or ''
+    text = Command as entered, in lowercase
+    """
+    __slots__ = ('name', 'argument', 'text')
+
+    def __init__(self, name, argument, text):
+        self.name = name
+        self.argument = argument
+        self.text = text
+
+
+class CommandSet:
+    """
+    The commands of one part of the game (main menu, vault, or Pip-Boy). Commands and their aliases are kept in
+    a prefix trie, so any unambiguous abbreviation works ('mo n' for 'move north'), and a command's argument
+    is matched against its own list of words the same way.
+
+    Attributes
+    ----------
+    _names = Trie of command names and aliases
+    _arguments = Trie of argument words, for each command that takes an argument
+
+    Methods
+    ----------
+    add(name, aliases, arguments)
+        Adds a command.
+    parse(text)
+        Splits a command into words once and matches its name and argument.
+    """
+    def __init__(self, commands):
         """
-        Reads a file with UTF-8 encoding and returns it contents as a string.
-        :return: File contents as string
+        Constructs a command set.
+        :param commands: (name, aliases) or (name, aliases, arguments) for each command
+        :type commands: iterable
         """
+        self._names = PrefixTrie()
+        self._arguments = {}
+        for command in commands:
+            self.add(*command)
 
-        with open(self.path, 'r', encoding='UTF-8') as file:  # with loop to open file as 'r'/ read with UTF-8 encoding
-            file_contents = file.read()  # store file contents into variable 'file_contents'
-        return file_contents  # return 'file_contents' string
+    def add(self, name, aliases=(), arguments=None):
+        """
+        Adds a command.
+        :param name: Name of the command, can be more than one word (e.g. 'main menu')
+        :type name: str
+        :param aliases: Other names of the command (e.g. 'mm')
+        :type aliases: tuple
+        :param arguments: Optional: Words the command's argument is matched against (e.g. directions)
+        :type arguments: tuple
+        """
+        for word in (name,) + tuple(aliases):
+            self._names.add(word, name)
+        if arguments is not None:  # this command takes an argument
+            self._arguments[name] = PrefixTrie({word.lower(): word for word in arguments})
 
-    def to_list(self):
+    def parse(self, text):
         """
-        Reads the lines of a file into a list using UTF-8 encoding.
-        :return: List of file lines
+        Parses a command. A command that takes no argument must match the whole text,
+        a command that takes an argument matches the first word and the rest of the text is its argument.
+        :param text: Command as entered
+        :type text: str
+        :return: Parsed command
         """
+        text = text.lower()
+        words = text.split()  # split into words once, extra spaces are ignored
+        if not words:  # nothing was entered
+            return Command(None, '', text)
 
-        line_list = []  # declare a list to hold lines of a file 'line_list'
-        with open(self.path, 'r', encoding='UTF-8') as file:  # with loop to open file as 'r' / read with UTF-8 encoding
-            while line := file.readline():  # while file line is being read into 'line'
-                # append file line string to 'line_list' (each line = element of list)
-                # uses '.rstrip()' to strip trailing blank space from line string
-                line_list.append(line.rstrip())
-        return line_list  # return the list of file lines
+        name = self._names.find(' '.join(words))  # match the whole command, e.g. 'main menu'
+        if name is not None and name not in self._arguments:
+            return Command(name, '', text)
 
+        name = self._names.find(words[0])  # match the first word of a command with an argument, e.g. 'move'
+        if name not in self._arguments:  # not a command, or a command without an argument followed by more words
+            return Command(None, '', text)
 
-class PipBoy:
+        argument = ' '.join(words[1:])
+        if argument:  # match the argument, keeping what was entered (as a title, like the names) if it doesn't
+            argument = self._arguments[name].find(argument) or argument.title()
+        return Command(name, argument, text)
+
+
+class Session:
     """
-    A class for Pip-Boy object. Contains all methods and attributes required to display and control the users Pip-Boy.
+    One player's game, run as a state machine. Each state plays its part of the game and returns the next state,
+    so going back to the main menu or losing the fight resets the session's state instead of starting a new game
+    on top of the old one.
+    The session never reads input itself. 'run()' is a generator that yields a (kind, prompt) request whenever
+    it needs input (kind is COMMAND or PAUSE), and whatever drives it sends back the player's input.
 
     Attributes
     ----------
-    inventory = Players passed inventory of items
-    objectives = Player list of objectives to complete.
+    MENU, INTRO, EXPLORE, PIP, FIGHT, OVER = Session states
+    WORLD = The vault, shared by every session, loaded by the first 'reset()' (see 'World')
+    restart_on_loss = If a lost fight goes back to the main menu, instead of ending the session
+    saves = If the 'save' and 'load' commands are allowed
+    rooms = Rooms of the vault indexed by room ID, items are removed as they are picked up
+    room_ids = Room IDs by room name
+    inventory = Player's items
+    objectives = Player's objectives
+    pip = Player's Pip-Boy
+    current_room = Room the player is in
+    state = Current state
+    result = How the session ended, once in the OVER state: 'win', 'loss' or 'quit'
 
     Methods
     ----------
-    _fill_whitespace(str_len)
-        Returns a string of blank spaces for given length.
-    _pip_boy_screen(list_to_display, screen_header)
-        Returns a formatted list of display lines.
-    _build_display(left_list, right_list, text_list)
-        Builds and returns Pip-Boy center display as string.
-    show()
-        Displays and enters Pip-Boy full menu.
+    world()
+        Returns the vault shared by every session.
+    reset()
+        Sets up a new game, starting at the main menu.
+    snapshot()
+        Returns a snapshot of the game, to be saved.
+    restore(snapshot)
+        Sets up the game saved in a snapshot.
+    run()
+        Runs the state machine until the session is over.
     """
-    def __init__(self, inventory, objectives):
-        self.inventory = inventory
-        self.objectives = objectives
+    MENU = 'menu'
+    INTRO = 'intro'
+    EXPLORE = 'explore'
+    PIP = 'pip'
+    FIGHT = 'fight'
+    OVER = 'over'
+    WORLD = None
+
+    def __init__(self, restart_on_loss=True, saves=True):
+        """
+        Constructs a session starting at the main menu.
+        :param restart_on_loss: If a lost fight goes back to the main menu, instead of ending the session
+        :type restart_on_loss: bool
+        :param saves: Optional: If the 'save' and 'load' commands are allowed
+        :type saves: bool
+        """
+        self.restart_on_loss = restart_on_loss
+        self.saves = saves
+        self.result = None
+        self._handlers = {self.MENU: self._menu, self.INTRO: self._intro, self.EXPLORE: self._explore,
+                          self.PIP: self._pip, self.FIGHT: self._fight}
+        # handler of each command, by command name (see 'menu_commands' and 'game_commands')
+        self._menu_handlers = {'start': self._start, 'load': self._load, 'quit': self._quit, 'help': self._menu_help}
+        self._game_handlers = {'help': self._help, 'move': self._move, 'get': self._get, 'travel': self._travel,
+                               'main menu': self._main_menu, 'pip': self._open_pip, 'save': self._save,
+                               'load': self._load, 'quit': self._quit}
+        self.reset()
+
+    def reset(self):
+        """
+        Sets up a new game: all rooms, an empty inventory, unchecked objectives, and the main menu.
+        """
+        world = self.world()
+        self.room_ids = world.room_ids
+        self.rooms = [room.copy() for room in world.rooms]  # copy the rooms, so this game's items can be picked up
+        self.inventory = Inventory()  # set player inventory as empty
+        self.objectives = Objectives(self.inventory)  # player's objectives, checked against the inventory
+        self.pip = PipBoy(self.inventory, self.objectives, world.routes())  # player's Pip-Boy, keeps its screens
+        self.current_room = self.rooms[world.start]  # set current room to starting room
+        self.state = self.MENU
+
+    @classmethod
+    def world(cls):
+        """
+        Finds the vault shared by every session, loading it the first time.
+        :return: World object
+        """
+        if cls.WORLD is None:  # load the vault the first time a game is set up
+            try:
+                world = World.load(world_path)
+            except (OSError, ValueError) as error:  # the definition is missing, or has mistakes in it
+                clear_display()  # clear the display
+                err_str = "The vault \'" + world_path + "\' could not be loaded:\n"  # build error message string
+                if isinstance(error, OSError):
+                    err_str += "    The file could not be read."
+                else:
+                    err_str += "".join("    " + problem + "\n" for problem in str(error).split("\n")).rstrip()
+                display_box(err_str, TextColor.RED)  # display error message
+                player_input.pause()  # wait for player to press 'enter'
+                player_input.finish('error')  # exit the script
+            world.apply()  # its items and objectives are the ones every game uses
+            Session.WORLD = world
+        return cls.WORLD
+
+    def snapshot(self):
+        """
+        Takes a snapshot of the game.
+        :return: Snapshot of the current room and inventory
+        """
+        return Snapshot(self.current_room.id, self.inventory.mask)
 
-    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
-    # noinspection PyMethodMayBeStatic
-    def _fill_whitespace(self, str_len):
+    def restore(self, snapshot):
         """
-        Generates a string of blank spaces for given length.
-        :param str_len: Length of string to be built
-        :type str_len: int
-        :return: String of blank spaces for given length
+        Sets up the game saved in a snapshot, in the vault. The items are listed in the Pip-Boy in vault order.
+        :param snapshot: Snapshot of the game
+        :type snapshot: Snapshot
+        :return: If the snapshot could be restored, False if it does not fit this vault
         """
+        if snapshot.room_id >= len(self.world().rooms) or snapshot.item_mask & ~Inventory.ALL:
+            return False
+
+        self.reset()
+        self.inventory = Inventory(item for item in Inventory.ITEMS if snapshot.item_mask & Inventory.BITS[item])
+        self.objectives = Objectives(self.inventory)
+        self.pip = PipBoy(self.inventory, self.objectives, self.WORLD.routes())
+        for room in self.rooms:  # items the player has are no longer in their rooms
+            if room.item is not None and snapshot.item_mask & Inventory.BITS[room.item]:
+                room.item = None
+        self.current_room = self.rooms[snapshot.room_id]
+        self.state = self.EXPLORE
+        return True
 
-        line_str = ""  # initialize blank string to hold blank spaces, 'line_str'
-        for i in range(0, str_len):  # loop for the arg range of 'str_len' starting with an index of 0
-            line_str += " "  # append a blank space to 'line_str' for each iteration
-        return line_str  # return the blank space string
+    def run(self):
+        """
+        Runs the state machine until the session is over. Generator, yields (kind, prompt) requests for input.
+        """
+        while self.state != self.OVER:  # run each state in turn
+            self.state = yield from self._handlers[self.state]()
 
-    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
-    # noinspection PyMethodMayBeStatic
-    def _pip_boy_screen(self, list_to_display, screen_header):
+    def _menu(self):
         """
-        Creates a formatted template for the pip-boy screen as list,
-        ensures list has enough elements to display properly.
-        :param list_to_display:Content to be displayed, line by line
-        :type list_to_display: list
-        :param screen_header: Header/title of screen
-        :type screen_header: str
-        :return: Formatted display lines, as list
+        Main menu state: shows the main menu and waits for the player to start the game, quit, or ask for help.
+        :return: Next state
         """
+        yield from main_menu()  # display main menu
 
-        # the list 'display_screen' starts with the header portion
-        display_screen = [" ",  # pad top with blank line
-                          "                   ==( " + screen_header + " )==",  # append header string to header line
-                          " "]  # pad bottom with blank line
-        # create a list with 15 blank string elements to pad the bottom of the pip-boy screen
-        # provides enough padding to display properly no matter the size of 'list_to_display'
-        filler = ["", "", "", "", "", "", "", "", "", "", "", "", "", "", ""]
-        display_screen.extend(list_to_display)  # adds list_to_display onto display_screen with extend
-        display_screen.extend(filler)  # adds the padding filler onto the bottom display_screen with extend
+        while True:  # runs a continuous menu loop
+            command = menu_commands.parse((yield from ask_command(":>")))  # receive and parse the player's command
+            # run the command's handler, which returns the next state, or None to stay in the main menu
+            next_state = yield from self._menu_handlers.get(command.name, self._menu_unknown)(command)
+            if next_state is not None:
+                return next_state
 
-        return display_screen  # return formatted display_screen list
+    # vvv  Negates 'Method may be static' warning **Method is internal, static is not needed**
+    # noinspection PyMethodMayBeStatic
+    def _intro(self):
+        """
+        Intro state: plays the intro sequence.
+        :return: Next state
+        """
+        yield from play_intro()  # play the intro sequence
+        return self.EXPLORE
 
-    def _build_display(self, left_list, right_list, text_list):
+    def _explore(self):
         """
-        Builds the center of pip-boy display, formats with correct margins to center given text_list within display.
-        :param left_list: Left side of pip-boy art display lines
-        :type  left_list: list
-        :param right_list: Right side of pip-boy art display lines
-        :type  right_list: list
-        :param text_list: Text to by displayed line by line
-        :type  text_list: list
-        :return: Formatted center 'block' of pip-boy display as single string
+        Explore state: plays a single turn in the vault, drawing the room and handling one command.
+        :return: Next state
         """
+        clear_display()  # clear the console
 
-        display_str = ""  # initialize blank string to hold the center display, 'display_str'
+        # display the description and art of the room in its current status
+        self.current_room.print_description()
 
-        # set display height and width to fit pip-boy art
-        display_h = 16
-        display_w = 67
+        if self.current_room.id == self.WORLD.fight['room']:  # if the player is in the 'Boss Fight' room
+            return self.FIGHT
 
-        # set the adjustment point (the point of off-set positioning for the text in relation to the display width)
-        adjustment = 60
+        File(os.path.join("art", "hud_box.txt")).print_utf8(TextColor.GREEN)  # display hud box
 
-        # set the insert point (point in line text is to be inserted. here it's 7 characters into display width)
-        insert_point = display_w - adjustment
+        command = game_commands.parse((yield from ask_command(":>")))  # receive and parse the player's command
+        # run the command's handler, which returns the next state
+        return (yield from self._game_handlers.get(command.name, self._unknown)(command))
 
-        # loop for range of the display height, starting at 0, using i as the index to sync all lists together
-        for i in range(0, display_h):
-            txt_length = len(text_list[i])  # store the length of current line of text to be used as an int 'txt_length'
+    # command handlers are generators like the states, each is passed the parsed command and returns the next state
+    # (main menu handlers return None to stay in the main menu)
 
-            # this statement does the heavy lifting of building the displayable pip-boy "center block" line by line,
-            # appending 'display_str' with each iteration.
-            # 1st: by appending the left most element of pip-boy art for that line 'left_list[i]'.
-            # 2nd: it appends blank spaces up to the insert_point with fill_whitespace().
-            # 3rd: 'text_list[i]' (current line of text to be displayed) is appended at its insert point.
-            # 4th: the remainder of blank space is calculated subtracting the 'txt_length' from the adjustment value
-            #      and that value is passed to the 'fill_whitespace()' function to be appended to display_str.
-            # 5th: the right most element of pip-boy art for that line 'right_list[i]' is appended to 'display_str'
-            # 6th: a newline char '\n' is appended as a string to complete this line of display_str.
-            display_str += (left_list[i] + self._fill_whitespace(insert_point) + text_list[i] +
-                            self._fill_whitespace(adjustment - txt_length) + right_list[i] + "\n")
+    def _start(self, command):
+        """
+        'start' command: shows the opening quote, then plays the intro.
+        """
+        clear_display()  # clear the console
+        display_box("\n                                  War. War Never Changes...\n", TextColor.GREEN)  # opening quote
+        yield from wait_for_enter()  # wait for player to press 'enter'
+        return self.INTRO
 
-        # once all lines of the pip-boy display are appended on top of each other the final display "block" is returned
-        return display_str
+    # noinspection PyUnusedLocal
+    def _menu_help(self, command):
+        """
+        'help' command in the main menu: shows the help screens, then the main menu again.
+        """
+        yield from help_screen()  # display help screen
+        yield from main_menu()  # display main menu again
 
-    def show(self):
+    # noinspection PyUnusedLocal
+    def _menu_unknown(self, command):
         """
-        Enters the pip-boy menu, displays current inventory and objectives, uses separate commands from main game.
+        Unrecognized command in the main menu.
         """
+        display_box("Command not recognized.\nType \'S\' to Start Game or type \'Q\' to Quit Game.", TextColor.GREEN)
+        yield from wait_for_enter()  # wait for player to press 'enter'
 
-        # create paths to pip-boy art files
-        pip_boy_top_file = os.path.join("art", "pip_boy_top.txt")
-        pip_boy_bottom_file = os.path.join("art", "pip_boy_bottom.txt")
-        pip_boy_left_file = os.path.join("art", "pip_boy_left.txt")
-        pip_boy_right_file = os.path.join("art", "pip_boy_right.txt")
+    # noinspection PyUnusedLocal
+    def _help(self, command):
+        """
+        'help' command: shows the help screens.
+        """
+        yield from help_screen()  # display help screen
+        return self.EXPLORE
 
-        # store pip-boy top and bottom art to variables
-        # raw pip-boy top file needs newline char appended for proper display
-        pb_top = File(pip_boy_top_file).to_str() + "\n"
-        pb_bottom = File(pip_boy_bottom_file).to_str()
+    def _move(self, command):
+        """
+        'move' command: moves to the room in the direction entered, if there is one.
+        """
+        room_id = self.current_room.exit(command.argument)  # room ID of the exit in the direction entered
+        if room_id != Room.NO_EXIT:  # if the player can move in the direction entered
+            self.current_room = self.rooms[room_id]  # set the current room to the room of the direction entered
+            player_input.record('move', direction=command.argument, room=self.current_room.name)
+        else:  # the player can't move in that direction
+            player_input.record('blocked', direction=command.argument, room=self.current_room.name)
+            screen.print('You can\'t move that way!')
+            yield from wait_for_enter()  # wait for player to press 'enter'
+        return self.EXPLORE
+
+    def _travel(self, command):
+        """
+        'travel' command: walks the shortest route to the room entered, never through the fight's room
+        (see 'RoutePlanner').
+        """
+        target = self.room_ids.get(command.argument)  # room entered, matched to the room's name (dining = Dining Hall)
+        if target is None:  # not a room of the vault
+            player_input.record('no_room', room=command.argument)
+            screen.print('There\'s no room called ' + command.argument + '!' if command.argument else
+                         'Travel where? Enter a room, e.g. travel ' + self.current_room.name.lower())
+        elif target == self.current_room.id:
+            screen.print('You\'re already in ' + self.current_room.name + '!')
+        else:
+            route = self.WORLD.routes().route(self.current_room.id, target)
+            if route is None:  # the room can only be reached through the fight's room
+                player_input.record('no_route', room=command.argument)
+                screen.print('There\'s no way to ' + command.argument + ' from here!')
+            else:
+                self.current_room = self.rooms[target]
+                player_input.record('travel', route=route, room=self.current_room.name)
+                screen.print('You travel ' + ', '.join(route) + ' to ' + self.current_room.name + '.')
+        yield from wait_for_enter()  # wait for player to press 'enter'
+        return self.EXPLORE
 
-        # create lists for left and right side pip-boy art lines (used to build the display)
-        pb_left_lines = File(pip_boy_left_file).to_list()
-        pb_right_lines = File(pip_boy_right_file).to_list()
+    def _get(self, command):
+        """
+        'get' command: picks up the item entered, if it is in the room.
+        """
+        item = command.argument  # item entered, matched to the item's name (fusion core = Fusion Core)
+        if item and self.current_room.has_item(item):  # if the 'current_room has' the item entered
+            self.inventory.add(self.current_room.item)  # add the item in current_room to the player inventory
+            self.current_room.item = None  # remove the item from the room
+            player_input.record('pickup', item=item, room=self.current_room.name)
+            screen.print('You Picked Up ' + item + '!')  # show the player what they picked up
+        else:  # this room has no item
+            player_input.record('no_item', item=item, room=self.current_room.name)
+            if item:  # display that the item entered isn't there
+                screen.print('There\'s no ' + item + ' to get here!')
+            else:  # no item was entered
+                screen.print('Get what? Enter an item, e.g. get ' + self.current_room.item.lower() if
+                             self.current_room.item else 'Get what? There\'s nothing to get here!')
+        yield from wait_for_enter()  # wait for player to press 'enter'
+        return self.EXPLORE
+
+    # noinspection PyUnusedLocal
+    def _main_menu(self, command):
+        """
+        'main menu' command: starts a new game from the main menu.
+        """
+        yield from ()  # no input needed
+        self.reset()  # start a new game from the main menu
+        return self.MENU
 
-        # set the pip-boy screen to 'objectives' / 'quest' screen
-        display_text = self._pip_boy_screen(self.objectives, "Quest")
+    # noinspection PyUnusedLocal
+    def _open_pip(self, command):
+        """
+        'pip' command: opens the Pip-Boy.
+        """
+        yield from ()  # no input needed
+        return self.PIP
 
-        # build the center display with the pip-boy screen as 'display_text' and store in 'pb_display' string
-        pb_display = self._build_display(pb_left_lines, pb_right_lines, display_text)
+    # noinspection PyUnusedLocal
+    def _quit(self, command):
+        """
+        'quit' command: ends the session.
+        """
+        yield from ()  # no input needed
+        self.result = 'quit'
+        return self.OVER  # close the program
 
-        clear_display()  # clear the display
-        display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
-        print(pb_top + pb_display + pb_bottom)  # print the pip-boy as appending top, center, and bottom string
+    def _save_name(self, command):
+        """
+        Finds the save name entered with a 'save' or 'load' command, 'quicksave' if none was entered.
+        :return: Save name, or None if it is not allowed or saves are turned off (the player has been told)
+        """
+        if not self.saves:  # e.g. a game server, where every player would share the saves folder
+            screen.print("Saved games are turned off for this game.")
+            yield from wait_for_enter()  # wait for player to press 'enter'
+            return None
+        name = command.argument.lower() or 'quicksave'
+        if Snapshot.NAME.fullmatch(name):
+            return name
+        screen.print("Save names can only use letters, numbers, \'-\' and \'_\'.")
+        yield from wait_for_enter()  # wait for player to press 'enter'
+        return None
+
+    def _save(self, command):
+        """
+        'save' command: saves the game.
+        """
+        name = yield from self._save_name(command)
+        if name is not None:
+            try:
+                self.snapshot().save(name)
+                player_input.record('save', name=name, room=self.current_room.name)
+                screen.print("Game saved as \'" + name + "\'.")
+            except OSError as error:
+                screen.print("The game could not be saved: " + str(error))
+            yield from wait_for_enter()  # wait for player to press 'enter'
+        return self.EXPLORE
+
+    def _load(self, command):
+        """
+        'load' command: resumes a saved game, from the main menu or the vault. No intro is played.
+        """
+        name = yield from self._save_name(command)
+        if name is None:
+            return None if self.state == self.MENU else self.EXPLORE
+
+        try:
+            snapshot = Snapshot.load(name)
+        except OSError:  # no such save
+            snapshot = None
+            screen.print("There is no saved game \'" + name + "\'.")
+        else:
+            if snapshot is None or not self.restore(snapshot):
+                snapshot = None
+                screen.print("The saved game \'" + name + "\' is damaged.")
+        if snapshot is None:
+            yield from wait_for_enter()  # wait for player to press 'enter'
+            return None if self.state == self.MENU else self.EXPLORE
+
+        player_input.record('load', name=name, room=self.current_room.name)
+        return self.EXPLORE
+
+    def _unknown(self, command):
+        """
+        Unrecognized command in the vault.
+        """
+        player_input.record('unknown', command=command.text)
+        screen.print("The command \'" + command.text + "\' is not recognized")  # print that command is unknown
+        yield from wait_for_enter()  # wait for player to press 'enter'
+        return self.EXPLORE
 
-        while True:  # loop constantly until broken
-            # receives player input, converts input string to lowercase(for easier processing),
-            # and stores in 'cmd' variable
-            cmd = input("\n---------------------------------------:>").lower()
+    def _pip(self):
+        """
+        Pip-Boy state: shows the Pip-Boy until the player closes it.
+        :return: Next state
+        """
+        yield from self.pip.show(self.current_room.id)  # open the Pip-Boy
+        return self.EXPLORE
 
-            if cmd == "c":  # player closes the pip-boy
-                clear_display()  # clear the display
-                break  # break the loop
-            elif cmd == "q":  # player selected the 'quest' screen
-                # set the pip-boy screen to 'objectives' / 'quest' screen
-                display_text = self._pip_boy_screen(self.objectives, "Quest")
-                # build the center display
-                pb_display = self._build_display(pb_left_lines, pb_right_lines, display_text)
-                clear_display()  # clear the display
-                display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
-                print(pb_top + pb_display + pb_bottom)  # print the pip-boy as appending top, center, and bottom string
-            elif cmd == "i":  # player selected the 'item' screen
-                # set the pip-boy screen to 'item' screen
-                display_text = self._pip_boy_screen(self.inventory, "Items")
-                # build the center display
-                pb_display = self._build_display(pb_left_lines, pb_right_lines, display_text)
-                clear_display()  # clear the display
-                display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
-                print(pb_top + pb_display + pb_bottom)  # print the pip-boy as appending top, center, and bottom string
-            else:
-                print("Pip-Boy Command \'" + cmd +
-                      "\' was not recognized.\nUse \'i\' for Items, \'q\' for Quest, or \'c\' to Close Pip-Boy.")
-                input("Press Enter to continue...")  # wait for player to press 'enter'
-                clear_display()  # clear the display
-                display_box('\n' + random_quote() + '\n', TextColor.GREEN)  # display random quote above pip-boy
-                print(pb_top + pb_display + pb_bottom)  # print the pip-boy as appending top, center, and bottom string
+    def _fight(self):
+        """
+        Fight state: plays the fight with Cook-Cook. A win ends the session, a loss starts a new game
+        (or ends the session if it does not restart on a loss).
+        :return: Next state
+        """
+        fight = self.WORLD.fight_table(screen.box_width())  # the fight drawn to fit the player's screen
+        if (yield from boss_fight_sequence(self.inventory, fight)):  # if the player has won
+            self.result = 'win'
+            return self.OVER  # close the program
 
+        # else the player has lost
+        if not self.restart_on_loss:  # this session ends at the first loss
+            self.result = 'loss'
+            return self.OVER
+        self.reset()  # start a new game from the main menu
+        return self.MENU
 
-class RoomOperation:
+
+class ContextProxy:
     """
-    Class handles all major room operations.
+    Stands in for an object that can be different in each context, such as the screen and player input.
+    The object is held in a context variable, and every attribute used through the proxy is looked up on the object
+    of the context running right now. Each asyncio task runs in its own context, so a game server's connections can
+    each use their own screen and input through the same module names, and code that keeps a reference to the proxy
+    always reaches the object of the context it runs in.
 
     Attributes
     ----------
-    room = Room dictionary to be operated on.
+    _var = Context variable holding the object
 
     Methods
     ----------
-    has_item(item)
-        Check if the room has any item, or specific passed item.
-    can_move(direction)
-        Check if the player can move in a given direction from the room.
-    print_description()
-        Prints the rooms description.
+    use(value)
+        Makes an object the one used through the proxy, in the running context.
+    current()
+        Returns the object used through the proxy in the running context.
     """
-    def __init__(self, room):
-        """
-        Constructs necessary room dictionary for operations object.
-        :param room: Room dictionary for operations.
-        """
-        self.room = room  # set this room to passed room
+    __slots__ = ('_var',)
 
-    def has_item(self, item=''):
+    def __init__(self, name, value):
         """
-        Checks if the room has ANY item, optionally can check for a specific item (if item is passed).
-        :param item: Optional: Item string to be found
-        :return: Boolean if item was found
+        Constructs a proxy for an object.
+        :param name: Name of the context variable
+        :type name: str
+        :param value: Object used in every context that has not set its own
         """
+        object.__setattr__(self, '_var', contextvars.ContextVar(name, default=value))
 
-        for key, value in self.room.items():  # loop through room items for 'key's and 'value's
-            if item != '':  # if an item was passed to method
-                if (key == 'Item') and (value == item):  # if 'key' 'Item' is found and its value matches passed item
-                    return True  # that item was found in the room
-            else:  # no item was passed to function
-                if (key == 'Item') and (value != ''):  # if 'key' 'Item' is found and its value is not empty
-                    return True  # an item was found in the room
-
-        return False  # no valid item entry was found
-
-    def can_move(self, direction):
+    def use(self, value):
         """
-        Checks if the player can move in a specified direction in the room.
-        :param direction: Cardinal direction pointer
-        :type direction: str
-        :return: Boolean if player can move
+        Makes an object the one used through the proxy in the running context, and in contexts copied from it later.
+        :param value: Object to be used
         """
+        self._var.set(value)
 
-        for key in self.room:  # loop through 'room' dictionary for it's 'key's
-            if key == direction:  # if the 'key' matches passed 'direction'
-                return True  # a valid direction to move was found
-        return False  # no valid direction to move was found
-
-    def print_description(self):
+    def current(self):
         """
-        Prints the line art and description for the room,
-        adjusts the description depending on the room state.
+        Finds the object used through the proxy in the running context.
+        :return: Object used
         """
-        File(self.room['Art']).print_utf8(TextColor.YELLOW)  # display the line art for this room
+        return self._var.get()
 
-        if self.has_item():  # checks if this room has an item in it
-            # if the room has an item, display the whole file (includes the final item description)
-            display_box(File(self.room['Description']).to_str(), TextColor.GREEN)
-        else:  # else / there is no item in the room
-            description_str = ''  # set a new description string variable with a blank string
-            # store the lines of the description file in a list 'description_lines'
-            description_lines = File(self.room['Description']).to_str().split('\n')
-            description_lines.pop()  # remove the bottom three lines (item description element of file)
-            description_lines.pop()  # item description element is always formatted as
-            description_lines.pop()  # the last three lines of the room description file
-            for i in range(
-                    len(description_lines)):  # loop for remaining elements of description_lines, with 'i' as index
-                description_str += description_lines[
-                                       i] + '\n'  # build description string line by line, appending '\n' char
+    def __getattr__(self, name):
+        return getattr(self._var.get(), name)
 
-            # display the adjusted description string without the item description element
-            display_box(description_str, TextColor.GREEN)
+    def __setattr__(self, name, value):
+        setattr(self._var.get(), name, value)
 
 
 # ------------------------------------------------/END Classes----------------------------------------------------
 # -------------------------------------------Variables using a Global Scope---------------------------------------
-# create booleans for if the player has the helmet, armor, fusion core, shotgun, and ammo
-# these 'has item' bools are initialized here for a program wide scope, then globalized in function 'objective_checker'
-# for updating as objectives are processed
-has_helmet = False
-has_armor = False
-has_fusion_core = False
-has_shotgun = False
-has_ammo = False
-has_stimpak = False
-has_vault_key = False
-has_gunslinger = False
+# the asset cache is shared by every File object for the life of the program
+asset_cache = AssetCache()
+
+# display boxes laid out for each width, shared by every screen (see 'format_box()')
+box_layout = BoxLayout()
+
+# all game output is drawn through the screen renderer, each game server connection uses its own
+screen = ContextProxy('screen', ScreenRenderer())
+
+# all game input is read through the player input, replaced with a ScriptedInput when playing headless,
+# each game server connection is its own input
+player_input = ContextProxy('player_input', PlayerInput())
+
+# phase profiler, only created when profiling is enabled (see 'PhaseProfiler')
+profiler = None
+
+# definition of the vault played, 'world.json' unless another is given (see 'World')
+world_path = World.NAME
+
+# Fallout quotes for the Pip-Boy banner, loaded by 'main()' (see 'random_quote()')
+quote_bank = None
+
+# kinds of input a session can ask for, see 'ask_command()' and 'wait_for_enter()'
+COMMAND = 'command'
+PAUSE = 'pause'
+
+# commands of the main menu, the vault, and the Pip-Boy as (name, aliases) or (name, aliases, argument words)
+# any unambiguous prefix of a name, alias, or argument word also matches (see 'CommandSet')
+menu_commands = CommandSet([('start', ('s',)), ('load', (), ()), ('quit', ('q',)), ('help', ('h',))])
+game_commands = CommandSet([('help', ('h',)), ('move', (), Room.DIRECTIONS), ('get', (), Inventory.ITEMS),
+                            ('travel', ('t',), ()), ('main menu', ('mm',)), ('pip', ('p',)), ('save', (), ()),
+                            ('load', (), ()), ('quit', ('q',))])
+pip_commands = CommandSet([('items', ('i',)), ('quest', ('q',)), ('hint', ('h',)), ('close', ('c',))])
 # ---------------------------------------/END Variables using a Global Scope--------------------------------------
 
 
+def format_box(txt, color_code, width=None):
+    """
+    Formats a display box that contains the passed string as the given passed color, wrapped to fit the screen.
+    :param txt: Text to be displayed
+    :type txt: str
+    :param color_code: Color of display to be applied
+    :type color_code: str
+    :param width: Optional: Width of the box, the screen's box width if none is passed
+    :type width: int
+    :return: List of display box lines, encoded as color spans (shared, not to be changed)
+    """
+    return box_layout.box(txt, color_code, screen.box_width() if width is None else width)
+
+
 def display_box(txt, color_code):
     """
     Prints a display box that contains the passed string as the given passed color.
@@ -404,35 +3914,62 @@ def display_box(txt, color_code):
     :param color_code: Color of display to be applied
     :type color_code: str
     """
-    color = TextColor(color_code)
+    screen.print_lines(format_box(txt, color_code))  # prints appended "box" around 'txt'
+
+
+def ask_command(prompt):
+    """
+    Asks for a command. Used as 'cmd = yield from ask_command(prompt)' inside the game's generator functions,
+    the request is passed up to whatever is driving the session (see 'play()') and the command is sent back.
+    :param prompt: Prompt shown before the player's input
+    :type prompt: str
+    :return: Command entered
+    """
+    command = yield COMMAND, prompt
+    asset_cache.tick()  # a new turn, files edited since the last one are picked up
+    return command
+
+
+def wait_for_enter(prompt="Press Enter to continue..."):
+    """
+    Waits for the player to press 'enter'. Used as 'yield from wait_for_enter()' inside the game's generator
+    functions, the same way as 'ask_command()'.
+    :param prompt: Prompt shown while waiting
+    :type prompt: str
+    """
+    yield PAUSE, prompt
+    asset_cache.tick()  # a new turn, files edited since the last one are picked up
 
-    top = "------------------------------------------------------------------------------------------------\n"
-    bottom = "\n------------------------------------------------------------------------------------------------"
-    if color_code != "":  # if color code is not blank
-        print(color.format_str(top + txt + bottom))  # prints appended "box" around 'txt' through as_color
-    else:  # no valid color code
-        print(top + txt + bottom)  # prints appended "box" around 'txt' string on top and bottom
+
+def clear_display(keep=0):
+    """
+    Clears the display by starting a new frame on the screen renderer.
+    No 'cls' or 'clear' process is started, the renderer only redraws the lines that changed.
+    :param keep: Optional: Number of lines at the top of the display to keep (see 'ScreenRenderer.clear()')
+    :type keep: int
+    """
+    screen.clear(keep)  # start a new frame
 
 
-def clear_display():
+def enable_ansi_terminal():
     """
-    Clears the display depending on operating system.
-    Passes 'cls' or 'clear through 'os.system' effectively speaking directly to command prompt or terminal.
-    In the event no operating system can be identified, 25 blank lines are printed
-    (only functions properly when ran through command prompt or terminal)
+    Turns on ANSI escape sequence processing for the Windows console, which the colors and screen renderer rely on.
+    Other operating systems' terminals process escape sequences already, so nothing is done for them.
     """
-    if os.name == 'nt':  # if the operating system is windows based
-        os.system('cls')  # send cls to command prompt
-    elif os.name == 'posix':  # if the operating system is posix based (Mac-OS, Linux, Etc..)
-        os.system('clear')  # send clear to terminal
-    else:   # unable to identify operating system
-        for i in range(25):
-            print()  # print 25 blank lines
+    if os.name != 'nt':  # only the Windows console needs to be switched over
+        return
+
+    import ctypes  # windows only, imported here so other operating systems never load it
+    kernel32 = ctypes.windll.kernel32
+    handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+    mode = ctypes.c_uint32()
+    if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):  # output is a real console
+        kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
 
 
 def main_menu():
     """
-    Displays the main menu roll sequence.
+    Displays the main menu roll sequence. Generator, yields requests for input (see 'ask_command()').
     """
 
     welcome_art = os.path.join("art", "welcome.txt")  # set path to welcome line art
@@ -443,7 +3980,7 @@ def main_menu():
 
     display_box("Maximize console window to see the full game ^^^^^^^^^^^", TextColor.GREEN)  # display instruction box
 
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    yield from wait_for_enter()  # wait for player to press 'enter'
 
     clear_display()  # clear the console
 
@@ -457,6 +3994,7 @@ def main_menu():
 def play_intro():
     """
     Plays the into section, tells backstory and setup for entry into the vault.
+    Generator, yields requests for input (see 'ask_command()').
     """
 
     # set paths to intro text files
@@ -469,25 +4007,26 @@ def play_intro():
 
     clear_display()  # clear the console
     File(intro_txt).print_utf8(TextColor.GREEN)  # display first part of intro file
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    yield from wait_for_enter()  # wait for player to press 'enter'
     clear_display()  # clear the console
     File(intro_two_txt).print_utf8(TextColor.GREEN)  # display second part of intro file
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    yield from wait_for_enter()  # wait for player to press 'enter'
     clear_display()  # clear the console
     File(intro_three_txt).print_utf8(TextColor.GREEN)  # display third part of intro file
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    yield from wait_for_enter()  # wait for player to press 'enter'
     clear_display()  # clear the console
     File(intro_four_txt).print_utf8(TextColor.GREEN)  # display fourth part of intro file
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    yield from wait_for_enter()  # wait for player to press 'enter'
     clear_display()  # clear the console
     File(vault_door_art).print_utf8(TextColor.YELLOW)  # display the vault door line art as yellow
     display_box("You see the vault through a dust cloud..\nYou approach the door.. Open it?", TextColor.YELLOW)
-    input("Press Enter to Open The Door..")  # wait for player to press 'enter'
+    yield from wait_for_enter("Press Enter to Open The Door..")  # wait for player to press 'enter'
 
 
 def help_screen():
     """
     Displays the Main Game help screen and Pip-Boy help screen waits for player to press enter before clearing screen.
+    Generator, yields requests for input (see 'ask_command()').
     """
 
     help_main_txt = os.path.join("text", "help_main.txt")  # path to main help file
@@ -495,410 +4034,252 @@ def help_screen():
 
     clear_display()  # clear the console
     File(help_main_txt).print_utf8(TextColor.GREEN)  # display main help file
-    input("Press Enter for Pip-Boy Controls")  # wait for player to press 'enter'
+    yield from wait_for_enter("Press Enter for Pip-Boy Controls")  # wait for player to press 'enter'
     clear_display()  # clear the console
     File(help_pip_txt).print_utf8(TextColor.GREEN)  # display pip-boy help file
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    yield from wait_for_enter()  # wait for player to press 'enter'
     clear_display()  # clear the console
 
 
 def random_quote():
     """
-    Generates a random Fallout quote, formats for display and returns it as a string.
+    Picks a random Fallout quote from the quote bank, loading the bank the first time.
     :return: Random formatted fallout quote
     """
+    global quote_bank
 
-    quotes_txt = os.path.join("text", "quotes.txt")  # set path to quotes file
-    all_quotes = File(quotes_txt).to_list()  # read all quotes into a list
-    rand_quote_index = random.randrange(0, len(all_quotes))  # generate a random index between 0 and list length
-    quote_str = all_quotes[rand_quote_index]  # store the random quote in its own string
-    final_q_str = ''  # initialize a string for final formatted quote
-    last_found_i = 0  # initialize an int for last found index
-
-    # logic and looping ensures quote length fits within display properly
-    if len(quote_str) > 96:  # if the quote length exceeds display
-        # loop through the quote by char, checking for acceptable breakpoint for first line
-        for i in range(len(quote_str)):
-            # if the index is greater than 90 and current char is a blank space
-            if i > 90 and quote_str[i] == ' ':  # an acceptable breakpoint was found
-                final_q_str += quote_str[i] + '\n'  # append the char and newline to final string
-                last_found_i = i  # set last found index as current index
-                break  # break the loop, the first line is complete
-            else:  # continue building line
-                final_q_str += quote_str[i]  # append the current char to final string
-
-        if last_found_i != 0:  # if the last found index is caught, confirming before slicing
-            final_q_str += quote_str[last_found_i:]  # append remainder of quote using slice from found index
-    else:  # quote fits within display
-        final_q_str = quote_str  # set final string as quote string
-
-    quote_and_author = final_q_str.split(' -')  # separate the quote and author using .split()
-
-    return quote_and_author[0] + '\n    -' + quote_and_author[1]  # return the quote, a newline, then the author
-
-
-def pop_and_replace_objective(objective_list, index, rep_str):
-    """
-    Removes and replaces an element of given list.
-    :param objective_list: Objectives to be altered
-    :type objective_list: list
-    :param index: Index for position in list
-    :type index: int
-    :param rep_str: Objective line to replace previous line
-    :type rep_str: str
-    """
-
-    objective_list.pop(index)  # remove current list entry at current iteration point using '.pop(index)'
-    objective_list.insert(index, rep_str)  # replace said element by inserting 'rep_str' at current index
-
-
-def update_objective_line(obj_str, objective_list, index):
-    """
-    Marks a players objective line as complete.
-    :param obj_str: Objective line entry to be marked complete
-    :type obj_str: str
-    :param objective_list: Player's objectives
-    :type objective_list: list
-    :param index: Index for position in list
-    :type index: int
-    """
-
-    if obj_str in objective_list[index]:  # confirm that objective line entry matches 'objective_list' at index
-        checked_obj = obj_str.replace('()', '(*)')  # replace unchecked box with checked box
-        pop_and_replace_objective(objective_list, index, checked_obj)  # replace objective line with checked line
-
-
-def objective_checker(player_items, objective_list):
-    """
-    Checks and updates the players objectives / quest. Iterates through all items and objectives,
-    marks and updates all objective lines.
-    :param player_items: Player's item inventory
-    :type player_items: list
-    :param objective_list: Player's original objectives
-    :type objective_list: list
-    :return: Updated objectives list
-    """
-
-    # globalize scope of 'has item' bools, to make external values changeable within this function
-    global has_helmet
-    global has_armor
-    global has_fusion_core
-    global has_shotgun
-    global has_ammo
-    global has_stimpak
-    global has_vault_key
-    global has_gunslinger
-
-    # these nested loops check every player item against every objective and adjusts the list as needed
-    for item in player_items:  # loop through the player items for each item
-        for i in range(len(objective_list)):  # loop through all objectives, using 'i' as an index
-            # this first set of branching statements checks for items needed for "singular objectives"
-            # ( only one item is needed to "check off objective" e.g. -Find a Stimpak () = -Find a Stimpak (*) )
-            if item == 'Stimpak':  # if the item 'Stimpak' is found
-                # check if 'Stimpak' is in objective line for current objective_list iteration
-                update_objective_line('-Find a Stimpak ()', objective_list, i)
-                has_stimpak = True  # set the bool, showing that the player has the item 'Stimpak'
-            elif item == 'Gunslinger':  # else if the item 'Perk: Gunslinger' is found
-                # check if 'Perk: Gunslinger' is in objective line for current objective_list iteration
-                update_objective_line('-Level Up and Find Gunslinger Perk ()', objective_list, i)
-                has_gunslinger = True  # set the bool, showing that the player has the item 'Perk: Gunslinger'
-            elif item == 'Vault Key':  # else if the item 'Vault Key' is found
-                # check if 'Vault Key' is in objective line for current objective_list iteration
-                update_objective_line('-Find the Vault Key to Escape ()', objective_list, i)
-                has_vault_key = True  # set the bool, showing that the player has the item 'Vault Key'
-            # the following statements check for items that are one of "multiple objectives" (needs multiple items)
-            # these objectives are made blank when item is found as opposed to "updating" the line by "checking off"
-            elif item == "Helmet":  # else if the item 'Helmet' is found
-                # check if 'Helmet' is in objective line for current objective_list iteration
-                if "> Helmet" in objective_list[i]:
-                    has_helmet = True  # set the bool, showing that the player has the item 'Helmet'
-                    pop_and_replace_objective(objective_list, i, '')  # replace with a blank string
-            elif item == 'Power Armor':  # else if the item 'Power Armor' is found
-                # check if 'Power Armor' is in objective line for current objective_list iteration
-                if '> Power Armor' in objective_list[i]:
-                    has_armor = True  # set the bool, showing that the player has the item 'Power Armor'
-                    pop_and_replace_objective(objective_list, i, '')  # replace with a blank string
-            elif item == 'Fusion Core':  # else if the item 'Fusion Core' is found
-                # check if 'Fusion Core' is in objective line for current objective_list iteration
-                if '> Fusion Core' in objective_list[i]:
-                    has_fusion_core = True  # set the bool, showing that the player has the item 'Fusion Core'
-                    pop_and_replace_objective(objective_list, i, '')  # replace with a blank string
-            elif item == 'Combat Shotgun':  # else if the item 'Combat Shotgun' is found
-                # check if 'Combat Shotgun' is in objective line for current objective_list iteration
-                if '> Find Combat Shotgun' in objective_list[i]:
-                    has_shotgun = True  # set the bool, showing that the player has the item 'Combat Shotgun'
-                    pop_and_replace_objective(objective_list, i, '')  # replace with a blank string
-            elif item == 'Ammo':  # else if the item 'Ammo' is found
-                # check if 'Find Ammo' is in objective line for current objective_list iteration
-                if '> Find Ammo' in objective_list[i]:
-                    has_ammo = True  # set the bool, showing that the player has the item 'Ammo'
-                    pop_and_replace_objective(objective_list, i, '')  # replace with a blank string
-
-    # after iterating through all items and objectives, check if player has all items needed for "multiple objectives"
-    # the "multiple objectives" parent tree (main objective line with check box (*)) is indexed at its fixed position
-    # index 'objective_list[0]' = -Find Working Set of Power Armor,
-    # objective_list[5] = -Find Weapon to Deal with Cook-Cook
-    if has_helmet and has_armor and has_fusion_core:  # if the user has all items for complete power armor set
-        if '*' not in objective_list[0]:  # if this objective is not already "checked off"
-            pop_and_replace_objective(objective_list, 0, '-Find Working Set of Power Armor (*)')
-
-    if has_ammo and has_shotgun:  # if the user has ammo and shotgun (functioning weapon set)
-        if '*' not in objective_list[5]:  # if this objective is not already "checked off"
-            pop_and_replace_objective(objective_list, 5, '-Find Weapon to Deal with Cook Cook (*)')
-
-    return objective_list  # return the updated list of objective
-
-
-def next_fight_step(txt, art, art_color):
-    """
-    Performs a given step for the final fight sequence. Displays art, a message, and prompts player to continue.
-    :param txt: Text to be displayed
-    :type txt: str
-    :param art: Path of art to be displayed
-    :type art: str
-    :param art_color: Color of art to be displayed
-    :type art_color: str
-    """
-    clear_display()  # clear the console
-    File(art).print_utf8(art_color)  # display line art
-    display_box(txt, TextColor.GREEN)  # display text in display box
-    input("Press Enter to continue...")  # wait for player to press 'enter'
+    if quote_bank is None:  # the bank is normally loaded by 'main()', before the game starts
+        quote_bank = QuoteBank(os.path.join("text", "quotes.txt"))
+    return quote_bank.pick()
 
 
-def boss_fight_sequence(items):
+def boss_fight_sequence(items, fight):
     """
     Plays 'boss fight' sequence, including all logic for if the player wins or loses.
-    Displays 'fight' progressively, depending on the players items.
+    The outcome for the player's items is looked up in the fight's outcome table, and its screens are played in
+    order, each adding its new lines to the screen before it (see 'FightTable').
+    Generator, yields requests for input (see 'ask_command()'), returns the outcome when the fight is over.
     :param items: Inventory of player's items.
-    :type items: list
+    :type items: Inventory
+    :param fight: Outcome table of the fight
+    :type fight: FightTable
     :return: If the player has won or lost
     """
-    # set paths to line art files
-    success_art = os.path.join("art", "vault_boy_thumb.txt")
-    success_txt = os.path.join("text", "success.txt")
-    cook_cook = os.path.join("art", "cook-cook.txt")
-
-    input("Press Enter to Turn and Face Cook-Cook...")  # wait for player to press 'enter'
-
-    clear_display()  # clear the console
-
-    File(cook_cook).print_utf8(TextColor.YELLOW)  # display Cook-Cook Art
+    yield from wait_for_enter(fight.approach)  # wait for player to press 'enter'
 
-    if len(items) == 8:  # if the player has all the items (inventory is correct length)
-        display_box("Cook-Cook: \"Ooooo look who came prepared! Too bad its not gunna help you!\"", TextColor.GREEN)
-        input("Press Enter to shoot!")  # wait for player to press 'enter' to 'kill' cook-cook
-        File(success_txt).print_utf8(TextColor.GREEN)  # display success message
-        input("Press Enter to continue...")  # wait for player to press 'enter'
-        clear_display()  # clear the console
-        File(success_art).print_utf8(TextColor.GREEN)  # display success art
-        display_box("Congratulations! You beat FalloutCMD!\nI hope you enjoyed it as much as I enjoyed making it!",
-                    TextColor.GREEN)
-        input("Press Enter to continue...")  # wait for player to press 'enter'
-        return True
-    else:  # else player does not have all items needed to win ('fight' will display depending on players items)
-        display_box("Cook-Cook: \"Fresh Meat! I'm eating good tonight!\"", TextColor.GREEN)
-        input("Press Enter to Fight!")  # wait for player to press 'enter' to 'fight' cook-cook
+    won, screens = fight.outcome(items.mask)  # one lookup for the whole fight
+    for keep, lines, prompt in screens:
+        if keep is not None:  # start a new frame, keeping the lines it shares with the last one
+            clear_display(keep)
+        screen.print_lines(lines)  # draw only the lines this screen adds
+        yield from wait_for_enter(prompt)  # wait for player to press 'enter'
+    return won
 
-        # condense logic for if the player has complete sets of armor and weapons
-        has_full_power_armor = has_armor and has_fusion_core and has_helmet  # player has full set of armor
-        has_firepower = has_shotgun and has_ammo and has_gunslinger  # player has full weapon 'set'
 
-        fight_log = ""  # create blank string to hold text of the 'fight'
-        game_over = os.path.join('art', 'game_over.txt')  # set the path to game over line art
+def play(session):
+    """
+    Drives a session with the player's input until the game is over, then ends the program with the game's result.
+    The session asks for input by yielding (kind, prompt) requests, which are answered from 'player_input'.
+    :param session: Session to be played
+    :type session: Session
+    """
+    game = session.run()  # start the session's state machine
+    try:
+        request = next(game)  # run until the session first asks for input
+        while True:  # answer each request until the session ends
+            kind, prompt = request
+            if kind == PAUSE:  # session is waiting for the player to press 'enter'
+                player_input.pause(prompt)
+                request = game.send('')
+            else:  # session is waiting for a command
+                request = game.send(player_input.command(prompt))
+    except StopIteration:  # the session's state machine has finished
+        pass
+
+    player_input.record('over', room=session.current_room.name, items=session.inventory.mask)
+    player_input.finish(session.result)  # end the program
+
+
+def verify_assets():
+    """
+    Checks every asset in the manifest once before the game starts, and reports every missing or damaged asset
+    together. Checked assets are left loaded, so 'File' uses them without checking the disk again.
+    Without a manifest, each asset is only checked when it is first used.
+    """
+    try:
+        manifest = AssetManifest.load(asset_cache)
+        problems = manifest.verify(asset_cache) if manifest is not None else []
+    except ValueError as error:  # the manifest itself is damaged
+        problems = [str(error)]
 
-        if has_full_power_armor:  # if the user has a full set of power armor
-            fight_log += "Cook-Cook fires his flame thrower, but you can take the damage for now...\n"
-        else:  # player has not found a full set
-            fight_log += "Cook-Cook fires his flame thrower, you're getting burned up quick!\n"
+    if problems:  # report every problem at once
+        clear_display()  # clear the display
+        err_str = "The game files are missing or damaged:\n"  # build error message string
+        err_str += "".join("    " + problem + "\n" for problem in problems)
+        err_str += "Please ensure that this script is in the proper \'FalloutCMD\' directory.\n"
+        err_str += "For proper operation keep \'FalloutCMD.zip\' next to this script, or unpack it and run script "
+        err_str += "from its root directory."
+        display_box(err_str, TextColor.RED)  # display error message and instructions
+        player_input.pause()  # wait for player to press 'enter'
+        player_input.finish('error')  # exit the script
 
-        next_fight_step(fight_log, cook_cook, TextColor.YELLOW)  # run next fight step
 
-        if has_stimpak:  # if the player has a stimpak
-            fight_log += "You took some damage but the Stimpak fixes you right up!\n"
-        else:  # the player does not have a stimpak
-            fight_log += "You take some damage but you have nothing to heal you. You don't have long...\n"
+def world_key():
+    """
+    Identifies the vault played by a hash of its definition, so a replay can tell if it is played in the vault
+    it was recorded in.
+    :return: Start of the SHA-256 of the vault's definition, or '' if it cannot be read
+    """
+    try:
+        return hashlib.sha256(asset_cache.read(world_path).encode('UTF-8')).hexdigest()[:16]
+    except OSError:  # reported when the vault is loaded
+        return ''
 
-        next_fight_step(fight_log, cook_cook, TextColor.YELLOW)  # run next fight step
 
-        if has_firepower:  # if the player has a full weapon set
-            fight_log += "You got Cook-Cook in your sights, you land your shots but he keeps fighting...\n"
-        else:  # player does not a have a full weapon set
-            fight_log += "Cook-Cook: \"What's the matter kid? You got no firepower?\"\n"
-            fight_log += "You can't cause enough damage, its not looking good...\n"
+def preload_assets():
+    """
+    Loads everything sessions share before any player connects: the quotes, the compiled rooms with each
+    room's drawings, and the Pip-Boy border. Missing or broken assets are reported when the server starts,
+    not when the first player reaches them.
+    """
+    global quote_bank
 
-        next_fight_step(fight_log, cook_cook, TextColor.YELLOW)  # run next fight step
+    verify_assets()
+    quote_bank = QuoteBank(os.path.join("text", "quotes.txt"))
+    for room in Session.world().rooms:  # draw each room with and without its item
+        room.print_description()
+        taken = room.copy()
+        taken.item = None
+        taken.print_description()
+    Session.world().fight_table(screen.box_width())  # draw every outcome of the fight
+    PipBoy._load_chrome()
+    screen.clear()  # the drawings were only made to be kept, drop them from the server's screen
 
-        fight_log += "You tried but you didn't have enough to make is out in one piece..\n"
-        fight_log += "Cook-Cook: \"Another chump from the wastes, never stood a chance!\"\n"
 
-        if has_vault_key:  # if the player has the vault key
-            fight_log += "You had the Vault Key. You could have escaped.. Too bad you didn't make it.\n"
-        else:  # the player does not have the key
-            fight_log += "You never found the Vault Key. Even if you survived, you would have never made it out..\n"
+async def _serve(host, port):
+    """
+    Accepts connections until cancelled, each plays its own game.
+    :param host: Address to listen on
+    :type host: str
+    :param port: Port to listen on
+    :type port: int
+    """
+    server = await asyncio.start_server(lambda reader, writer: Connection(reader, writer).play(), host, port,
+                                        backlog=1024)
+    address = server.sockets[0].getsockname()
+    print("FalloutCMD server listening on " + str(address[0]) + ":" + str(address[1]), flush=True)
+    async with server:
+        await server.serve_forever()
 
-        next_fight_step(fight_log, game_over, TextColor.GREEN)  # run final fight step
 
-        return False
+def serve(host, port):
+    """
+    Runs the game server, hosting a game for every player that connects with telnet (or any TCP client),
+    until it is interrupted with ctrl-c.
+    :param host: Address to listen on, '127.0.0.1' for local players only
+    :type host: str
+    :param port: Port to listen on
+    :type port: int
+    """
+    preload_assets()
+    screen.enabled = False  # the server's own terminal shows no game
+    try:
+        asyncio.run(_serve(host, port))
+    except KeyboardInterrupt:  # server stopped
+        pass
 
 
 def main():
     """
     Main program function.
-    Contains main menu loop and gameplay loop in sequence.
-    Assigns all rooms, inventory, objectives for current gameplay iteration.
-    Can call self on 'main menu' command to restart sequence.
-    """
-
-    main_menu()  # display main menu
-
-    # ----------------------------------------------MAIN MENU LOOP------------------------------------------------------
-    while True:  # runs a continuous menu loop
-        # receives player input, converts input string to lowercase(for easier processing), and stores in 'cmd' variable
-        cmd = input(":>").lower()
-
-        if cmd == "s":  # if the player entered the start command
-            clear_display()  # clear the console
-            # display opening quote
-            display_box("\n                                  War. War Never Changes...\n", TextColor.GREEN)
-            input("Press Enter to continue...")  # wait for player to press 'enter'
-            break  # break menu loop
-        elif ("quit" in cmd) or cmd == "q":  # else if the player entered the quit command
-            sys.exit(0)  # close the game
-        elif cmd == "help" or cmd == "h":  # else if the player entered the help command
-            help_screen()  # display help screen
-            main_menu()  # display main menu again
-        else:  # else the command is not recognized
-            display_box("Command not recognized.\nType \'S\' to Start Game or type \'Q\' to Quit Game.",
-                        TextColor.GREEN)
-            input("Press Enter to continue...")  # wait for player to press 'enter'
-    # -----------------------------------------/END MAIN MENU LOOP------------------------------------------------------
-
-    play_intro()  # play the intro sequence
-
-    # -------------------------------------------Setup Operations-------------------------------------------------------
-    # create nested dictionaries for all rooms
-    # they will all have a 'Name', a cardinal direction pointer e.g. North='Recreation Area', 'Art' path to line art,
-    # and a 'Description' path to text description file. some will have Items.
-    rooms = {
-        'Vault Entrance': dict(Name='Vault Entrance', North='Recreation Area',
-                               Art=os.path.join('art', 'vault_entrance.txt'),
-                               Description=os.path.join('text', 'vault_entrance_desc.txt')),
-        'Recreation Area': dict(Name='Recreation Area', North='Armory', East='Maintenance Bay', West='Living Quarters',
-                                South='Vault Entrance', Art=os.path.join('art', 'rec_area.txt'),
-                                Description=os.path.join('text', 'recreation_area_desc.txt')),
-
-        'Living Quarters': dict(Name='Living Quarters', North='Dining Hall', East='Recreation Area', Item='Vault Key',
-                                Art=os.path.join('art', 'living_quarters.txt'),
-                                Description=os.path.join('text', 'living_quarters_desc.txt')),
-        'Dining Hall': dict(Name='Dining Hall', West='Medical Bay', East='Class Room', South='Living Quarters',
-                            Item='Helmet', Art=os.path.join('art', 'dining_hall.txt'),
-                            Description=os.path.join('text', 'dining_hall_desc.txt')),
-        'Medical Bay': dict(Name='Medical Bay', East='Dining Hall', Item='Stimpak',
-                            Art=os.path.join('art', 'mr_handy.txt'),
-                            Description=os.path.join('text', 'medical_bay_desc.txt')),
-        'Class Room': dict(Name='Class Room', West='Dining Hall', Item='Gunslinger',
-                           Art=os.path.join('art', 'class_room.txt'),
-                           Description=os.path.join('text', 'class_room_desc.txt')),
-
-        'Maintenance Bay': dict(Name='Maintenance Bay', West='Recreation Area', South='Reactor Chamber',
-                                East='Holding Cell', Item='Power Armor',
-                                Art=os.path.join('art', 'maintenance _bay.txt'),
-                                Description=os.path.join('text', 'maintenance _bay_desc.txt')),
-        'Reactor Chamber': dict(Name='Reactor Chamber', North='Maintenance Bay', Item='Fusion Core',
-                                Art=os.path.join('art', 'reactor_chamber.txt'),
-                                Description=os.path.join('text', 'reactor_chamber_desc.txt')),
-        'Holding Cell': dict(Name='Holding Cell', West='Maintenance Bay', Item='Ammo',
-                             Art=os.path.join('art', 'holding_cell.txt'),
-                             Description=os.path.join('text', 'holding_cell_desc.txt')),
-
-        'Armory': dict(Name='Armory', North='Overseer\'s Office', South='Recreation Area', Item='Combat Shotgun',
-                       Art=os.path.join('art', 'armory.txt'), Description=os.path.join('text', 'armory_desc.txt')),
-        'Overseer\'s Office': dict(Name='Overseer\'s Office', South='Armory',
-                                   Art=os.path.join('art', 'overseer_office.txt'),
-                                   Description=os.path.join('text', 'overseer_office_desc.txt'))
-    }
-
-    inventory = []  # set player inventory as empty
-    objectives = ['-Find Working Set of Power Armor ()',
-                  '   > Helmet',
-                  '   > Power Armor',
-                  '   > Fusion Core',
-                  '',
-                  '-Find Weapon to Deal with Cook Cook ()',
-                  '   > Find Combat Shotgun',
-                  '   > Find Ammo',
-                  '',
-                  '-Find a Stimpak ()',
-                  '-Level Up and Find Gunslinger Perk ()',
-                  '-Find the Vault Key to Escape ()',
-                  '-Kill Cook Cook ()']  # setup player's objectives list in proper format
-
-    current_room = rooms['Vault Entrance']  # set current room to starting room: Vault Entrance
-    current_room_op = RoomOperation(current_room)  # set current room operations to current room
-    hud_box_art = os.path.join("art", "hud_box.txt")  # set path to hud line art
-    # --------------------------------------/END Setup Operations-------------------------------------------------------
-
-    # ------------------------------------------------GAMEPLAY LOOP-----------------------------------------------------
-    while True:  # runs a continuous gameplay loop
-        clear_display()  # clear the console
+    Plays a single session, which restarts itself from the main menu on 'main menu' command or a lost fight.
+    """
+    global quote_bank
+
+    verify_assets()  # check the whole install before the game starts
+    quote_bank = QuoteBank(os.path.join("text", "quotes.txt"))  # load and check the quotes before the game starts
 
-        # display the description and art in its current status using current room operation
-        current_room_op.print_description()
-
-        if current_room['Name'] == 'Overseer\'s Office':  # if the player is in the 'Boss Fight' room
-            objective_checker(inventory, objectives)  # update objectives list
-            if boss_fight_sequence(inventory):  # if the player has won
-                sys.exit(0)  # close the program
-            else:  # else the player has lost
-                main()  # call self, main function, restarting game sequence from the beginning
-
-        File(hud_box_art).print_utf8(TextColor.GREEN)  # display hud box
-
-        # receives player input, converts input string to lowercase(for easier processing), and stores in 'cmd' variable
-        cmd = input(":>").lower()
-
-        if cmd == "help" or cmd == "h":  # if the player enters the 'help' command
-            help_screen()  # display help screen
-        elif "move" in cmd:  # else if the player enters the 'move' command
-            # parses out the direction from move command by replacing 'move ' with a blank space
-            # use .title() to capitalize first letter of 'sub_cmd' and match expected direction formatting
-            sub_cmd = cmd.replace("move ", "").title()
-            if current_room_op.can_move(sub_cmd):  # if the player can move in the direction entered
-                # set the current room to the room of the direction entered
-                # index the 'rooms' nested dictionaries using the 'current_room's cardinal direction pointer
-                # for the given direction in 'sub_cmd'
-                current_room = rooms[current_room[sub_cmd]]
-                current_room_op = RoomOperation(current_room)  # set current room operation to new current room
-            else:  # the player can't move in that direction
-                print('You can\'t move that way!')
-                input("Press Enter to continue...")  # wait for player to press 'enter'
-        elif "get" in cmd:  # else if the player enters the 'get' command
-            # parse out the item from get command by replacing 'get ' with a blank space, stores in 'sub_cmd'
-            # format the sub command with title() to match item entries (fusion core = Fusion Core)
-            sub_cmd = cmd.replace("get ", "").title()
-            if current_room_op.has_item(sub_cmd):  # if the 'current_room has' the item parsed from 'sub_cmd'
-                inventory.append(current_room['Item'])  # append the player inventory with the item in current_room
-                # remove the item from parent dictionary 'rooms' indexing using current_room and removing its item
-                rooms[current_room['Name']].pop('Item')
-                print('You Picked Up ' + sub_cmd + '!')  # show the player what they picked up
-                input("Press Enter to continue...")  # wait for player to press 'enter'
-            else:  # this room has no item
-                print('There\'s no ' + sub_cmd + ' to get here!')  # display that the item entered isn't there
-                input("Press Enter to continue...")  # wait for player to press 'enter'
-        elif cmd == "main menu" or cmd == "mm":  # else if the player enters the 'main menu' command
-            main()  # call self, main function, restarting game sequence from the beginning
-        elif cmd == "pip" or cmd == "p":  # else if the player enters the pip-boy command
-            objectives = objective_checker(inventory, objectives)  # update objectives list
-            pip = PipBoy(inventory, objectives)  # set and update Pip-Boy object
-            pip.show()  # open the Pip-Boy
-        elif cmd == "quit" or cmd == "q":  # else if the player enters the 'quit' command
-            sys.exit(0)  # close the program
-        else:  # command was not found
-            print("The command \'" + cmd + "\' is not recognized")  # print that command entered is not recognized
-            input("Press Enter to continue...")  # wait for player to press 'enter'
-    # --------------------------------------------/END GAMEPLAY LOOP----------------------------------------------------
+    # a scripted game ends at the first loss, a player goes back to the main menu and plays again
+    play(Session(restart_on_loss=not player_input.scripted))
 
 
 # check if special variable '__name__' is '__main__' (if this script executed itself and not imported)
 if __name__ == "__main__":
-    main()  # run main game function
+    # read the command line options
+    parser = argparse.ArgumentParser(description="Fallout CMD, a text based Fallout adventure.")
+    parser.add_argument('--buffered', action='store_true',
+                        help="fully buffer the output, so each frame reaches the terminal in one write")
+    parser.add_argument('--headless', action='store_true',
+                        help="play from a script of commands piped to stdin, skipping pauses and drawing nothing")
+    parser.add_argument('--script', metavar='FILE',
+                        help="play headless from a file of commands, one per line ('-' for stdin)")
+    parser.add_argument('--transcript', metavar='FILE',
+                        help="when headless, write every command and game event to FILE as JSON lines ('-' for stdout)")
+    parser.add_argument('--show', action='store_true', help="when headless, still draw the game to stdout")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="host a game for every player that connects to PORT with telnet")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address the server listens on (default 127.0.0.1, local players only)")
+    parser.add_argument('--record', metavar='FILE',
+                        help="record the game to a replay log, FILE or a new log in FILE if it is a folder "
+                             "(or set FALLOUTCMD_RECORD)")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="replay a replay log at full speed and check it ends as recorded")
+    parser.add_argument('--world', metavar='FILE',
+                        help="play the vault defined in FILE instead of '" + World.NAME + "' (or set FALLOUTCMD_WORLD)")
+    parser.add_argument('--write-manifest', action='store_true',
+                        help="write '" + AssetManifest.NAME + "' for the current art and text files, then exit")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each phase of every turn and print a histogram at exit (or set FALLOUTCMD_PROFILE)")
+    parser.add_argument('--profile-stats', metavar='FILE',
+                        help="when profiling, also write cProfile stats to FILE (read with the 'pstats' module)")
+    args = parser.parse_args()
+
+    enable_ansi_terminal()  # make sure the terminal understands the color and cursor escape sequences
+    if args.buffered:  # player asked for fully buffered output
+        ScreenRenderer.buffered_stdout()
+    ScreenRenderer.watch_resize()  # only measure the terminal again when it is resized
+
+    if args.headless or args.script:  # play from a script instead of the keyboard
+        script = sys.stdin if args.script in (None, '-') else open(args.script, 'r', encoding='UTF-8')
+        transcript = None
+        if args.transcript == '-':
+            transcript = sys.stdout
+        elif args.transcript:
+            transcript = open(args.transcript, 'w', encoding='UTF-8')
+        player_input.use(ScriptedInput(script, transcript))
+        screen.enabled = args.show
+    if args.write_manifest:  # list the loose asset files, before the archive could stand in for any of them
+        AssetManifest.build(asset_cache).write(AssetManifest.NAME)
+        print("Wrote '" + AssetManifest.NAME + "'")
+        sys.exit(0)
+    asset_cache.archive = AssetArchive.find()  # index the packed assets once, if the archive is available
+    world_path = args.world or os.environ.get('FALLOUTCMD_WORLD') or world_path
+
+    record_path = args.record or os.environ.get('FALLOUTCMD_RECORD')
+    if args.replay:  # replay a recorded game instead of playing one
+        try:
+            with open(args.replay, 'r', encoding='UTF-8') as log:
+                player_input.use(ReplayInput(log))
+        except (OSError, ValueError) as error:
+            parser.error("cannot replay '" + args.replay + "': " + str(error))
+        screen.enabled = args.show
+    elif record_path and args.serve is None:  # record the game, however it is played
+        if os.path.isdir(record_path):  # a new log for every game recorded into the folder
+            record_path = os.path.join(record_path, time.strftime('%Y%m%d-%H%M%S-') + str(os.getpid()) + '.replay')
+        player_input.use(RecordingInput(player_input.current(), open(record_path, 'w', encoding='UTF-8')))
+
+    if args.profile or args.profile_stats or os.environ.get('FALLOUTCMD_PROFILE', '0') not in ('', '0'):
+        profiler = PhaseProfiler(args.profile_stats)
+        profiler.instrument()
+
+    if args.serve is not None:  # host games over the network instead of playing one
+        serve(args.host, args.serve)
+        sys.exit(0)
+
+    try:
+        main()  # run main game function
+    finally:
+        screen.present()  # write anything still waiting to be drawn
+        if profiler is not None:
+            profiler.report(sys.stderr)  # kept apart from the game's own output
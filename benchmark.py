@@ -0,0 +1,350 @@
+import os
+import sys
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import time
+import tracemalloc
+
+"""
+Benchmark suite for FalloutCMD.
+Times the game's hot operations one at a time with all drawing sent to a null sink,
+reports mean / p50 / p99 latency and memory allocated per operation,
+and can save the results as a JSON baseline to compare later runs against.
+
+Usage:
+    py benchmark.py                          run every benchmark
+    py benchmark.py --only pip_boy random    run benchmarks whose name contains 'pip_boy' or 'random'
+    py benchmark.py --save baseline.json     save results as a baseline
+    py benchmark.py --compare baseline.json  compare with a baseline, exit status 1 on a regression
+    py benchmark.py --server 200             play 200 games at once against an in-process game server
+"""
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))  # game assets are found relative to the script directory
+sys.path.insert(0, os.getcwd())
+import FalloutCMD as game  # noqa: E402  (game must be imported from the script directory)
+
+# every item in the vault, in the order they are usually picked up
+ALL_ITEMS = ['Vault Key', 'Helmet', 'Stimpak', 'Gunslinger', 'Power Armor', 'Fusion Core', 'Ammo', 'Combat Shotgun']
+
+# a winning game as a player types it: commands, with a blank line for every 'Press Enter'
+WIN_LINES = ['', 's', '', '', '', '', '', '', 'move north', 'p', 'i', 'q', 'c', 'move west', 'get vault key', '',
+             'move north', 'get helmet', '', 'move west', 'get stimpak', '', 'move east', 'move east',
+             'get gunslinger', '', 'move west', 'move south', 'move east', 'move east', 'get power armor', '',
+             'move south', 'get fusion core', '', 'move north', 'move east', 'get ammo', '', 'move west', 'move west',
+             'move north', 'get combat shotgun', '', 'move north', '', '', '', '']
+
+
+def drive(steps):
+    """
+    Runs one of the game's generator functions to the end, answering every request for input with a blank line.
+    :param steps: Generator function call, e.g. game.boss_fight_sequence(items, fight)
+    :return: Value returned by the generator function
+    """
+    try:
+        next(steps)
+        while True:
+            steps.send('')
+    except StopIteration as stop:
+        return stop.value
+
+
+def build_benchmarks():
+    """
+    Builds every benchmark as a name, the operation to time, and the default number of timed runs.
+    :return: List of (name, operation, runs) tuples
+    """
+    world = game.Session.world()
+    armory = world.rooms[world.room_ids['Armory']]
+    entrance = world.rooms[world.room_ids['Vault Entrance']]
+    with open(game.World.NAME, 'r', encoding='UTF-8') as file:
+        world_source = file.read()
+    description = game.File(armory.description).to_str()
+    quote = game.random_quote()
+    empty_room = armory.copy()
+    empty_room.item = None
+
+    full_inventory = game.Inventory(ALL_ITEMS)
+    shotgun_inventory = game.Inventory(['Combat Shotgun'])
+    objectives = game.Objectives(game.Inventory(ALL_ITEMS[:5]))
+    pip = game.PipBoy(full_inventory, game.Objectives(full_inventory), world.routes())
+    pip.room_id = entrance.id
+    hint_inventory = game.Inventory(ALL_ITEMS[:2])
+    hint_pip = game.PipBoy(hint_inventory, game.Objectives(hint_inventory), world.routes())
+    hint_pip.room_id = entrance.id
+    quest_screen = pip._pip_boy_screen(pip.objectives.lines(), "Quest")
+
+    def print_description():
+        game.clear_display()
+        armory.print_description()
+        game.screen.present()
+
+    def print_hud():
+        game.clear_display()
+        game.File(os.path.join("art", "hud_box.txt")).print_utf8(game.TextColor.GREEN)
+        game.screen.present()
+
+    def present_full_frame():
+        game.screen.invalidate()  # as if the terminal was resized, every line is written
+        game.clear_display()
+        armory.print_description()
+        game.File(os.path.join("art", "hud_box.txt")).print_utf8(game.TextColor.GREEN)
+        game.screen.present()
+
+    def print_description_taken():
+        game.clear_display()
+        empty_room.print_description()
+        game.screen.present()
+
+    def can_move():
+        entrance.can_move('North')
+        entrance.can_move('West')
+
+    def has_item():
+        armory.has_item()
+        armory.has_item('Combat Shotgun')
+        entrance.has_item('Stimpak')
+
+    def parse_command():
+        game.game_commands.parse('move north')
+        game.game_commands.parse('mo n')
+        game.game_commands.parse('get combat shotgun')
+
+    def pip_boy_frame_rebuilt():
+        full_inventory.version += 1  # as if an item was picked up since the last frame
+        pip._frame('quest')
+
+    session = game.Session()
+    snapshot = game.Snapshot(world.room_ids['Armory'], game.Inventory(ALL_ITEMS[:5]).mask)
+    packed = snapshot.pack()
+
+    def snapshot_restore():
+        session.restore(game.Snapshot.unpack(packed))
+
+    def boss_fight_win():
+        drive(game.boss_fight_sequence(full_inventory, world.fight_table()))
+
+    def boss_fight_loss():
+        drive(game.boss_fight_sequence(shotgun_inventory, world.fight_table()))
+
+    return [('print_description', print_description, 500),
+            ('print_description_taken', print_description_taken, 500),
+            ('print_hud', print_hud, 5000),
+            ('present_full_frame', present_full_frame, 2000),
+            ('world_compile', lambda: game.World.compile(world_source), 500),
+            ('world_load_cached', lambda: game.World.load(game.World.NAME), 500),
+            ('can_move', can_move, 20000),
+            ('has_item', has_item, 20000),
+            ('parse_command', parse_command, 20000),
+            ('snapshot_pack', snapshot.pack, 20000),
+            ('snapshot_restore', snapshot_restore, 5000),
+            ('objectives_completed', objectives.completed, 20000),
+            ('objectives_lines', objectives.lines, 20000),
+            ('pip_boy_screen', lambda: pip._pip_boy_screen(pip.objectives.lines(), "Quest"), 20000),
+            ('pip_boy_build_display', lambda: pip._build_display(quest_screen), 5000),
+            ('pip_boy_frame_cached', lambda: pip._frame('quest'), 20000),
+            ('pip_boy_frame_rebuilt', pip_boy_frame_rebuilt, 5000),
+            ('route_planner_build', lambda: game.RoutePlanner(world), 500),
+            ('route_travel', lambda: world.routes().route(entrance.id, armory.id), 20000),
+            ('pip_boy_hint_lines', hint_pip._hint_lines, 5000),
+            ('random_quote', game.random_quote, 5000),
+            ('box_layout_cached', lambda: game.format_box(quote, game.TextColor.GREEN), 20000),
+            ('box_layout_wrap', lambda: game.box_layout.wrap(description, 60), 5000),
+            ('fight_table_build', lambda: game.FightTable(world.fight, len(world.items)), 300),
+            ('boss_fight_win', boss_fight_win, 300),
+            ('boss_fight_loss', boss_fight_loss, 300)]
+
+
+def percentile(samples, fraction):
+    """
+    Finds a percentile of sorted samples.
+    :param samples: Sorted list of samples
+    :type samples: list
+    :param fraction: Percentile as a fraction, e.g. 0.99
+    :type fraction: float
+    :return: Sample at that percentile
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run_benchmark(operation, runs):
+    """
+    Times an operation one run at a time, then measures the memory it allocates in a separate pass
+    (tracing allocations slows the operation down, so it is kept out of the timed runs).
+    :param operation: Function to benchmark
+    :param runs: Number of timed runs
+    :type runs: int
+    :return: Dictionary of results, times in microseconds
+    """
+    for i in range(max(10, runs // 10)):  # warm up caches before timing
+        operation()
+
+    samples = []
+    gc.disable()  # keep garbage collection pauses out of individual samples
+    try:
+        for i in range(runs):
+            start = time.perf_counter_ns()
+            operation()
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        gc.enable()
+    samples.sort()
+
+    alloc_runs = max(10, runs // 100)
+    allocated = 0
+    tracemalloc.start()
+    for i in range(alloc_runs):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        operation()
+        allocated += tracemalloc.get_traced_memory()[1] - before  # peak memory above where the run started
+    tracemalloc.stop()
+
+    return {'runs': runs,
+            'mean_us': round(sum(samples) / len(samples) / 1000, 3),
+            'p50_us': round(percentile(samples, 0.50) / 1000, 3),
+            'p99_us': round(percentile(samples, 0.99) / 1000, 3),
+            'alloc_bytes': allocated // alloc_runs}
+
+
+def compare(results, baseline, threshold):
+    """
+    Compares results against a baseline and prints the change for each benchmark.
+    :param results: Results of this run
+    :type results: dict
+    :param baseline: Results of a previous run
+    :type baseline: dict
+    :param threshold: Allowed slow down of the p50 time as a fraction, e.g. 0.2 for 20%
+    :type threshold: float
+    :return: List of names of benchmarks that regressed
+    """
+    regressed = []
+    print("\n{:<26}{:>12}{:>12}{:>10}".format("benchmark", "base p50", "p50", "change"))
+    for name, result in results.items():
+        if name not in baseline:  # benchmark was added after the baseline was saved
+            continue
+        base = baseline[name]['p50_us']
+        change = (result['p50_us'] - base) / base if base else 0.0
+        flag = ''
+        if change > threshold:
+            regressed.append(name)
+            flag = '  REGRESSED'
+        print("{:<26}{:>12.3f}{:>12.3f}{:>+9.1f}%{}".format(name, base, result['p50_us'], change * 100, flag))
+    return regressed
+
+
+async def play_client(port, latencies):
+    """
+    Plays a winning game against the game server like a telnet player: sends a line, then waits for the frame
+    sent back (every frame ends by erasing the rest of the screen, before the prompt).
+    :param port: Port the server listens on
+    :type port: int
+    :param latencies: List the time from each line sent to its frame arriving is added to, in nanoseconds
+    :type latencies: list
+    """
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+    async def read_frame():
+        received = b''
+        while b'\033[J' not in received:
+            data = await reader.read(65536)
+            if not data:  # the game is over and the server closed the connection
+                return
+            received += data
+
+    await read_frame()
+    for line in WIN_LINES:
+        start = time.perf_counter_ns()
+        writer.write(line.encode('UTF-8') + b'\r\n')
+        await writer.drain()
+        await read_frame()
+        latencies.append(time.perf_counter_ns() - start)
+    writer.close()
+    await writer.wait_closed()
+
+
+def server_load(clients):
+    """
+    Plays winning games from many clients at once against an in-process game server, and reports how long they
+    took and how long players waited for each frame.
+    :param clients: Number of games played at once
+    :type clients: int
+    """
+    game.preload_assets()
+
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: game.Connection(reader, writer).play(),
+                                            '127.0.0.1', 0, backlog=max(100, clients))
+        port = server.sockets[0].getsockname()[1]
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*[play_client(port, latencies) for i in range(clients)])
+        seconds = time.perf_counter() - start
+        server.close()
+        await server.wait_closed()
+        return latencies, seconds
+
+    latencies, seconds = asyncio.run(run())
+    latencies.sort()
+    print("{} games of {} lines at once in {:.2f} s ({:.0f} lines/s), frame p50 {:.2f} ms, p99 {:.2f} ms".format(
+        clients, len(WIN_LINES), seconds, len(latencies) / seconds, percentile(latencies, 0.50) / 1e6,
+        percentile(latencies, 0.99) / 1e6))
+
+
+def main():
+    """
+    Runs the benchmarks selected on the command line.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the FalloutCMD hot paths.")
+    parser.add_argument('--only', nargs='+', metavar='NAME', help="only run benchmarks whose name contains NAME")
+    parser.add_argument('--runs', type=float, default=1.0, metavar='SCALE',
+                        help="scale the number of timed runs of each benchmark (default 1.0)")
+    parser.add_argument('--save', metavar='FILE', help="save the results to FILE as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="compare the results with a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="p50 slow down that counts as a regression when comparing (default 0.2 = 20%%)")
+    parser.add_argument('--server', type=int, metavar='CLIENTS',
+                        help="instead, play CLIENTS games at once against an in-process game server")
+    args = parser.parse_args()
+
+    # send all drawing to a null sink and skip every 'Press Enter' pause
+    game.screen.stream = open(os.devnull, 'w', encoding='UTF-8')
+    game.player_input.use(game.ScriptedInput(iter(())))
+    game.random.seed(0)
+
+    if args.server:  # load test the game server instead
+        server_load(args.server)
+        return
+
+    results = {}
+    print("{:<26}{:>8}{:>12}{:>12}{:>12}{:>14}".format("benchmark", "runs", "mean us", "p50 us", "p99 us",
+                                                       "alloc bytes"))
+    for name, operation, runs in build_benchmarks():
+        if args.only and not any(part in name for part in args.only):
+            continue
+        result = run_benchmark(operation, max(1, int(runs * args.runs)))
+        results[name] = result
+        print("{:<26}{:>8}{:>12.3f}{:>12.3f}{:>12.3f}{:>14}".format(name, result['runs'], result['mean_us'],
+                                                                  result['p50_us'], result['p99_us'],
+                                                                  result['alloc_bytes']))
+    cache = game.asset_cache.stats()
+    print("\nasset cache: {} hits, {} misses, {} assets held".format(cache['hits'], cache['misses'], cache['assets']))
+
+    if args.save:
+        with open(args.save, 'w', encoding='UTF-8') as file:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                       'results': results}, file, indent=2)
+        print("\nSaved baseline to '" + args.save + "'")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='UTF-8') as file:
+            baseline = json.load(file)['results']
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+# check if special variable '__name__' is '__main__' (if this script executed itself and not imported)
+if __name__ == "__main__":
+    main()
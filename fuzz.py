@@ -0,0 +1,366 @@
+import os
+import sys
+import argparse
+import io
+import multiprocessing
+import random
+import shutil
+import signal
+import tempfile
+import time
+import traceback
+
+"""
+Stress and fuzz harness for FalloutCMD.
+Plays thousands of random sessions spread across a process pool, each from a random script of commands
+(moves the wrong way, repeated pickups, Pip-Boy tab spam, travel, saves, garbage, and restarts after losing
+the fight), with stdin and stdout redirected in each worker. Crashes, hangs and missing assets are collected,
+each failing script is shrunk to a minimal reproduction, and the sessions per second across all processes are
+reported. Each reproduction can be saved as a replay log, which carries the seed and restart setting it needs.
+
+Usage:
+    py fuzz.py                               play 2000 random sessions on every core
+    py fuzz.py --sessions 20000 --seed 7     play 20000 sessions, the same ones every run with seed 7
+    py fuzz.py --save failures               write each minimal reproduction to the 'failures' folder as a replay log
+"""
+
+os.chdir(os.path.dirname(os.path.abspath(__file__)))  # game assets are found relative to the script directory
+sys.path.insert(0, os.getcwd())
+import FalloutCMD as game  # noqa: E402  (game must be imported from the script directory)
+
+# moves the game should refuse, and widths of terminal the game is drawn to
+BAD_DIRECTIONS = ['up', 'down', 'northwest', 'nort', 'n0rth', '42', 'north north', 'west!']
+WIDTHS = [20, 40, 60, 80, 96, 120, 200]
+PIP_TABS = ['i', 'h', 'x', 'items', 'quest', 'hint', 'close me', '']
+SAVE_NAMES = ['', 'fuzz', 'fuzz-2', '../escape', 'a' * 40, 'bad name', 'quick_save']
+
+
+class SessionTimeout(Exception):
+    """
+    Raised in a worker when a session runs longer than the timeout, so a hang is caught where it happens.
+    """
+
+
+class FuzzInput(game.ScriptedInput):
+    """
+    Scripted input that remembers how its session ended.
+
+    Attributes
+    ----------
+    result = How the session ended, see 'ScriptedInput.finish()'
+    """
+    result = None
+
+    def finish(self, result):
+        """
+        Keeps the result, then exits with its status like any scripted game.
+        :param result: How the game ended
+        :type result: str
+        """
+        self.result = result
+        super().finish(result)
+
+
+def random_commands(rng, world, max_commands):
+    """
+    Builds a random script of commands. Moves follow the exits of the room the player is thought to be in, so
+    sessions get deep into the vault and reach the fight, and the rest are mistakes and abuse. Some scripts follow
+    the vault's best plan to win (see 'RoutePlanner') instead of wandering, with the same mistakes in between.
+    :param rng: Random number generator
+    :type rng: random.Random
+    :param world: Vault played
+    :type world: FalloutCMD.World
+    :param max_commands: Most commands in the script
+    :type max_commands: int
+    :return: List of commands
+    """
+    routes = world.routes()
+    guided = rng.random() < 0.3  # follows the plan to win
+    room = world.rooms[world.start]
+    mask = 0  # items the player is thought to have
+    commands = ['s'] if rng.random() < 0.9 else []
+    length = rng.randint(1, max_commands)
+    while len(commands) < length:
+        roll = 0.0 if guided and rng.random() < 0.5 else rng.random()  # a guided script mostly follows its plan
+        plan = routes.plan(room.id, mask) if guided else None
+        if roll < 0.35 and plan and not routes.route(room.id, plan[0][0]):  # at the next item of the plan
+            commands.append('get ' + world.items[plan[0][1].bit_length() - 1])
+            mask |= plan[0][1]
+        elif roll < 0.35:  # a move along an exit of the room the player is probably in
+            exits = [(direction, target) for direction, target in zip(game.Room.DIRECTIONS, room.exits)
+                     if target != game.Room.NO_EXIT]
+            if plan:  # the next move of the plan
+                direction = routes.route(room.id, plan[0][0])[0]
+                exits = [(direction, room.exit(direction))]
+            direction, target = rng.choice(exits) if exits else ('North', room.id)
+            commands.append('move ' + direction)
+            room = world.rooms[target]
+            if room.id == routes.fight_room:  # the fight, then the menu (or the end of the session)
+                room = world.rooms[world.start]
+                mask = 0
+        elif roll < 0.42:  # a move the game should refuse
+            commands.append('move ' + rng.choice(BAD_DIRECTIONS + list(game.Room.DIRECTIONS)).lower())
+        elif roll < 0.55:  # pick up the item here, or any item, often more than once
+            item = room.item if room.item is not None and rng.random() < 0.7 else rng.choice(world.items)
+            commands.extend(['get ' + item] * rng.randint(1, 3))
+        elif roll < 0.65:  # open the Pip-Boy and flick through its tabs
+            commands.append('p')
+            commands.extend(rng.choice(PIP_TABS) for i in range(rng.randint(1, 12)))
+            commands.append('c')
+        elif roll < 0.72:  # travel to a room, or somewhere that isn't one
+            target = rng.choice(world.rooms)
+            commands.append('travel ' + (target.name if rng.random() < 0.8 else target.name[::-1]))
+            room = target
+        elif roll < 0.76:  # save or load a game
+            commands.append(rng.choice(['save', 'load']) + ' ' + rng.choice(SAVE_NAMES))
+        elif roll < 0.80:  # back to the main menu, and start again
+            commands.extend([rng.choice(['main menu', 'mm']), 's'])
+            room = world.rooms[world.start]
+            mask = 0
+        elif roll < 0.84:  # start again after losing the fight, or carry on in the menu
+            commands.append(rng.choice(['s', 'start', 'load', 'help', 'h']))
+        elif roll < 0.87:
+            commands.append('help')
+        elif roll < 0.998:  # garbage, including letters outside ASCII
+            commands.append(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz NSEW?!{}\\éß☢') for i in
+                                    range(rng.randint(1, 30))).strip() or '?')
+        else:
+            commands.append(rng.choice(['quit', 'q']))
+
+        if rng.random() < 0.1:  # abbreviate the command, e.g. 'mo n' for 'move north'
+            commands[-1] = ' '.join(word[:rng.randint(1, len(word))] for word in commands[-1].split())
+    return commands
+
+
+def init_worker(saves, world_path):
+    """
+    Sets up a worker process: saves go to a folder of its own (emptied before each session, so a session never
+    loads a save of another), and the vault played is the one given.
+    :param saves: Folder for the workers' saves
+    :type saves: str
+    :param world_path: Vault played
+    :type world_path: str
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops the pool on Ctrl+C
+    os.environ['FALLOUTCMD_SAVES'] = os.path.join(saves, str(os.getpid()))
+    game.world_path = world_path
+    game.quote_bank = None
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, timed_out)
+
+
+# vvv  Negates 'Parameter not used' warning **Signal handlers are passed both**
+# noinspection PyUnusedLocal
+def timed_out(signum, frame):
+    """
+    Signal handler for SIGALRM, stops a session that has run too long.
+    :param signum: Signal number
+    :param frame: Stack frame the signal interrupted
+    """
+    raise SessionTimeout()
+
+
+def signature(error):
+    """
+    Finds where a failure happened, so failures with the same cause are grouped together.
+    :param error: Exception raised by the session
+    :type error: BaseException
+    :return: Signature string, e.g. 'KeyError at FalloutCMD.py:1234 in _move'
+    """
+    frames = [frame for frame in traceback.extract_tb(error.__traceback__)
+              if os.path.basename(frame.filename) == 'FalloutCMD.py'] or traceback.extract_tb(error.__traceback__)
+    where = frames[-1] if frames else None
+    kind = 'hang' if isinstance(error, SessionTimeout) else type(error).__name__
+    if where is None:
+        return kind
+    return kind + ' at ' + os.path.basename(where.filename) + ':' + str(where.lineno) + ' in ' + where.name
+
+
+def run_session(task):
+    """
+    Plays one session in a worker, from its script with stdin and stdout redirected, and reports how it went.
+    Runs in a worker process.
+    :param task: Tuple of (seed, terminal width, if the session restarts after losing the fight, commands, timeout
+                 in seconds, if the game is drawn, path to record a replay log to or None)
+    :type task: tuple
+    :return: Dictionary of the session's result, time, number of commands, and failure (None if it didn't fail)
+    """
+    seed, width, restart, commands, timeout, draw, record = task
+    saved = sys.stdin, sys.stdout
+    sys.stdin = io.StringIO('\n'.join(commands) + '\n')
+    sys.stdout = open(os.devnull, 'w', encoding='UTF-8')
+    fuzz_input = FuzzInput(sys.stdin)
+    log = None
+    if record is None:
+        game.player_input.use(fuzz_input)
+        random.seed(seed)  # the quotes follow from the seed
+    else:  # the recorder seeds the quotes the same way, and writes the seed and restart setting into the log
+        log = open(record, 'w', encoding='UTF-8')
+        game.player_input.use(game.RecordingInput(fuzz_input, log, seed, restart))
+    game.screen.use(game.ScreenRenderer())  # a fresh screen, drawn to the redirected stdout
+    game.screen.terminal_size = os.terminal_size((width, 50))
+    game.screen.enabled = draw
+    shutil.rmtree(os.environ['FALLOUTCMD_SAVES'], ignore_errors=True)  # no saves left by the sessions before
+
+    failure = None
+    timer = hasattr(signal, 'setitimer')
+    start = time.perf_counter()
+    try:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        if game.quote_bank is None:  # check the install and load the quotes once, as 'main()' does
+            game.verify_assets()
+            game.quote_bank = game.QuoteBank(os.path.join("text", "quotes.txt"))
+        game.play(game.Session(restart_on_loss=restart))
+    except SystemExit:  # the game ended, 'FuzzInput' kept how
+        if fuzz_input.result == 'error':  # a game file is missing or damaged
+            failure = {'signature': 'missing or damaged game files', 'traceback': ''}
+    except BaseException as error:  # a crash or a hang, KeyboardInterrupt is ignored by the workers
+        failure = {'signature': signature(error), 'traceback': traceback.format_exc()}
+    finally:
+        if timer:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+        seconds = time.perf_counter() - start
+        sys.stdout.close()
+        sys.stdin, sys.stdout = saved
+        if log is not None:
+            log.close()
+
+    return {'seed': seed, 'result': fuzz_input.result or 'failed', 'seconds': seconds,
+            'turns': fuzz_input.turns, 'failure': failure}
+
+
+def shrink(pool, task, wanted):
+    """
+    Shrinks a failing script to a minimal reproduction by delta debugging: chunks of commands are taken out, and
+    a smaller script is kept whenever it still fails the same way. The candidates of each round are played at
+    once across the pool.
+    :param pool: Process pool
+    :type pool: multiprocessing.Pool
+    :param task: Task of the failing session (see 'run_session()')
+    :type task: tuple
+    :param wanted: Signature of the failure
+    :type wanted: str
+    :return: List of commands
+    """
+    seed, width, restart, commands, timeout, draw, record = task
+    pieces = 2
+    while len(commands) > 1:
+        size = -(-len(commands) // pieces)  # commands per chunk, rounded up
+        candidates = [commands[:i] + commands[i + size:] for i in range(0, len(commands), size)]
+        results = pool.map(run_session, [(seed, width, restart, candidate, timeout, draw, None)
+                                         for candidate in candidates])
+        for candidate, result in zip(candidates, results):
+            if result['failure'] is not None and result['failure']['signature'] == wanted:
+                commands = candidate
+                pieces = max(pieces - 1, 2)
+                break
+        else:  # no chunk could be taken out, try smaller ones
+            if pieces >= len(commands):
+                break
+            pieces = min(len(commands), pieces * 2)
+
+    if commands:  # the failure may not need any commands at all
+        result = pool.apply(run_session, ((seed, width, restart, [], timeout, draw, None),))
+        if result['failure'] is not None and result['failure']['signature'] == wanted:
+            commands = []
+    return commands
+
+
+def percentile(samples, fraction):
+    """
+    Finds a percentile of sorted samples.
+    :param samples: Sorted list of samples
+    :type samples: list
+    :param fraction: Percentile as a fraction, e.g. 0.99
+    :type fraction: float
+    :return: Sample at that percentile
+    """
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main():
+    """
+    Plays the random sessions selected on the command line and reports what was found.
+    """
+    parser = argparse.ArgumentParser(description="Fuzz FalloutCMD with random sessions across a process pool.")
+    parser.add_argument('--sessions', type=int, default=2000, help="number of sessions to play (default 2000)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="worker processes (default: one per core)")
+    parser.add_argument('--seed', type=int, help="seed the scripts are built from, random unless given")
+    parser.add_argument('--max-commands', type=int, default=200, metavar='N',
+                        help="most commands in a script (default 200)")
+    parser.add_argument('--timeout', type=float, default=5.0, metavar='SECONDS',
+                        help="a session running longer than this has hung (default 5)")
+    parser.add_argument('--no-draw', action='store_true', help="skip drawing, to play more sessions a second")
+    parser.add_argument('--save', metavar='DIR', help="write each minimal reproduction to DIR as a replay log")
+    parser.add_argument('--world', metavar='FILE', help="fuzz the vault defined in FILE instead of '" +
+                        game.World.NAME + "'")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    world_path = args.world or game.world_path
+    game.world_path = world_path
+    game.screen.enabled = False  # the world is loaded here only to build scripts from
+    game.player_input.use(game.ScriptedInput(iter(())))
+    world = game.Session.world()
+
+    tasks = []
+    for index in range(args.sessions):  # each session's script follows from the seed and its index
+        rng = random.Random(seed * 1000003 + index)
+        tasks.append((rng.randrange(2 ** 32), rng.choice(WIDTHS), rng.random() < 0.8,
+                      random_commands(rng, world, args.max_commands), args.timeout, not args.no_draw, None))
+
+    print("Fuzzing with seed " + str(seed) + ", " + str(args.sessions) + " sessions on " + str(args.processes) +
+          " processes")
+    failures = {}  # signature -> (task, failure, number of sessions that failed this way)
+    results = {}
+    times = []
+    turns = 0
+    with tempfile.TemporaryDirectory(prefix='falloutcmd-fuzz-') as saves, \
+            multiprocessing.Pool(args.processes, init_worker, (saves, world_path)) as pool:
+        start = time.perf_counter()
+        for task, result in zip(tasks, pool.imap(run_session, tasks, chunksize=8)):
+            results[result['result']] = results.get(result['result'], 0) + 1
+            times.append(result['seconds'])
+            turns += result['turns']
+            failure = result['failure']
+            if failure is not None:
+                first, details, count = failures.get(failure['signature'], (task, failure, 0))
+                failures[failure['signature']] = (first, details, count + 1)
+        seconds = time.perf_counter() - start
+
+        times.sort()
+        print("Played {} sessions ({} commands) in {:.2f} s: {:.0f} sessions/s, {:.0f} commands/s across {} "
+              "processes".format(len(times), turns, seconds, len(times) / seconds, turns / seconds, args.processes))
+        print("Results: " + ", ".join(name + " " + str(count) for name, count in sorted(results.items())))
+        print("Session time p50 {:.2f} ms, p99 {:.2f} ms, slowest {:.2f} ms".format(
+            percentile(times, 0.50) * 1000, percentile(times, 0.99) * 1000, times[-1] * 1000))
+
+        if not failures:
+            print("No failures found")
+            return
+        print("\n" + str(len(failures)) + " kind(s) of failure found:")
+        for number, (wanted, (task, failure, count)) in enumerate(sorted(failures.items()), 1):
+            commands = shrink(pool, task, wanted)
+            seed, width, restart = task[:3]
+            print("\n" + str(number) + ". " + wanted + " (" + str(count) + " sessions)")
+            print("   shrunk from " + str(len(task[3])) + " to " + str(len(commands)) + " commands, width " +
+                  str(width) + (", restarting after a loss" if restart else "") + ":")
+            for command in commands:
+                print("     " + command)
+            if failure['traceback']:
+                print("   " + failure['traceback'].rstrip().replace('\n', '\n   '))
+            if args.save:  # play the reproduction once more, recording it
+                os.makedirs(args.save, exist_ok=True)
+                path = os.path.abspath(os.path.join(args.save, 'failure-' + str(number) + '.replay'))
+                pool.apply(run_session, ((seed, width, restart, commands, task[4], task[5], path),))
+                world = "" if world_path == game.World.NAME else " --world " + world_path
+                print("   saved to '" + path + "', replay it with: py FalloutCMD.py --replay " + path + world +
+                      " --show (in a terminal " + str(width) + " columns wide)")
+    sys.exit(1)
+
+
+# check if special variable '__name__' is '__main__' (if this script executed itself and not imported)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+import io
+import os
+import sys
+
+import pytest
+
+"""
+Shared set up for the FalloutCMD tests.
+The game finds its assets relative to the root directory, so the tests run from there with the game imported
+from the script, drawing nothing and reading no input from the keyboard.
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)  # game assets are found relative to the script directory
+sys.path.insert(0, ROOT)
+import FalloutCMD as game  # noqa: E402  (game must be imported from the script directory)
+
+
+@pytest.fixture(autouse=True)
+def headless(tmp_path, monkeypatch):
+    """
+    Plays every test headless: nothing is drawn, 'Press Enter' pauses are skipped, and saves go to a folder of
+    the test's own.
+    """
+    monkeypatch.setenv('FALLOUTCMD_SAVES', str(tmp_path / 'saves'))
+    game.screen.use(game.ScreenRenderer(io.StringIO()))
+    game.screen.enabled = False
+    game.player_input.use(game.ScriptedInput(iter(())))
+    yield
+
+
+@pytest.fixture
+def world():
+    """
+    The stock vault, loaded once and shared like every session shares it.
+    """
+    return game.Session.world()
@@ -0,0 +1,84 @@
+from conftest import game
+
+"""
+Tests for the prefix-trie command parser ('PrefixTrie' and 'CommandSet').
+"""
+
+
+def vault_commands():
+    """
+    A command table like the vault's, with its own directions and items so the tests don't depend on the vault.
+    """
+    return game.CommandSet([('help', ('h',)), ('move', (), ('North', 'South', 'East', 'West')),
+                            ('get', (), ('Vault Key', 'Helmet', 'Power Armor', 'Fusion Core')),
+                            ('travel', ('t',), ('Dining Hall', 'Armory')), ('main menu', ('mm',)),
+                            ('pip', ('p',)), ('quit', ('q',))])
+
+
+def test_trie_finds_whole_words_and_unique_prefixes():
+    trie = game.PrefixTrie({'north': 'North', 'south': 'South', 'northwest': 'Northwest'})
+    assert trie.find('south') == 'South'
+    assert trie.find('s') == 'South'
+    assert trie.find('north') == 'North'  # a whole word wins over the longer words it starts
+    assert trie.find('northw') == 'Northwest'
+
+
+def test_trie_rejects_ambiguous_empty_and_unknown_prefixes():
+    trie = game.PrefixTrie({'main menu': 'main menu', 'move': 'move', 'quit': 'quit'})
+    assert trie.find('m') is None  # 'main menu' or 'move'
+    assert trie.find('') is None
+    assert trie.find('x') is None
+    assert trie.find('quits') is None
+
+
+def test_trie_aliases_of_one_value_are_not_ambiguous():
+    trie = game.PrefixTrie()
+    trie.add('quest', 'quest')
+    trie.add('q', 'quest')
+    assert trie.find('q') == 'quest'
+    assert trie.find('que') == 'quest'
+
+
+def test_parse_resolves_command_and_argument_prefixes():
+    commands = vault_commands()
+    command = commands.parse('mo n')
+    assert (command.name, command.argument, command.text) == ('move', 'North', 'mo n')
+    assert commands.parse('MOVE   West').argument == 'West'
+    assert commands.parse('get fusion').argument == 'Fusion Core'
+    assert commands.parse('t dining').name == 'travel'
+
+
+def test_parse_commands_without_an_argument():
+    commands = vault_commands()
+    assert commands.parse('h').name == 'help'
+    assert commands.parse('main menu').name == 'main menu'
+    assert commands.parse('mm').name == 'main menu'
+    assert commands.parse('ma').name == 'main menu'
+    assert commands.parse('help me').name is None  # a command without an argument must be the whole text
+
+
+def test_parse_ambiguous_and_unknown_verbs():
+    commands = vault_commands()
+    assert commands.parse('m north').name is None  # 'move' or 'main menu'
+    assert commands.parse('dance').name is None
+    assert commands.parse('').name is None
+    assert commands.parse('   ').name is None
+
+
+def test_parse_verbs_with_a_missing_or_unmatched_argument():
+    commands = vault_commands()
+    command = commands.parse('get')
+    assert (command.name, command.argument) == ('get', '')
+    command = commands.parse('get nuka cola')
+    assert (command.name, command.argument) == ('get', 'Nuka Cola')  # kept as entered, titled like the items
+    assert commands.parse('move up').argument == 'Up'
+
+
+def test_bare_get_asks_for_an_item(world):
+    game.screen.enabled = True
+    session = game.Session()
+    kind, prompt = next(session._get(game.game_commands.parse('get')))  # waiting for 'enter' after the message
+    game.screen.present()
+    assert kind == game.PAUSE
+    assert "Get what?" in game.screen.stream.getvalue()
+    assert "There's no  to get" not in game.screen.stream.getvalue()
@@ -0,0 +1,93 @@
+import io
+import json
+
+import pytest
+
+from conftest import game
+
+"""
+Tests for replay logs ('RecordingInput' and 'ReplayInput'): a recorded game replays to the same end, and logs
+that cannot replay it are rejected.
+"""
+
+WIN_LINES = ['s', 'move north', 'p', 'i', 'q', 'c', 'move west', 'get vault key', 'move north', 'get helmet',
+             'move west', 'get stimpak', 'move east', 'move east', 'get gunslinger', 'move west', 'move south',
+             'move east', 'move east', 'get power armor', 'move south', 'get fusion core', 'move north', 'move east',
+             'get ammo', 'move west', 'move west', 'move north', 'get combat shotgun', 'move north']
+
+
+def record(lines, seed=1234):
+    """
+    Records a game played with the lines given.
+    :return: Replay log
+    """
+    log = io.StringIO()
+    game.player_input.use(game.RecordingInput(game.ScriptedInput(iter(lines)), log, seed))
+    with pytest.raises(SystemExit):
+        game.play(game.Session(restart_on_loss=False))
+    return log.getvalue()
+
+
+def replay(log):
+    """
+    Replays a log as 'main()' does.
+    :return: Exit code
+    """
+    game.player_input.use(game.ReplayInput(io.StringIO(log)))
+    with pytest.raises(SystemExit) as exit_info:
+        game.play(game.Session(restart_on_loss=not game.player_input.scripted))
+    return exit_info.value.code
+
+
+def test_recorded_win_replays_to_the_same_end(capsys):
+    log = record(WIN_LINES)
+    final = json.loads(log.splitlines()[-1])
+    assert final['end'] == 'win'
+    assert replay(log) == 0
+    assert "exactly as recorded" in capsys.readouterr().out
+
+
+def test_different_end_fails_the_replay():
+    lines = record(WIN_LINES).splitlines()
+    final = json.loads(lines[-1])
+    final['items'] ^= 1  # one item more or less than recorded
+    assert replay('\n'.join(lines[:-1] + [json.dumps(final)]) + '\n') == 1
+
+
+@pytest.mark.parametrize('header', [
+    {'replay': 1},
+    {'replay': 1, 'seed': '1234', 'restart_on_loss': False, 'world': ''},
+    {'replay': 1, 'seed': 1234, 'restart_on_loss': 0, 'world': ''},
+    {'replay': 2, 'seed': 1234, 'restart_on_loss': False, 'world': ''},
+    [1234],
+])
+def test_bad_header_is_rejected(header):
+    with pytest.raises(ValueError):
+        game.ReplayInput(io.StringIO(json.dumps(header) + '\n[0,"s"]\n'))
+
+
+def test_log_of_another_vault_is_rejected():
+    lines = record(WIN_LINES).splitlines()
+    header = json.loads(lines[0])
+    header['world'] = '0000000000000000'
+    with pytest.raises(ValueError, match="another vault"):
+        game.ReplayInput(io.StringIO('\n'.join([json.dumps(header)] + lines[1:]) + '\n'))
+
+
+@pytest.mark.parametrize('cut', [-10, -40])
+def test_truncated_log_is_rejected(cut):
+    log = record(WIN_LINES)
+    with pytest.raises(ValueError, match="cut off or damaged"):
+        game.ReplayInput(io.StringIO(log[:cut]))
+
+
+def test_damaged_entry_is_rejected():
+    lines = record(WIN_LINES).splitlines()
+    lines[2] = '["s", 0]'
+    with pytest.raises(ValueError, match="line 3"):
+        game.ReplayInput(io.StringIO('\n'.join(lines) + '\n'))
+
+
+def test_log_without_final_state_replays():
+    lines = record(WIN_LINES).splitlines()
+    assert replay('\n'.join(lines[:-1]) + '\n') == 0
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from conftest import game
+
+"""
+Tests for the route planner ('RoutePlanner') and the 'travel' command that walks its routes.
+"""
+
+
+def walk(world, room_id, route):
+    """
+    Follows a route through the vault's exits.
+    :return: Room ID the route ends in
+    """
+    for direction in route:
+        room_id = world.rooms[room_id].exit(direction)
+        assert room_id != game.Room.NO_EXIT
+    return room_id
+
+
+def win_commands(world):
+    """
+    The commands that play the planner's best route from the start, the way a player would type them.
+    """
+    routes = world.routes()
+    commands = ['s']
+    room_id = world.start
+    for target, bit in routes.plan(world.start, 0):
+        commands += ['move ' + direction.lower() for direction in routes.route(room_id, target)]
+        if bit:
+            commands.append('get ' + world.items[bit.bit_length() - 1].lower())
+        room_id = target
+    return commands
+
+
+def test_plan_collects_every_item_needed_then_fights(world):
+    routes = world.routes()
+    plan = routes.plan(world.start, 0)
+    assert plan and plan[-1] == (routes.fight_room, 0)
+
+    room_id, mask, moves = world.start, 0, 0
+    for target, bit in plan:
+        route = routes.route(room_id, target)
+        assert route is not None
+        room_id = walk(world, room_id, route)
+        assert room_id == target
+        assert target != routes.fight_room or (target, bit) == plan[-1]  # the fight comes last
+        if bit:
+            assert world.rooms[room_id].item == world.items[bit.bit_length() - 1]
+            mask |= bit
+        moves += len(route) + (1 if bit else 0)
+    assert mask == world.fight['win']['items']
+    assert moves == routes.best(world.start, 0)[0]
+
+
+def test_routes_never_pass_through_the_fight_room(world):
+    routes = world.routes()
+    for source in range(len(world.rooms)):
+        for target in range(len(world.rooms)):
+            route = routes.route(source, target)
+            if route is None:
+                continue
+            room_id = source
+            for direction in route[:-1]:
+                room_id = world.rooms[room_id].exit(direction)
+                assert room_id != routes.fight_room
+
+
+def test_planned_route_wins_the_game(world):
+    game.player_input.use(game.ScriptedInput(iter(win_commands(world))))
+    with pytest.raises(SystemExit) as exit_info:
+        game.play(game.Session(restart_on_loss=False))
+    assert exit_info.value.code == game.ScriptedInput.EXIT_CODES['win']
+
+
+def test_travel_to_an_unknown_room_is_an_error(world):
+    game.screen.enabled = True
+    session = game.Session()
+    start = session.current_room
+    kind, prompt = next(session._travel(game.game_commands.parse('travel nuka world')))
+    game.screen.present()
+    assert kind == game.PAUSE
+    assert session.current_room is start
+    assert "There's no room called" in game.screen.stream.getvalue()
+
+
+def test_travel_to_an_unreachable_room_is_an_error(tmp_path, monkeypatch):
+    with open(game.World.NAME, 'r', encoding='UTF-8') as file:
+        vault = json.load(file)
+    office = next(room for room in vault['rooms'] if room['name'] == vault['fight']['room'])
+    office['exits']['North'] = 'Vault Door'  # a room that can only be reached through the fight
+    vault['rooms'].append({'name': 'Vault Door', 'art': office['art'], 'description': office['description'],
+                           'exits': {'South': office['name']}})
+    path = tmp_path / 'world.json'
+    path.write_text(json.dumps(vault), encoding='UTF-8')
+    stock = game.Session.world()
+    monkeypatch.setattr(game, 'world_path', str(path))
+    monkeypatch.setattr(game.Session, 'WORLD', None)
+
+    game.screen.enabled = True
+    try:
+        session = game.Session()
+        assert session.WORLD.routes().route(session.current_room.id, session.room_ids['Vault Door']) is None
+        start = session.current_room
+        kind, prompt = next(session._travel(game.game_commands.parse('travel vault door')))
+    finally:
+        stock.apply()  # the 'get' and 'travel' commands match the stock vault's items and rooms again
+    game.screen.present()
+    assert kind == game.PAUSE
+    assert session.current_room is start
+    assert "There's no way to Vault Door from here!" in game.screen.stream.getvalue()
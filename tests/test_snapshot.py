@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+from conftest import game
+
+"""
+Tests for saved games ('Snapshot'): the 9-byte format, its checks, and replacing a save in a single step.
+"""
+
+
+def test_pack_is_nine_bytes_and_round_trips():
+    data = game.Snapshot(5, 0b10110011).pack()
+    assert len(data) == game.Snapshot.SIZE == 9
+    snapshot = game.Snapshot.unpack(data)
+    assert (snapshot.room_id, snapshot.item_mask) == (5, 0b10110011)
+
+
+def test_bad_magic_is_rejected():
+    data = game.Snapshot(1, 2).pack()
+    assert game.Snapshot.unpack(b'XX' + data[2:]) is None
+
+
+def test_other_version_is_rejected():
+    data = bytearray(game.Snapshot(1, 2).pack())
+    data[2] = game.Snapshot.VERSION + 1
+    assert game.Snapshot.unpack(bytes(data)) is None
+
+
+@pytest.mark.parametrize('index', range(2, 9))
+def test_flipped_byte_fails_the_checksum(index):
+    data = bytearray(game.Snapshot(3, 0b1111).pack())
+    data[index] ^= 0x40
+    assert game.Snapshot.unpack(bytes(data)) is None
+
+
+def test_save_and_load():
+    game.Snapshot(7, 0b101).save('slot')
+    snapshot = game.Snapshot.load('slot')
+    assert (snapshot.room_id, snapshot.item_mask) == (7, 0b101)
+
+
+def test_truncated_or_padded_save_is_damaged():
+    game.Snapshot(7, 0b101).save('slot')
+    path = game.Snapshot.path('slot')
+    with open(path, 'rb') as file:
+        data = file.read()
+    with open(path, 'wb') as file:
+        file.write(data[:5])
+    assert game.Snapshot.load('slot') is None
+    with open(path, 'wb') as file:
+        file.write(data + b'\0')
+    assert game.Snapshot.load('slot') is None
+
+
+def test_missing_save_raises_oserror():
+    with pytest.raises(OSError):
+        game.Snapshot.load('nothing-here')
+
+
+def test_failed_write_leaves_the_old_save(monkeypatch):
+    game.Snapshot(2, 0b11).save('slot')
+
+    def failing_fsync(fd):
+        raise OSError("disk full")
+    monkeypatch.setattr(os, 'fsync', failing_fsync)  # the new save is written, but fails before it is moved over
+    with pytest.raises(OSError):
+        game.Snapshot(4, 0b1).save('slot')
+
+    snapshot = game.Snapshot.load('slot')
+    assert (snapshot.room_id, snapshot.item_mask) == (2, 0b11)
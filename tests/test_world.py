@@ -0,0 +1,142 @@
+import hashlib
+import json
+import marshal
+import os
+
+import pytest
+
+from conftest import game
+
+"""
+Tests for loading a vault ('World'): the checks of a definition, and its compiled cache.
+"""
+
+
+def definition():
+    """
+    The stock vault's definition, to change for each test.
+    """
+    with open(game.World.NAME, 'r', encoding='UTF-8') as file:
+        return json.load(file)
+
+
+def problems(vault):
+    """
+    Compiles a definition that has mistakes in it.
+    :return: Problem lines reported
+    """
+    with pytest.raises(ValueError) as error:
+        game.World.compile(json.dumps(vault))
+    return str(error.value).split('\n')
+
+
+def test_stock_vault_compiles():
+    items, rooms, start, objectives, fight = game.World.compile(json.dumps(definition()))
+    assert rooms[start][0] == 'Vault Entrance'
+    assert len(items) == 8
+
+
+def test_not_json_or_not_an_object():
+    with pytest.raises(ValueError, match='not valid JSON'):
+        game.World.compile('{"items": [')
+    with pytest.raises(ValueError, match='not a JSON object'):
+        game.World.compile('[]')
+
+
+def test_missing_field():
+    vault = definition()
+    del vault['start']
+    del vault['rooms'][0]['art']
+    found = problems(vault)
+    assert "The vault is missing 'start'" in found
+    assert "Room 1 is missing 'art'" in found
+
+
+def test_unknown_field():
+    vault = definition()
+    vault['rooms'][0]['colour'] = 'green'
+    assert "Room 1 has an unknown field 'colour'" in problems(vault)
+
+
+@pytest.mark.parametrize('change, problem', [
+    (lambda vault: vault.__setitem__('items', 'Helmet'), "'items' must be a list of item names"),
+    (lambda vault: vault['rooms'][0].__setitem__('name', 7), "Room 1 'name' must be text"),
+    (lambda vault: vault['rooms'][0].__setitem__('exits', ['North']), "'exits' must be an object"),
+    (lambda vault: vault.__setitem__('start', ['Vault Entrance']), "'start' must be the name of a room"),
+    (lambda vault: vault['fight'].__setitem__('room', {'name': 'Overseer Office'}),
+     "The fight 'room' must be the name of a room"),
+    (lambda vault: vault['rooms'][0]['exits'].__setitem__('North', ['Recreation Area']), "which is not a room"),
+    (lambda vault: vault['fight']['win'].__setitem__('items', [['Helmet']]), "which is not in 'items'"),
+])
+def test_wrong_type(change, problem):
+    vault = definition()
+    change(vault)
+    assert any(problem in line for line in problems(vault))  # a schema problem, never a TypeError
+
+
+def test_exit_to_unknown_room():
+    vault = definition()
+    vault['rooms'][0]['exits']['East'] = 'Gift Shop'
+    assert "Room 'Vault Entrance' has an exit East to 'Gift Shop', which is not a room" in problems(vault)
+
+
+def test_exit_in_unknown_direction():
+    vault = definition()
+    vault['rooms'][0]['exits']['Up'] = 'Recreation Area'
+    assert any(line.startswith("Room 'Vault Entrance' has an exit 'Up'") for line in problems(vault))
+
+
+def test_duplicate_names():
+    vault = definition()
+    vault['rooms'][1]['name'] = vault['rooms'][0]['name']
+    vault['items'].append(vault['items'][0])
+    found = problems(vault)
+    assert "There are two rooms named 'Vault Entrance'" in found
+    assert "'" + vault['items'][0] + "' is listed twice in 'items'" in found
+
+
+def test_unreachable_room():
+    vault = definition()
+    for room in vault['rooms']:
+        room.get('exits', {}).pop('North', None)
+    assert any("cannot be reached from 'Vault Entrance'" in line for line in problems(vault))
+
+
+def test_stale_cache_is_ignored(tmp_path):
+    path = str(tmp_path / 'world.json')
+    vault = definition()
+    with open(path, 'w', encoding='UTF-8') as file:
+        json.dump(vault, file)
+    game.World.load(path)  # compiles the vault and writes the cache
+    cache_path = game.World.cache_path(path)
+    assert cache_path == os.path.join(str(tmp_path), '__pycache__', 'world.json.marshal')
+    with open(cache_path, 'rb') as file:
+        old_key = marshal.loads(file.read())[1]
+
+    vault['fight']['approach'] = "Press Enter to say hello to Cook-Cook.."
+    with open(path, 'w', encoding='UTF-8') as file:
+        json.dump(vault, file)
+    game.asset_cache.tick()  # a new turn, so the changed file is noticed
+    world = game.World.load(path)
+
+    assert world.fight['approach'] == "Press Enter to say hello to Cook-Cook.."  # compiled again, not cached
+    with open(path, 'rb') as file:
+        new_key = hashlib.sha256(file.read()).hexdigest()
+    with open(cache_path, 'rb') as file:
+        version, cached_key, compiled = marshal.loads(file.read())
+    assert cached_key == new_key != old_key  # the cache was written again for the new source
+
+
+def test_cache_is_used_for_the_same_source(tmp_path):
+    path = str(tmp_path / 'world.json')
+    with open(path, 'w', encoding='UTF-8') as file:
+        json.dump(definition(), file)
+    game.World.load(path)
+    cache_path = game.World.cache_path(path)
+    with open(cache_path, 'rb') as file:
+        version, key, compiled = marshal.loads(file.read())
+    fight = dict(compiled[4], approach="from the cache")
+    with open(cache_path, 'wb') as file:
+        file.write(marshal.dumps((version, key, compiled[:4] + (fight,))))
+
+    assert game.World.load(path).fight['approach'] == "from the cache"